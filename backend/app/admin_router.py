@@ -0,0 +1,65 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse
+
+from .auth.dependencies import require_admin
+from .auth.hashing import hashing_executor
+from .auth.cache import token_cache, user_cache
+from .auth.revocation import revocation_list
+from .auth.sessions import session_store
+from .auth.login_guard import login_guard
+from .diagnostics import loop_monitor, sample_profile
+from .startup_report import startup_timer
+from .circuit_breaker import breakers
+from .spill_journal import spill_journal
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["Admin"],
+    dependencies=[Depends(require_admin)],
+)
+
+
+@router.get("/stats")
+async def get_runtime_stats():
+    """
+    Per-worker runtime statistics
+    """
+    return {
+        "hashing": hashing_executor.stats(),
+        "token_cache": token_cache.stats(),
+        "user_cache": user_cache.stats(),
+        "revocation": revocation_list.stats(),
+        "sessions": session_store.stats(),
+        "login_guard": login_guard.stats(),
+        "startup": startup_timer.stats(),
+        "breakers": {name: breaker.stats() for name, breaker in breakers.items()},
+        "spill_journal": spill_journal.stats(),
+    }
+
+
+@router.get("/diagnostics/loop")
+async def get_loop_diagnostics():
+    """
+    Event loop stall monitor state, with the stacks of recent stalls
+    """
+    return loop_monitor.stats()
+
+
+@router.get("/diagnostics/profile", response_class=PlainTextResponse)
+async def profile_worker(
+    seconds: float = Query(10, gt=0, le=60),
+    interval_ms: float = Query(5, ge=1, le=1000),
+    all_threads: bool = False,
+):
+    """
+    Sample this worker's stacks for a few seconds and return folded stacks,
+    ready for flamegraph.pl or speedscope
+    """
+    thread_id = None if all_threads else loop_monitor.loop_thread_id
+    try:
+        folded = await run_in_threadpool(sample_profile, seconds, interval_ms / 1000, thread_id)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    return PlainTextResponse(folded)
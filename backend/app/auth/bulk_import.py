@@ -0,0 +1,227 @@
+"""
+Bulk user import from CSV or JSONL.
+
+    python -m app.auth.bulk_import users.csv --report users.report.csv
+    python -m app.auth.bulk_import users.jsonl --workers 8 --batch-size 1000
+
+Each row needs email, username, full_name and password. phone is optional.
+role is optional, is one of the UserRole values, and defaults to user.
+
+Rows are checked with the same schema as /auth/register. Rows that repeat
+an email or username already seen earlier in the file are rejected before
+hashing, so no bcrypt time is spent on them. The rest are hashed on a
+process pool, one bcrypt per core. Each batch is written with unordered
+insert_many, so one duplicate does not stop the batch. A duplicate-key
+error from Mongo is reported against the row that caused it.
+
+Every row gets one line in the report:
+- created: the user was inserted;
+- invalid: the row failed schema validation;
+- duplicate: the email or username is already taken;
+- error: the write failed for another reason.
+The command exits 1 if any row failed.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, Union
+import argparse
+import asyncio
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+from pydantic import ValidationError
+from pymongo.errors import BulkWriteError, PyMongoError
+
+from ..database import database, get_users_collection
+from ..indexes import index_builder
+from .hashing import _timed_hash
+from .models import UserRole
+from .schemas import UserRegisterRequest
+from .utils import new_user_document, duplicate_key_message
+
+ROLES = {UserRole.ADMIN, UserRole.USER, UserRole.MODERATOR}
+DUPLICATE_KEY = 11000
+
+
+class ImportRow:
+    __slots__ = ("number", "email", "status", "detail", "user", "role", "password_hash")
+
+    def __init__(self, number: int, email: str):
+        self.number = number
+        self.email = email
+        self.status: Optional[str] = None
+        self.detail = ""
+        self.user: Optional[UserRegisterRequest] = None
+        self.role = UserRole.USER
+        self.password_hash: Optional[str] = None
+
+    def fail(self, status: str, detail: str):
+        self.status = status
+        self.detail = detail
+
+
+def read_records(path: str, file_format: str) -> Iterator[Union[dict, ValueError]]:
+    """Records in file order; a line that is not valid JSON comes back as its error"""
+    with open(path, newline="", encoding="utf-8") as f:
+        if file_format == "csv":
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    try:
+                        yield json.loads(line)
+                    except ValueError as e:
+                        yield e
+
+
+def validate(number: int, record: Union[dict, ValueError]) -> ImportRow:
+    if isinstance(record, ValueError):
+        row = ImportRow(number, "")
+        row.fail("invalid", f"not valid JSON: {record}")
+        return row
+    if not isinstance(record, dict):
+        row = ImportRow(number, "")
+        row.fail("invalid", f"expected a JSON object, got {type(record).__name__}")
+        return row
+
+    record = {key: value for key, value in record.items() if value not in ("", None)}
+    row = ImportRow(number, str(record.get("email", "")))
+    try:
+        row.user = UserRegisterRequest(**{key: record.get(key) for key in
+                                          ("email", "username", "full_name", "password", "phone")
+                                          if key in record})
+    except ValidationError as e:
+        row.fail("invalid", "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()))
+        return row
+
+    row.role = record.get("role", UserRole.USER)
+    if row.role not in ROLES:
+        row.fail("invalid", f"role: must be one of {', '.join(sorted(ROLES))}")
+    return row
+
+
+def load_rows(path: str, file_format: str) -> List[ImportRow]:
+    rows = []
+    seen_emails, seen_usernames = {}, {}
+    for number, record in enumerate(read_records(path, file_format), start=1):
+        row = validate(number, record)
+        if row.status is None:
+            email, username = row.user.email, row.user.username
+            if email in seen_emails:
+                row.fail("duplicate", f"Email repeats row {seen_emails[email]}")
+            elif username in seen_usernames:
+                row.fail("duplicate", f"Username repeats row {seen_usernames[username]}")
+            else:
+                seen_emails[email] = number
+                seen_usernames[username] = number
+        rows.append(row)
+    return rows
+
+
+async def hash_passwords(pool: ProcessPoolExecutor, rows: List[ImportRow]):
+    loop = asyncio.get_running_loop()
+    results = await asyncio.gather(*(loop.run_in_executor(pool, _timed_hash, row.user.password) for row in rows))
+    for row, (password_hash, _) in zip(rows, results):
+        row.password_hash = password_hash
+
+
+async def insert_batch(rows: List[ImportRow]):
+    users_collection = await get_users_collection()
+    documents = [new_user_document(row.user, row.password_hash, row.role) for row in rows]
+
+    failed = {}
+    try:
+        await users_collection.insert_many(documents, ordered=False)
+    except BulkWriteError as e:
+        failed = {error["index"]: error for error in e.details.get("writeErrors", [])}
+    except PyMongoError as e:
+        # The whole batch is unaccounted for; report it and move on
+        for row in rows:
+            row.fail("error", str(e))
+        return
+
+    for index, row in enumerate(rows):
+        error = failed.get(index)
+        if error is None:
+            row.status = "created"
+        elif error.get("code") == DUPLICATE_KEY:
+            row.fail("duplicate", duplicate_key_message(error))
+        else:
+            row.fail("error", error.get("errmsg", "write failed"))
+
+
+async def import_users(rows: List[ImportRow], workers: int, batch_size: int, progress=None):
+    pending = [row for row in rows if row.status is None]
+    batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    try:
+        # Hash batch n+1 while batch n is being written
+        next_hashes = asyncio.create_task(hash_passwords(pool, batches[0])) if batches else None
+        for i, batch in enumerate(batches):
+            await next_hashes
+            if i + 1 < len(batches):
+                next_hashes = asyncio.create_task(hash_passwords(pool, batches[i + 1]))
+            await insert_batch(batch)
+            if progress:
+                progress(sum(len(b) for b in batches[:i + 1]), len(pending))
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def write_report(rows: List[ImportRow], report_path: Optional[str]):
+    out = open(report_path, "w", newline="", encoding="utf-8") if report_path else sys.stdout
+    try:
+        writer = csv.writer(out)
+        writer.writerow(["row", "email", "status", "detail"])
+        for row in rows:
+            if report_path or row.status != "created":
+                writer.writerow([row.number, row.email, row.status, row.detail])
+    finally:
+        if report_path:
+            out.close()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=("csv", "jsonl"),
+                        help="defaults to the file extension (.csv, else jsonl)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="hashing processes")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--report", help="write the per-row report here (CSV); "
+                                         "without it, only failed rows are printed")
+    args = parser.parse_args()
+
+    file_format = args.format or ("csv" if args.path.lower().endswith(".csv") else "jsonl")
+    rows = load_rows(args.path, file_format)
+
+    def progress(done, total):
+        print(f"  {done}/{total} rows hashed and written", file=sys.stderr)
+
+    await database.connect_to_database()
+    started = time.perf_counter()
+    try:
+        # Duplicate detection relies on the unique indexes on users
+        await index_builder.wait()
+        await import_users(rows, args.workers, args.batch_size, progress)
+    finally:
+        await database.close_database_connection()
+    elapsed = time.perf_counter() - started
+
+    write_report(rows, args.report)
+
+    counts = {}
+    for row in rows:
+        counts[row.status] = counts.get(row.status, 0) + 1
+    summary = ", ".join(f"{count} {status}" for status, count in sorted(counts.items()))
+    print(f"Imported {len(rows)} rows in {elapsed:.1f} s: {summary}", file=sys.stderr)
+
+    return 0 if counts.get("created", 0) == len(rows) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,118 @@
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+import time
+
+from ..config import settings
+from ..metrics import registry, CallbackMetric
+
+
+class TTLCache:
+    """
+    Bounded LRU cache with a per-entry expiry.
+
+    Not thread-safe: it is only touched from the event loop. Every worker
+    process has its own copy.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self.entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+
+        self.entries[key] = (value, time.monotonic() + ttl)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key: Hashable):
+        self.entries.pop(key, None)
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+# Decoded access-token payloads, keyed by the raw token string
+token_cache = TTLCache(settings.token_cache_size, settings.token_cache_ttl)
+
+# UserInDB objects keyed by user id
+user_cache = TTLCache(settings.user_cache_size, settings.user_cache_ttl)
+
+# Serialized /auth/me and /auth/profile bodies keyed by (user id, view), as
+# (etag, body). Never outlives the user_cache entry it was rendered from.
+profile_response_cache = TTLCache(settings.profile_cache_size, settings.user_cache_ttl)
+
+
+PROFILE_VIEWS = ("me", "profile")
+
+
+def cache_token_payload(token: str, payload: dict):
+    """Cache a verified payload, never past the token's own exp claim"""
+    exp = payload.get("exp")
+    if exp is None:
+        return
+    token_cache.set(token, payload, ttl=exp - time.time())
+
+
+def invalidate_user(user_id: str):
+    """
+    Drop a user from this worker's cache. Call after any write to the user
+    document; other workers pick the change up within user_cache_ttl.
+    """
+    user_cache.pop(str(user_id))
+    for view in PROFILE_VIEWS:
+        profile_response_cache.pop((str(user_id), view))
+
+
+def _cache_samples(field: str) -> dict:
+    return {(name,): cache.stats()[field] for name, cache in (
+        ("token", token_cache), ("user", user_cache), ("profile", profile_response_cache))}
+
+
+registry.register(CallbackMetric(
+    "auth_cache_entries", "Entries held in the auth caches", ("cache",),
+    lambda: _cache_samples("size")))
+registry.register(CallbackMetric(
+    "auth_cache_hits_total", "Auth cache hits", ("cache",),
+    lambda: _cache_samples("hits"), kind="counter"))
+registry.register(CallbackMetric(
+    "auth_cache_misses_total", "Auth cache misses", ("cache",),
+    lambda: _cache_samples("misses"), kind="counter"))
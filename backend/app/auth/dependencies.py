@@ -2,14 +2,20 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from typing import Optional
 
-from .models import UserInDB
+from .models import UserInDB, UserRole, TokenUser
 from .utils import verify_token, get_user_by_id
+from .cache import token_cache, cache_token_payload
+from .revocation import revocation_list
 
 security = HTTPBearer(auto_error=False)
 
-async def get_current_user(
+async def get_current_token_user(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)
-) -> UserInDB:
+) -> TokenUser:
+    """
+    Identity from the access token alone: signature, expiry and revocation are
+    checked, but the user document is not fetched.
+    """
     if not credentials:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -17,24 +23,40 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    token_payload = verify_token(credentials.credentials)
+    token_payload = token_cache.get(credentials.credentials)
 
-    if not token_payload or token_payload.get("type") != "access":
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+    if token_payload is None:
+        token_payload = verify_token(credentials.credentials)
+
+        if not token_payload or token_payload.get("type") != "access":
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid token",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+
+        if not token_payload.get("sub"):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid token",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
 
-    user_id = token_payload.get("sub")
-    if not user_id:
+        cache_token_payload(credentials.credentials, token_payload)
+
+    if revocation_list.is_revoked(token_payload):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token",
+            detail="Token has been revoked",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    user = await get_user_by_id(user_id)
+    return TokenUser.from_payload(token_payload)
+
+async def get_current_user(
+    token_user: TokenUser = Depends(get_current_token_user)
+) -> UserInDB:
+    user = await get_user_by_id(token_user.id)
 
     if not user or not user.is_active:
         raise HTTPException(
@@ -42,4 +64,13 @@ async def get_current_user(
             detail="User not found or inactive",
         )
 
-    return user
\ No newline at end of file
+    return user
+
+async def require_admin(token_user: TokenUser = Depends(get_current_token_user)) -> TokenUser:
+    if token_user.role != UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin privileges required",
+        )
+
+    return token_user
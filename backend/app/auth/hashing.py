@@ -0,0 +1,149 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+
+from ..config import settings
+from ..metrics import registry, password_hash_calls, CallbackMetric
+
+logger = logging.getLogger(__name__)
+
+pwd_context = None
+
+def _get_context():
+    # passlib is only needed inside the pool workers; the web process never
+    # imports it
+    global pwd_context
+    if pwd_context is None:
+        from passlib.context import CryptContext
+        pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    return pwd_context
+
+# These run inside the pool workers and report their own CPU time so the
+# parent can compute utilization without sampling the children.
+def _timed_hash(password: str):
+    started = time.perf_counter()
+    return _get_context().hash(password), time.perf_counter() - started
+
+def _timed_verify(plain_password: str, hashed_password: str):
+    started = time.perf_counter()
+    return _get_context().verify(plain_password, hashed_password), time.perf_counter() - started
+
+def _warm_up():
+    _get_context()
+    return None, 0.0
+
+
+class HashingOverloaded(Exception):
+    """The hashing queue is full; the caller should retry after retry_after seconds"""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Password hashing queue is full")
+        self.retry_after = retry_after
+
+
+class HashingExecutor:
+    """
+    Runs bcrypt in a process pool so hashing never holds the event loop.
+
+    The pool has one process per core by default. Calls beyond the pool size
+    wait in the executor queue, up to hash_max_queue of them; past that the
+    call is refused with HashingOverloaded (503 + Retry-After over HTTP)
+    instead of letting a login burst build an unbounded backlog.
+
+    If a worker dies (OOM kill, segfault) the executor marks the whole pool
+    broken. The call that notices replaces the pool and retries once, so one
+    dead worker costs a respawn rather than every later login.
+    """
+
+    def __init__(self, workers: Optional[int] = None, max_queue: Optional[int] = None):
+        self.workers = workers or settings.hash_workers or os.cpu_count() or 1
+        self.max_queue = max_queue if max_queue is not None else settings.hash_max_queue
+        self.pool: Optional[ProcessPoolExecutor] = None
+        self.pending = 0
+        self.started_at = time.monotonic()
+        self.busy_seconds = 0.0
+        self.completed = 0
+        self.rejected = 0
+
+    async def start(self):
+        if self.pool is None:
+            # spawn, not fork: the parent already runs Motor's monitor threads
+            self.pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            self.started_at = time.monotonic()
+            loop = asyncio.get_running_loop()
+            await asyncio.gather(*(loop.run_in_executor(self.pool, _warm_up) for _ in range(self.workers)))
+            logger.info("Password hashing pool started with %s workers", self.workers)
+
+    async def shutdown(self):
+        if self.pool is not None:
+            pool, self.pool = self.pool, None
+            await asyncio.to_thread(pool.shutdown, wait=True, cancel_futures=True)
+
+    async def _replace_broken(self, pool: ProcessPoolExecutor):
+        # Concurrent calls all see the same broken pool; only the first replaces it
+        if self.pool is pool:
+            logger.error("Password hashing pool broken (a worker died), starting a new one")
+            self.pool = None
+            await asyncio.to_thread(pool.shutdown, wait=False, cancel_futures=True)
+        await self.start()
+
+    async def run(self, fn, *args):
+        operation = "hash" if fn is _timed_hash else "verify"
+        if self.pending >= self.workers + self.max_queue:
+            self.rejected += 1
+            password_hash_calls.inc(operation, "rejected")
+            raise HashingOverloaded(settings.hash_retry_after)
+
+        await self.start()
+        self.pending += 1
+        try:
+            pool = self.pool
+            try:
+                result, elapsed = await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+            except BrokenProcessPool:
+                await self._replace_broken(pool)
+                result, elapsed = await asyncio.get_running_loop().run_in_executor(self.pool, fn, *args)
+        finally:
+            self.pending -= 1
+
+        self.busy_seconds += elapsed
+        self.completed += 1
+        password_hash_calls.inc(operation, "ok")
+        return result
+
+    async def hash(self, password: str) -> str:
+        return await self.run(_timed_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self.run(_timed_verify, plain_password, hashed_password)
+
+    def stats(self) -> dict:
+        uptime = max(time.monotonic() - self.started_at, 1e-9)
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "in_flight": min(self.pending, self.workers),
+            "queued": max(self.pending - self.workers, 0),
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "current_utilization": round(min(self.pending, self.workers) / self.workers, 3),
+            "average_utilization": round(self.busy_seconds / (uptime * self.workers), 3),
+        }
+
+
+hashing_executor = HashingExecutor()
+
+registry.register(CallbackMetric(
+    "password_hash_pool_utilization", "Share of hashing workers busy right now", (),
+    lambda: {(): hashing_executor.stats()["current_utilization"]}))
+registry.register(CallbackMetric(
+    "password_hash_pool_queued", "Hash calls waiting for a free worker", (),
+    lambda: {(): hashing_executor.stats()["queued"]}))
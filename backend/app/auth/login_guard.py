@@ -0,0 +1,191 @@
+"""
+Login guard: throttles failed logins per account and per IP before any bcrypt work.
+
+Failures are kept in a sliding window per key ("account:<email>" and
+"ip:<address>"). Once a key has delay_after failures in the window, its next
+attempt is refused until a delay has passed since the last failure. The
+delay doubles with each further failure, up to login_max_delay. At
+lockout_after failures the key is locked for login_lockout_seconds. A
+refused attempt gets 429 + Retry-After. It costs a dict lookup, or one small
+Mongo read when syncing, and never a bcrypt verify. Refused attempts are not
+counted as failures, so waiting out the delay is enough.
+
+State is per worker by default. With LOGIN_GUARD_SYNC=true, failures are
+also written to the login_failures collection, and each check reads it, so
+all workers share one count. Documents there expire through a TTL index.
+If Mongo is unavailable the guard falls back to this worker's own counts.
+"""
+from collections import OrderedDict, deque
+from datetime import datetime, timezone, timedelta
+from typing import Deque, Dict, List, Optional
+import logging
+import secrets
+import time
+
+from pymongo import UpdateOne
+
+from ..config import settings
+from ..database import get_login_failures_collection
+from ..metrics import registry, Counter
+from .hashing import hashing_executor
+
+logger = logging.getLogger(__name__)
+
+login_attempts = registry.register(Counter(
+    "login_attempts_total", "Login attempts by outcome", ("outcome",)))
+
+
+class LoginPolicy:
+    def __init__(self, delay_after: int, lockout_after: int):
+        self.delay_after = delay_after
+        self.lockout_after = lockout_after
+
+    def retry_at(self, failures: Deque[float]) -> Optional[float]:
+        """
+        Epoch time before which the next attempt is refused, if any. Failures
+        are counted in the window ending at the most recent one, so a lockout
+        lasts its full duration even when that is longer than the window.
+        """
+        if not failures:
+            return None
+        last = failures[-1]
+        count = sum(1 for t in failures if t > last - settings.login_window_seconds)
+        if count >= self.lockout_after:
+            return last + settings.login_lockout_seconds
+        if count >= self.delay_after:
+            return last + min(settings.login_max_delay, settings.login_base_delay * 2 ** (count - self.delay_after))
+        return None
+
+    def is_lockout(self, failures: Deque[float]) -> bool:
+        last = failures[-1]
+        return sum(1 for t in failures if t > last - settings.login_window_seconds) >= self.lockout_after
+
+
+class LoginDecision:
+    __slots__ = ("allowed", "retry_after", "reason")
+
+    def __init__(self, allowed: bool, retry_after: int = 0, reason: str = ""):
+        self.allowed = allowed
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class LoginGuard:
+    def __init__(self):
+        self.policies = {
+            "account": LoginPolicy(settings.login_account_delay_after, settings.login_account_lockout_after),
+            "ip": LoginPolicy(settings.login_ip_delay_after, settings.login_ip_lockout_after),
+        }
+        self.retention = max(settings.login_window_seconds, settings.login_lockout_seconds)
+        self.failures: "OrderedDict[str, Deque[float]]" = OrderedDict()
+        self.dummy_hash: Optional[str] = None
+
+    @staticmethod
+    def keys(email: str, ip: str) -> Dict[str, str]:
+        return {"account": f"account:{email.strip().lower()}", "ip": f"ip:{ip}"}
+
+    def _window(self, key: str) -> Deque[float]:
+        window = self.failures.get(key)
+        if window is None:
+            window = self.failures[key] = deque()
+            if len(self.failures) > settings.login_guard_max_keys:
+                self.failures.popitem(last=False)
+        else:
+            self.failures.move_to_end(key)
+
+        cutoff = time.time() - self.retention
+        while window and window[0] <= cutoff:
+            window.popleft()
+        return window
+
+    async def check(self, email: str, ip: str) -> LoginDecision:
+        keys = self.keys(email, ip)
+        if settings.login_guard_sync:
+            await self._pull(list(keys.values()))
+
+        now = time.time()
+        for kind, key in keys.items():
+            window = self._window(key)
+            retry_at = self.policies[kind].retry_at(window)
+            if retry_at is not None and retry_at > now:
+                reason = "locked" if self.policies[kind].is_lockout(window) else "delayed"
+                login_attempts.inc(f"{kind}_{reason}")
+                return LoginDecision(False, max(1, int(retry_at - now + 0.999)), reason)
+        return LoginDecision(True)
+
+    async def record_failure(self, email: str, ip: str):
+        login_attempts.inc("failure")
+        now = time.time()
+        keys = list(self.keys(email, ip).values())
+        for key in keys:
+            self._window(key).append(now)
+
+        if settings.login_guard_sync:
+            expires_at = datetime.now(timezone.utc) + timedelta(seconds=self.retention)
+            cap = max(policy.lockout_after for policy in self.policies.values())
+            try:
+                login_failures_collection = await get_login_failures_collection()
+                await login_failures_collection.bulk_write([
+                    UpdateOne(
+                        {"_id": key},
+                        {"$push": {"failures": {"$each": [now], "$slice": -cap}}, "$set": {"expires_at": expires_at}},
+                        upsert=True,
+                    )
+                    for key in keys
+                ], ordered=False)
+            except Exception as e:
+                logger.warning("Login guard sync failed, counting locally: %s", e)
+
+    async def record_success(self, email: str):
+        login_attempts.inc("success")
+        key = self.keys(email, "")["account"]
+        self.failures.pop(key, None)
+        if settings.login_guard_sync:
+            try:
+                login_failures_collection = await get_login_failures_collection()
+                await login_failures_collection.delete_one({"_id": key})
+            except Exception as e:
+                logger.warning("Login guard sync failed: %s", e)
+
+    async def _pull(self, keys: List[str]):
+        try:
+            login_failures_collection = await get_login_failures_collection()
+            docs = {doc["_id"]: doc async for doc in login_failures_collection.find({"_id": {"$in": keys}})}
+        except Exception as e:
+            logger.warning("Login guard sync failed, using local counts: %s", e)
+            return
+
+        # Every failure this worker saw was also pushed to Mongo, so the
+        # stored list is the complete one
+        for key in keys:
+            doc = docs.get(key)
+            if doc is None:
+                self.failures.pop(key, None)
+            else:
+                self.failures[key] = deque(sorted(doc.get("failures", [])))
+
+    async def prepare(self):
+        """
+        Hash the dummy password at startup. Done lazily, the first login for
+        an unknown email would pay for a hash and a verify, and its timing
+        would give away that the account does not exist.
+        """
+        if self.dummy_hash is None:
+            self.dummy_hash = await hashing_executor.hash(secrets.token_urlsafe(16))
+
+    async def verify_dummy(self, password: str):
+        """
+        Spend one bcrypt verify on an email that has no account, so the
+        response takes as long as a wrong password for a real one.
+        """
+        await self.prepare()  # only does work outside the app, e.g. in scripts
+        await hashing_executor.verify(password, self.dummy_hash)
+
+    def stats(self) -> dict:
+        return {
+            "tracked_keys": len(self.failures),
+            "synced": settings.login_guard_sync,
+        }
+
+
+login_guard = LoginGuard()
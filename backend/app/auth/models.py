@@ -1,4 +1,4 @@
-from datetime import datetime, timezone
+from datetime import datetime
 from typing import Optional, Dict, Any
 
 class UserRole:
@@ -7,6 +7,8 @@ class UserRole:
     MODERATOR = "moderator"
 
 class UserBase:
+    __slots__ = ("email", "full_name", "username", "is_active", "role")
+
     def __init__(self, email: str, full_name: str, username: str, is_active: bool = True, role: str = UserRole.USER):
         self.email = email
         self.full_name = full_name
@@ -14,32 +16,103 @@ class UserBase:
         self.is_active = is_active
         self.role = role
 
+class TokenUser:
+    """Identity taken from the signed claims of a verified access token"""
+    def __init__(self, id: str, email: str, role: str, jti: str = None, exp: float = None, sid: str = None):
+        self.id = id
+        self.email = email
+        self.role = role
+        self.jti = jti
+        self.exp = exp
+        self.sid = sid
+
+    @classmethod
+    def from_payload(cls, payload: dict):
+        return cls(
+            id=payload["sub"],
+            email=payload.get("email", ""),
+            role=payload.get("role", UserRole.USER),
+            jti=payload.get("jti"),
+            exp=payload.get("exp"),
+            sid=payload.get("sid")
+        )
+
+# Fields a user document can carry that most requests never look at
+PROFILE_FIELDS = ("address", "preferences", "profile_picture")
+
+# Mongo projections, one per use case. AUTH_CHECK is what an authenticated
+# request needs to answer /auth/me (updated_at is its ETag); LOGIN adds the password hash; PROFILE
+# adds the heavy fields that only the full profile shows.
+AUTH_CHECK_PROJECTION = {
+    "email": 1, "full_name": 1, "username": 1, "role": 1, "is_active": 1,
+    "email_verified": 1, "phone": 1, "created_at": 1, "last_login_at": 1, "updated_at": 1,
+}
+LOGIN_PROJECTION = {**AUTH_CHECK_PROJECTION, "password_hash": 1}
+PROFILE_FIELDS_PROJECTION = {field: 1 for field in PROFILE_FIELDS}
+PROFILE_PROJECTION = {**AUTH_CHECK_PROJECTION, **PROFILE_FIELDS_PROJECTION}
+
 class UserInDB(UserBase):
-    def __init__(self, id: str, email: str, full_name: str, username: str, password_hash: str, 
-                 is_active: bool = True, role: str = UserRole.USER, created_at: datetime = None, 
-                 updated_at: datetime = None, last_login_at: datetime = None, 
-                 email_verified: bool = False, phone: str = None, address: dict = None, 
-                 preferences: dict = None, profile_picture: str = None):
+    """
+    A user as read from Mongo, holding only the fields that were projected.
+
+    Fields a projection left out are None. The profile fields are kept apart:
+    reading address, preferences or profile_picture before they have been
+    loaded (see utils.load_profile_fields) raises instead of returning a
+    misleading empty value.
+    """
+    __slots__ = ("id", "password_hash", "created_at", "updated_at", "last_login_at",
+                 "email_verified", "phone", "_profile")
+
+    def __init__(self, id: str, email: str, full_name: str, username: str, password_hash: str = None,
+                 is_active: bool = True, role: str = UserRole.USER, created_at: datetime = None,
+                 updated_at: datetime = None, last_login_at: datetime = None,
+                 email_verified: bool = False, phone: str = None, profile: dict = None):
         super().__init__(email, full_name, username, is_active, role)
         self.id = id
         self.password_hash = password_hash
-        self.created_at = created_at or datetime.now(timezone.utc)
-        self.updated_at = updated_at or datetime.now(timezone.utc)
+        self.created_at = created_at
+        self.updated_at = updated_at
         self.last_login_at = last_login_at
         self.email_verified = email_verified
         self.phone = phone
-        self.address = address or {}
-        self.preferences = preferences or {}
-        self.profile_picture = profile_picture
+        self._profile = profile
+
+    @property
+    def has_profile_fields(self) -> bool:
+        return self._profile is not None
+
+    def set_profile_fields(self, data: dict) -> None:
+        self._profile = {
+            "address": data.get("address"),
+            "preferences": data.get("preferences") or {},
+            "profile_picture": data.get("profile_picture"),
+        }
+
+    def _profile_field(self, name: str):
+        if self._profile is None:
+            raise AttributeError(f"{name} was not loaded; use a profile projection")
+        return self._profile[name]
+
+    @property
+    def address(self) -> Optional[dict]:
+        return self._profile_field("address")
+
+    @property
+    def preferences(self) -> dict:
+        return self._profile_field("preferences")
+
+    @property
+    def profile_picture(self) -> Optional[str]:
+        return self._profile_field("profile_picture")
 
     @classmethod
     def from_dict(cls, data: dict):
-        return cls(
+        user = cls(
             id=str(data.get("_id", "")),
             email=data.get("email", ""),
             full_name=data.get("full_name", ""),
             username=data.get("username", ""),
-            password_hash=data.get("password_hash", ""),
+            password_hash=data.get("password_hash"),
             is_active=data.get("is_active", True),
             role=data.get("role", UserRole.USER),
             created_at=data.get("created_at"),
@@ -47,7 +120,8 @@ class UserInDB(UserBase):
             last_login_at=data.get("last_login_at"),
             email_verified=data.get("email_verified", False),
             phone=data.get("phone"),
-            address=data.get("address"),
-            preferences=data.get("preferences"),
-            profile_picture=data.get("profile_picture")
         )
+        # Only treat the profile fields as loaded if the projection asked for them
+        if any(field in data for field in PROFILE_FIELDS):
+            user.set_profile_fields(data)
+        return user
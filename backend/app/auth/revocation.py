@@ -0,0 +1,129 @@
+from datetime import datetime, timezone, timedelta
+from typing import Dict, Optional, Tuple
+import asyncio
+import logging
+import time
+
+from ..config import settings
+from ..database import get_revoked_tokens_collection
+
+logger = logging.getLogger(__name__)
+
+# Overlap between incremental refreshes, so a revocation written by another
+# worker with a slightly older revoked_at is still picked up.
+SYNC_OVERLAP = timedelta(seconds=5)
+
+
+class RevocationList:
+    """
+    Per-worker mirror of the revoked_tokens collection.
+
+    Two kinds of entries are stored, both expiring with the tokens they cover
+    (Mongo drops them through a TTL index on expires_at):
+      - {"_id": <jti>} revokes a single token, e.g. on logout;
+      - {"_id": "user:<id>", "not_before": ts} revokes every token for a user
+        issued before ts, e.g. on deactivation or a role change.
+
+    Lookups are plain dict hits, so checking a token costs no I/O. The mirror is
+    refreshed every revocation_refresh_interval seconds by pulling only the
+    entries revoked since the previous pass.
+    """
+
+    def __init__(self):
+        self.tokens: Dict[str, float] = {}
+        self.users: Dict[str, Tuple[float, float]] = {}
+        self.synced_until: Optional[datetime] = None
+        self.task: Optional[asyncio.Task] = None
+
+    def is_revoked(self, payload: dict) -> bool:
+        now = time.time()
+
+        expires_at = self.tokens.get(payload.get("jti"))
+        if expires_at is not None and expires_at > now:
+            return True
+
+        user_entry = self.users.get(payload.get("sub"))
+        if user_entry is not None:
+            not_before, expires_at = user_entry
+            if expires_at > now and payload.get("iat", 0) < not_before:
+                return True
+
+        return False
+
+    async def revoke_token(self, jti: str, expires_at: float):
+        self.tokens[jti] = expires_at
+        await self._store({
+            "_id": jti,
+            "expires_at": datetime.fromtimestamp(expires_at, timezone.utc),
+        })
+
+    async def revoke_user(self, user_id: str):
+        # Only access tokens skip the user lookup, so the entry only needs to
+        # outlive the longest-lived access token.
+        not_before = time.time()
+        expires_at = not_before + settings.access_token_expire_minutes * 60
+        self.users[str(user_id)] = (not_before, expires_at)
+        await self._store({
+            "_id": f"user:{user_id}",
+            "not_before": not_before,
+            "expires_at": datetime.fromtimestamp(expires_at, timezone.utc),
+        })
+
+    async def _store(self, entry: dict):
+        revoked_tokens_collection = await get_revoked_tokens_collection()
+        entry["revoked_at"] = datetime.now(timezone.utc)
+        await revoked_tokens_collection.replace_one({"_id": entry["_id"]}, entry, upsert=True)
+
+    async def refresh(self):
+        revoked_tokens_collection = await get_revoked_tokens_collection()
+
+        now = datetime.now(timezone.utc)
+        query = {"expires_at": {"$gt": now}}
+        if self.synced_until is not None:
+            query["revoked_at"] = {"$gte": self.synced_until - SYNC_OVERLAP}
+
+        async for entry in revoked_tokens_collection.find(query):
+            expires_at = entry["expires_at"].replace(tzinfo=timezone.utc).timestamp()
+            if entry["_id"].startswith("user:"):
+                self.users[entry["_id"][5:]] = (entry["not_before"], expires_at)
+            else:
+                self.tokens[entry["_id"]] = expires_at
+        self.synced_until = now
+
+        self._prune()
+
+    def _prune(self):
+        now = time.time()
+        self.tokens = {jti: exp for jti, exp in self.tokens.items() if exp > now}
+        self.users = {uid: entry for uid, entry in self.users.items() if entry[1] > now}
+
+    async def run(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error("Revocation list refresh failed: %s", e)
+            await asyncio.sleep(settings.revocation_refresh_interval)
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    def stats(self) -> dict:
+        return {
+            "revoked_tokens": len(self.tokens),
+            "revoked_users": len(self.users),
+            "synced_until": self.synced_until.isoformat() if self.synced_until else None,
+        }
+
+
+revocation_list = RevocationList()
@@ -1,17 +1,33 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.responses import JSONResponse
+from typing import Optional
 import logging
 
 from .schemas import (
     UserRegisterRequest,
     UserLoginRequest,
+    RefreshRequest,
     TokenResponse,
     UserResponse,
+    UserProfileResponse,
     MessageResponse,
 )
-from .models import UserInDB
-from .utils import create_user, authenticate_user, create_user_tokens
-from .dependencies import get_current_user
+from .models import UserInDB, TokenUser
+from .serialization import (
+    user_body, profile_body, token_body, json_response, user_etag, validator_headers, not_modified,
+)
+from .cache import profile_response_cache
+from ..static_files import etag_matches
+from .utils import (
+    create_user, authenticate_user, open_user_session, refresh_user_session, load_profile_fields,
+    RegistrationUnavailable,
+)
+from .dependencies import get_current_user, get_current_token_user
+from .revocation import revocation_list
+from .sessions import session_store, SessionError
+from .login_guard import login_guard
+from .hashing import HashingOverloaded
+from ..request_utils import client_ip
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +37,15 @@ router = APIRouter(
 )
 
 
+async def hashing_overloaded_handler(request: Request, exc: HashingOverloaded) -> JSONResponse:
+    """Registered on the app: any route that hashes or verifies a password can shed load"""
+    return JSONResponse(
+        {"detail": "Authentication service is busy, please retry"},
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
 @router.post("/register", status_code=status.HTTP_201_CREATED, response_model=TokenResponse)
 async def register_user(payload: UserRegisterRequest):
     """
@@ -28,40 +53,28 @@ async def register_user(payload: UserRegisterRequest):
     """
     try:
         user = await create_user(payload)
-        token_data = create_user_tokens(user)
-
-        user_response = UserResponse(
-            id=str(user.id),
-            email=user.email,
-            full_name=user.full_name,
-            username=user.username,
-            role=user.role,
-            is_active=user.is_active,
-            email_verified=user.email_verified,
-            phone=user.phone,
-            created_at=user.created_at,
-            last_login_at=user.last_login_at,
-        )
-
-        token_response = TokenResponse(
-            access_token=token_data["access_token"],
-            refresh_token=token_data["refresh_token"],
-            token_type=token_data["token_type"],
-            expires_in=token_data["expires_in"],
-            user=user_response,
-        )
+        token_data = await open_user_session(user)
 
-        logger.info(f"✅ User registered: {user.email}")
-        return JSONResponse(content=token_response.to_dict(), status_code=201)
+        logger.info("✅ User registered: %s", user.email)
+        return json_response(token_body(user, token_data), status_code=201)
 
+    except (HTTPException, HashingOverloaded):
+        raise
+    except RegistrationUnavailable as e:
+        logger.warning("⚠️ Registration refused: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Registration is temporarily unavailable, please retry",
+            headers={"Retry-After": "5"},
+        )
     except ValueError as e:
-        logger.warning(f"⚠️ Registration failed: {e}")
+        logger.warning("⚠️ Registration failed: %s", e)
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail=str(e),
         )
     except Exception as e:
-        logger.error(f"❌ Registration error: {e}")
+        logger.error("❌ Registration error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to create user account",
@@ -69,96 +82,115 @@ async def register_user(payload: UserRegisterRequest):
 
 
 @router.post("/login", response_model=TokenResponse)
-async def login_user(payload: UserLoginRequest):
+async def login_user(payload: UserLoginRequest, request: Request):
     """
     Authenticate user and return tokens + profile
     """
+    ip = client_ip(request)
+    decision = await login_guard.check(payload.email, ip)
+    if not decision.allowed:
+        logger.warning("⛔ Login %s for %s from %s", decision.reason, payload.email, ip)
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many failed login attempts, please try again later",
+            headers={"Retry-After": str(decision.retry_after)},
+        )
+
     user = await authenticate_user(payload.email, payload.password)
 
     if not user:
-        logger.warning(f"❌ Login failed for {payload.email}")
+        await login_guard.record_failure(payload.email, ip)
+        logger.warning("❌ Login failed for %s", payload.email)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    token_data = create_user_tokens(user)
-
-    user_response = UserResponse(
-        id=str(user.id),
-        email=user.email,
-        full_name=user.full_name,
-        username=user.username,
-        role=user.role,
-        is_active=user.is_active,
-        email_verified=user.email_verified,
-        phone=user.phone,
-        created_at=user.created_at,
-        last_login_at=user.last_login_at,
-    )
+    await login_guard.record_success(payload.email)
+    token_data = await open_user_session(user)
 
-    token_response = TokenResponse(
-        access_token=token_data["access_token"],
-        refresh_token=token_data["refresh_token"],
-        token_type=token_data["token_type"],
-        expires_in=token_data["expires_in"],
-        user=user_response,
-    )
+    logger.info("✅ User logged in: %s", user.email)
+    return json_response(token_body(user, token_data))
 
-    logger.info(f"✅ User logged in: {user.email}")
-    return JSONResponse(content=token_response.to_dict())
 
+@router.post("/refresh", response_model=TokenResponse)
+async def refresh_tokens(payload: RefreshRequest):
+    """
+    Exchange a refresh token for a new token pair. The refresh token is
+    rotated: the one presented stops working, and presenting it again
+    revokes the session.
+    """
+    try:
+        user, token_data = await refresh_user_session(payload.refresh_token)
+    except SessionError as e:
+        logger.warning("❌ Token refresh rejected: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=str(e),
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    return json_response(token_body(user, token_data))
 
-@router.get("/profile", response_model=UserResponse)
-async def get_user_profile(current_user: UserInDB = Depends(get_current_user)):
+
+def cached_view(user: UserInDB, view: str, etag: str) -> Optional[bytes]:
+    entry = profile_response_cache.get((user.id, view))
+    if entry is not None and entry[0] == etag:
+        return entry[1]
+    return None
+
+
+@router.get("/profile", response_model=UserProfileResponse)
+async def get_user_profile(request: Request, current_user: UserInDB = Depends(get_current_user)):
     """
-    Get full user profile of the currently logged-in user
+    Get full user profile of the currently logged-in user. Supports
+    If-None-Match; unchanged profiles get 304 without loading the heavy
+    profile fields.
     """
-    user_response = UserResponse(
-        id=str(current_user.id),
-        email=current_user.email,
-        full_name=current_user.full_name,
-        username=current_user.username,
-        role=current_user.role,
-        is_active=current_user.is_active,
-        email_verified=current_user.email_verified,
-        phone=current_user.phone,
-        created_at=current_user.created_at,
-        last_login_at=current_user.last_login_at,
-    )
+    etag = user_etag(current_user, "profile")
+    if etag_matches(request, etag):
+        return not_modified(etag)
 
-    logger.info(f"👤 Profile accessed: {current_user.email}")
-    return JSONResponse(content=user_response.to_dict())
+    body = cached_view(current_user, "profile", etag)
+    if body is None:
+        await load_profile_fields(current_user)
+        body = profile_body(current_user)
+        profile_response_cache.set((current_user.id, "profile"), (etag, body))
+
+    logger.info("👤 Profile accessed: %s", current_user.email)
+    return json_response(body, headers=validator_headers(etag))
 
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user_info(current_user: UserInDB = Depends(get_current_user)):
+async def get_current_user_info(request: Request, current_user: UserInDB = Depends(get_current_user)):
     """
-    Shortcut to get current logged-in user info
+    Shortcut to get current logged-in user info. Supports If-None-Match.
     """
-    user_response = UserResponse(
-        id=str(current_user.id),
-        email=current_user.email,
-        full_name=current_user.full_name,
-        username=current_user.username,
-        role=current_user.role,
-        is_active=current_user.is_active,
-        email_verified=current_user.email_verified,
-        phone=current_user.phone,
-        created_at=current_user.created_at,
-        last_login_at=current_user.last_login_at,
-    )
+    etag = user_etag(current_user, "me")
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    body = cached_view(current_user, "me", etag)
+    if body is None:
+        body = user_body(current_user)
+        profile_response_cache.set((current_user.id, "me"), (etag, body))
 
-    return JSONResponse(content=user_response.to_dict())
+    return json_response(body, headers=validator_headers(etag))
 
 
 @router.post("/logout", response_model=MessageResponse)
-async def logout_user(current_user: UserInDB = Depends(get_current_user)):
+async def logout_user(current_user: TokenUser = Depends(get_current_token_user)):
     """
-    Logout current user (invalidate token if implemented)
+    Logout current user by revoking the access token that made the request
+    and the session it belongs to
     """
-    message_response = MessageResponse("Successfully logged out", True)
-    logger.info(f"👋 User logged out: {current_user.email}")
-    return JSONResponse(content=message_response.to_dict())
+    if current_user.jti:
+        await revocation_list.revoke_token(current_user.jti, current_user.exp)
+    if current_user.sid:
+        await session_store.revoke(current_user.sid)
+
+    message_response = MessageResponse(message="Successfully logged out", success=True)
+    logger.info("👋 User logged out: %s", current_user.email)
+    return JSONResponse(content=message_response.model_dump())
 
@@ -18,6 +18,10 @@ class UserLoginRequest(BaseModel):
     password: str
 
 
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+
 # --------- Response Schemas ---------
 
 class UserResponse(BaseModel):
@@ -33,6 +37,12 @@ class UserResponse(BaseModel):
     last_login_at: Optional[datetime] = None
 
 
+class UserProfileResponse(UserResponse):
+    address: Optional[dict] = None
+    preferences: dict = {}
+    profile_picture: Optional[str] = None
+
+
 class TokenResponse(BaseModel):
     access_token: str
     refresh_token: str
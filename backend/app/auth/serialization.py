@@ -0,0 +1,100 @@
+from datetime import timezone
+from typing import Any, Optional
+
+from bson import ObjectId
+from fastapi.responses import Response
+import orjson
+
+from .models import UserInDB
+
+# Naive datetimes coming back from Mongo are UTC; say so in the output
+DUMPS_OPTIONS = orjson.OPT_NAIVE_UTC
+
+
+def _default(value: Any):
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=DUMPS_OPTIONS)
+
+
+def user_projection(user: UserInDB) -> dict:
+    """
+    The public view of a user, with the same fields as schemas.UserResponse.
+    Values are left as they are (datetime, ObjectId) for orjson to encode.
+    """
+    return {
+        "id": user.id,
+        "email": user.email,
+        "full_name": user.full_name,
+        "username": user.username,
+        "role": user.role,
+        "is_active": user.is_active,
+        "email_verified": user.email_verified,
+        "phone": user.phone,
+        "created_at": user.created_at,
+        "last_login_at": user.last_login_at,
+    }
+
+
+def profile_projection(user: UserInDB) -> dict:
+    """user_projection plus the profile fields, which must have been loaded"""
+    return {
+        **user_projection(user),
+        "address": user.address,
+        "preferences": user.preferences,
+        "profile_picture": user.profile_picture,
+    }
+
+
+def user_body(user: UserInDB) -> bytes:
+    return dumps(user_projection(user))
+
+
+def profile_body(user: UserInDB) -> bytes:
+    return dumps(profile_projection(user))
+
+
+def token_body(user: UserInDB, token_data: dict) -> bytes:
+    """Body of schemas.TokenResponse: the tokens plus the user's public view"""
+    return dumps({
+        "access_token": token_data["access_token"],
+        "refresh_token": token_data["refresh_token"],
+        "token_type": token_data["token_type"],
+        "expires_in": token_data["expires_in"],
+        "user": user_projection(user),
+    })
+
+
+def user_etag(user: UserInDB, view: str) -> str:
+    """
+    Validator for a user's /auth/me or /auth/profile body. Every write to the
+    user document bumps updated_at (logins included), so it changes exactly
+    when the body can.
+    """
+    updated_at = user.updated_at or user.created_at
+    if updated_at is None:
+        version = "0"
+    else:
+        if updated_at.tzinfo is None:
+            updated_at = updated_at.replace(tzinfo=timezone.utc)
+        # Mongo keeps milliseconds; round so the value read back matches
+        version = f"{int(updated_at.timestamp() * 1000):x}"
+    return f'"{user.id}-{version}-{view}"'
+
+
+def validator_headers(etag: str) -> dict:
+    # private: the body is per user; no-cache: revalidate on every poll
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers=validator_headers(etag))
+
+
+def json_response(body: bytes, status_code: int = 200, headers: Optional[dict] = None) -> Response:
+    """Send already-serialized JSON without going through FastAPI's encoder"""
+    return Response(content=body, status_code=status_code, headers=headers, media_type="application/json")
@@ -0,0 +1,141 @@
+from datetime import datetime, timezone, timedelta
+from typing import Optional, Tuple
+import logging
+import uuid
+
+from ..config import settings
+from ..database import get_sessions_collection
+from .cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class SessionError(Exception):
+    """The refresh token does not belong to a live session"""
+
+
+class SessionStore:
+    """
+    Server-side refresh-token sessions, stored in the sessions collection.
+
+    A session is opened at login and lives as long as its refresh token. Each
+    refresh rotates it: the presented token's jti must equal the session's
+    current jti, which is swapped for a new one in a single conditional
+    update. Presenting an older jti means a rotated-out refresh token was
+    replayed, so the whole session is revoked. Mongo drops sessions through a
+    TTL index on expires_at.
+
+    Active sessions are kept in a per-worker hot cache so a refresh needs no
+    read. The cache may be stale when another worker rotated or revoked the
+    session; the conditional update then matches nothing and the session is
+    re-read before deciding.
+    """
+
+    def __init__(self):
+        self.cache = TTLCache(settings.session_cache_size, settings.session_cache_ttl)
+        self.rotations = 0
+        self.reuse_detected = 0
+
+    async def open(self, user_id: str) -> Tuple[str, str]:
+        """Start a session for a user; returns (session id, refresh jti)"""
+        sessions_collection = await get_sessions_collection()
+
+        now = datetime.now(timezone.utc)
+        session = {
+            "_id": uuid.uuid4().hex,
+            "user_id": str(user_id),
+            "jti": uuid.uuid4().hex,
+            "created_at": now,
+            "rotated_at": now,
+            "expires_at": now + timedelta(days=settings.refresh_token_expire_days),
+            "revoked_at": None,
+        }
+        await sessions_collection.insert_one(session)
+        self.cache.set(session["_id"], session)
+        return session["_id"], session["jti"]
+
+    async def rotate(self, session_id: str, jti: str) -> Tuple[str, str]:
+        """
+        Swap the session's refresh jti for a new one; returns (user id, new jti).
+        Raises SessionError if the session is gone, revoked, or jti is stale.
+        """
+        session = self.cache.get(session_id)
+        if session is None:
+            session = await self._load(session_id)
+
+        if session["revoked_at"] is None and session["jti"] == jti:
+            new_jti = uuid.uuid4().hex
+            if await self._swap(session, jti, new_jti):
+                self.rotations += 1
+                return session["user_id"], new_jti
+            # Another worker rotated or revoked it; decide on fresh state
+            session = await self._load(session_id)
+
+        if session["revoked_at"] is not None:
+            raise SessionError("Session has been revoked")
+
+        if session["jti"] != jti:
+            self.reuse_detected += 1
+            logger.warning("Refresh token reuse detected, revoking session %s of user %s", session_id, session['user_id'])
+            await self.revoke(session_id)
+            raise SessionError("Refresh token has already been used")
+
+        raise SessionError("Session could not be rotated")
+
+    async def revoke(self, session_id: str):
+        sessions_collection = await get_sessions_collection()
+        self.cache.pop(session_id)
+        await sessions_collection.update_one(
+            {"_id": session_id, "revoked_at": None},
+            {"$set": {"revoked_at": datetime.now(timezone.utc)}}
+        )
+
+    async def revoke_user_sessions(self, user_id: str):
+        sessions_collection = await get_sessions_collection()
+        for session_id, (session, _) in list(self.cache.entries.items()):
+            if session["user_id"] == str(user_id):
+                self.cache.pop(session_id)
+        await sessions_collection.update_many(
+            {"user_id": str(user_id), "revoked_at": None},
+            {"$set": {"revoked_at": datetime.now(timezone.utc)}}
+        )
+
+    async def _load(self, session_id: str) -> dict:
+        sessions_collection = await get_sessions_collection()
+        session = await sessions_collection.find_one({"_id": session_id})
+
+        if session is None or session["expires_at"].replace(tzinfo=timezone.utc) <= datetime.now(timezone.utc):
+            self.cache.pop(session_id)
+            raise SessionError("Session not found or expired")
+
+        self.cache.set(session_id, session)
+        return session
+
+    async def _swap(self, session: dict, jti: str, new_jti: str) -> bool:
+        sessions_collection = await get_sessions_collection()
+
+        now = datetime.now(timezone.utc)
+        changes = {
+            "jti": new_jti,
+            "rotated_at": now,
+            "expires_at": now + timedelta(days=settings.refresh_token_expire_days),
+        }
+        result = await sessions_collection.update_one(
+            {"_id": session["_id"], "jti": jti, "revoked_at": None},
+            {"$set": changes}
+        )
+        if result.modified_count != 1:
+            return False
+
+        session.update(changes)
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "cache": self.cache.stats(),
+            "rotations": self.rotations,
+            "reuse_detected": self.reuse_detected,
+        }
+
+
+session_store = SessionStore()
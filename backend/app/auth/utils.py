@@ -1,41 +1,50 @@
 from datetime import datetime, timezone, timedelta
-from typing import Optional
-from passlib.context import CryptContext
+from typing import Optional, Tuple
 from jose import jwt
 from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+import logging
+import time
+import uuid
 
 from ..config import settings
 from ..database import get_users_collection
-from .models import UserInDB, UserRole
+from ..indexes import index_builder
+from .models import UserInDB, UserRole, AUTH_CHECK_PROJECTION, LOGIN_PROJECTION, PROFILE_FIELDS_PROJECTION
 from .schemas import UserRegisterRequest
+from .hashing import hashing_executor
+from .cache import user_cache, invalidate_user
+from .revocation import revocation_list
+from .sessions import session_store, SessionError
+from .login_guard import login_guard
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+logger = logging.getLogger(__name__)
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return await hashing_executor.verify(plain_password, hashed_password)
 
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+async def get_password_hash(password: str) -> str:
+    return await hashing_executor.hash(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
-    to_encode = data.copy()
+    to_encode = {"jti": uuid.uuid4().hex, **data}
     if expires_delta:
         expire = datetime.now(timezone.utc) + expires_delta
     else:
         expire = datetime.now(timezone.utc) + timedelta(minutes=settings.access_token_expire_minutes)
 
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "iat": time.time()})
     encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
     return encoded_jwt
 
 def create_refresh_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
-    to_encode = data.copy()
+    to_encode = {"jti": uuid.uuid4().hex, **data}
     if expires_delta:
         expire = datetime.now(timezone.utc) + expires_delta
     else:
         expire = datetime.now(timezone.utc) + timedelta(days=settings.refresh_token_expire_days)
 
-    to_encode.update({"exp": expire, "type": "refresh"})
+    to_encode.update({"exp": expire, "iat": time.time(), "type": "refresh"})
     encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
     return encoded_jwt
 
@@ -46,24 +55,30 @@ def verify_token(token: str) -> Optional[dict]:
     except:
         return None
 
-async def create_user(user_data: UserRegisterRequest) -> UserInDB:
-    users_collection = await get_users_collection()
+class UserExistsError(ValueError):
+    """The email or username is already taken (unique index violation)"""
 
-    existing_user = await users_collection.find_one({
-        "$or": [{"email": user_data.email}, {"username": user_data.username}]
-    })
+class RegistrationUnavailable(Exception):
+    """The unique indexes on users are not built yet, so duplicates would go unnoticed"""
 
-    if existing_user:
-        raise ValueError("User already exists")
+def duplicate_key_message(details: Optional[dict]) -> str:
+    """Name the field a duplicate-key error tripped on, from its keyPattern"""
+    key_pattern = (details or {}).get("keyPattern") or {}
+    if "email" in key_pattern:
+        return "Email is already registered"
+    if "username" in key_pattern:
+        return "Username is already taken"
+    return "User already exists"
 
+def new_user_document(user_data: UserRegisterRequest, password_hash: str, role: str = UserRole.USER) -> dict:
     now = datetime.now(timezone.utc)
-    user_dict = {
+    return {
         "email": user_data.email,
         "username": user_data.username,
         "full_name": user_data.full_name,
-        "password_hash": get_password_hash(user_data.password),
+        "password_hash": password_hash,
         "phone": user_data.phone,
-        "role": UserRole.USER,
+        "role": role,
         "is_active": True,
         "email_verified": False,
         "created_at": now,
@@ -74,7 +89,23 @@ async def create_user(user_data: UserRegisterRequest) -> UserInDB:
         "last_login_at": None
     }
 
-    result = await users_collection.insert_one(user_dict)
+async def create_user(user_data: UserRegisterRequest) -> UserInDB:
+    """
+    Insert a new user in one round trip. The unique indexes on email and
+    username decide whether it already exists, which also holds when two
+    registrations for the same address race. Without those indexes a
+    duplicate would be stored silently, so registration waits until they exist.
+    """
+    if not index_builder.required_ready:
+        raise RegistrationUnavailable("The unique indexes on users are not built yet")
+    users_collection = await get_users_collection()
+
+    user_dict = new_user_document(user_data, await get_password_hash(user_data.password))
+
+    try:
+        result = await users_collection.insert_one(user_dict)
+    except DuplicateKeyError as e:
+        raise UserExistsError(duplicate_key_message(e.details))
     user_dict["_id"] = result.inserted_id
 
     return UserInDB.from_dict(user_dict)
@@ -82,44 +113,105 @@ async def create_user(user_data: UserRegisterRequest) -> UserInDB:
 async def authenticate_user(email: str, password: str) -> Optional[UserInDB]:
     users_collection = await get_users_collection()
 
-    user_doc = await users_collection.find_one({"email": email})
+    user_doc = await users_collection.find_one({"email": email}, LOGIN_PROJECTION)
 
-    if not user_doc or not verify_password(password, user_doc["password_hash"]):
+    if not user_doc:
+        # Same bcrypt cost as a wrong password, so response time does not
+        # reveal which emails have accounts
+        await login_guard.verify_dummy(password)
+        return None
+
+    if not await verify_password(password, user_doc["password_hash"]):
         return None
 
     if not user_doc.get("is_active", True):
         return None
 
+    now = datetime.now(timezone.utc)
     await users_collection.update_one(
         {"_id": user_doc["_id"]},
-        {"$set": {"last_login_at": datetime.now(timezone.utc)}}
+        # updated_at moves too: it versions the cached /auth/me response
+        {"$set": {"last_login_at": now, "updated_at": now}}
     )
+    invalidate_user(user_doc["_id"])
 
     return UserInDB.from_dict(user_doc)
 
-async def get_user_by_id(user_id: str) -> Optional[UserInDB]:
+async def get_user_by_id(user_id: str, fresh: bool = False) -> Optional[UserInDB]:
+    """
+    fresh=True skips the per-worker cache. Use it wherever a token is minted:
+    the role claim is trusted without a lookup for the token's lifetime, so it
+    must not come from a copy another worker's update has not reached yet.
+    """
+    if not fresh:
+        cached_user = user_cache.get(user_id)
+        if cached_user is not None:
+            return cached_user
+
     users_collection = await get_users_collection()
 
     if not ObjectId.is_valid(user_id):
         return None
 
-    user_doc = await users_collection.find_one({"_id": ObjectId(user_id)})
+    user_doc = await users_collection.find_one({"_id": ObjectId(user_id)}, AUTH_CHECK_PROJECTION)
 
     if not user_doc:
         return None
 
-    return UserInDB.from_dict(user_doc)
+    user = UserInDB.from_dict(user_doc)
+    user_cache.set(user_id, user)
+    return user
 
-def create_user_tokens(user: UserInDB) -> dict:
+async def load_profile_fields(user: UserInDB) -> UserInDB:
+    """
+    Fetch address, preferences and profile_picture for a user loaded with a
+    narrower projection. The object may be the cached one, so later profile
+    requests served from the cache skip the second read.
+    """
+    if user.has_profile_fields:
+        return user
+
+    users_collection = await get_users_collection()
+    profile_doc = await users_collection.find_one({"_id": ObjectId(user.id)}, PROFILE_FIELDS_PROJECTION)
+    user.set_profile_fields(profile_doc or {})
+    return user
+
+async def update_user(user_id: str, changes: dict) -> bool:
+    users_collection = await get_users_collection()
+
+    if not ObjectId.is_valid(user_id):
+        return False
+
+    changes = {**changes, "updated_at": datetime.now(timezone.utc)}
+    result = await users_collection.update_one({"_id": ObjectId(user_id)}, {"$set": changes})
+    invalidate_user(user_id)
+
+    # Access tokens carry role and are trusted without a user lookup
+    if "is_active" in changes or "role" in changes:
+        await revocation_list.revoke_user(user_id)
+
+    if changes.get("is_active") is False:
+        await session_store.revoke_user_sessions(user_id)
+
+    return result.matched_count > 0
+
+async def deactivate_user(user_id: str) -> bool:
+    return await update_user(user_id, {"is_active": False})
+
+def create_user_tokens(user: UserInDB, session_id: str, refresh_jti: str) -> dict:
+    """Access and refresh token pair for a session opened with session_store"""
     access_token_data = {
         "sub": str(user.id),
         "email": user.email,
         "role": user.role,
+        "sid": session_id,
         "type": "access"
     }
 
     refresh_token_data = {
         "sub": str(user.id),
+        "sid": session_id,
+        "jti": refresh_jti,
         "type": "refresh"
     }
 
@@ -136,6 +228,28 @@ def create_user_tokens(user: UserInDB) -> dict:
         "expires_in": settings.access_token_expire_minutes * 60
     }
 
+async def open_user_session(user: UserInDB) -> dict:
+    session_id, refresh_jti = await session_store.open(user.id)
+    return create_user_tokens(user, session_id, refresh_jti)
+
+async def refresh_user_session(refresh_token: str) -> Tuple[UserInDB, dict]:
+    """
+    Rotate the session behind a refresh token and issue a new token pair.
+    Raises SessionError if the token or its session is not valid.
+    """
+    payload = verify_token(refresh_token)
+    if not payload or payload.get("type") != "refresh" or not payload.get("sid") or not payload.get("jti"):
+        raise SessionError("Invalid refresh token")
+
+    user_id, refresh_jti = await session_store.rotate(payload["sid"], payload["jti"])
+
+    user = await get_user_by_id(user_id, fresh=True)
+    if not user or not user.is_active:
+        await session_store.revoke(payload["sid"])
+        raise SessionError("User not found or inactive")
+
+    return user, create_user_tokens(user, payload["sid"], refresh_jti)
+
 async def create_admin_user() -> None:
     users_collection = await get_users_collection()
 
@@ -149,7 +263,7 @@ async def create_admin_user() -> None:
         "email": settings.admin_email,
         "username": "admin",
         "full_name": settings.admin_full_name,
-        "password_hash": get_password_hash(settings.admin_password),
+        "password_hash": await get_password_hash(settings.admin_password),
         "role": UserRole.ADMIN,
         "is_active": True,
         "email_verified": True,
@@ -163,4 +277,4 @@ async def create_admin_user() -> None:
     }
 
     await users_collection.insert_one(admin_user)
-    print(f"Admin user created: {settings.admin_email}")
\ No newline at end of file
+    logger.info("Admin user created: %s", settings.admin_email)
\ No newline at end of file
@@ -0,0 +1,123 @@
+"""
+Circuit breakers for the external dependencies (Mongo, SendGrid).
+
+A breaker counts consecutive failures of the kinds that mean the dependency
+is unreachable. After failure_threshold of them it opens, and callers are
+refused at once with CircuitOpen instead of each waiting out a timeout.
+Once reset_timeout has passed, the breaker lets a single trial call through
+(half-open). Success closes it; failure opens it for another reset_timeout.
+
+Any other exception, e.g. DuplicateKeyError, means the dependency answered,
+so it counts as a success for the breaker and is re-raised unchanged.
+
+Request handlers call with probe=False: they are refused for as long as the
+breaker is not closed, so no request ever waits on a trial call. The trial
+calls are left to background work (spill replay, write-behind flushes, the
+outbox worker).
+"""
+from typing import Awaitable, Callable, Dict, Tuple, Type, TypeVar
+import asyncio
+import logging
+import time
+
+from .metrics import registry, Counter, CallbackMetric
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+breakers: Dict[str, "CircuitBreaker"] = {}
+
+breaker_rejections = registry.register(Counter(
+    "circuit_breaker_rejections_total", "Calls refused because a circuit breaker was open", ("name",)))
+breaker_transitions = registry.register(Counter(
+    "circuit_breaker_transitions_total", "Circuit breaker state changes", ("name", "state")))
+registry.register(CallbackMetric(
+    "circuit_breaker_state", "Circuit breaker state (0 closed, 1 half-open, 2 open)", ("name",),
+    lambda: {(name,): STATE_VALUES[breaker.state] for name, breaker in breakers.items()}))
+
+
+class CircuitOpen(Exception):
+    """The dependency is considered down; the call was not attempted"""
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float,
+                 failure_types: Tuple[Type[BaseException], ...]):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failure_types = failure_types
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+        breakers[name] = self
+
+    def allow(self) -> bool:
+        """Whether a call may go ahead now; in half-open state only one may"""
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self._transition(HALF_OPEN)
+        if self.trial_in_flight:
+            return False
+        self.trial_in_flight = True
+        return True
+
+    def is_open(self) -> bool:
+        """Open and not yet due for a trial call; unlike allow(), changes nothing"""
+        return self.state == OPEN and time.monotonic() - self.opened_at < self.reset_timeout
+
+    def record_success(self):
+        self.failures = 0
+        self.trial_in_flight = False
+        if self.state != CLOSED:
+            self._transition(CLOSED)
+
+    def record_failure(self, error: BaseException):
+        self.failures += 1
+        self.trial_in_flight = False
+        if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.failure_threshold):
+            self.opened_at = time.monotonic()
+            self._transition(OPEN)
+            logger.error("Circuit breaker %s opened after %s failures: %s", self.name, self.failures, error)
+
+    def retry_at(self) -> float:
+        """Monotonic time of the next trial call, while the breaker is open"""
+        return self.opened_at + self.reset_timeout
+
+    async def call(self, fn: Callable[..., Awaitable[T]], *args, probe: bool = True, **kwargs) -> T:
+        if not (self.allow() if probe else self.state == CLOSED):
+            breaker_rejections.inc(self.name)
+            raise CircuitOpen(f"{self.name} is unavailable")
+        try:
+            result = await fn(*args, **kwargs)
+        except self.failure_types as e:
+            self.record_failure(e)
+            raise
+        except asyncio.CancelledError:
+            self.trial_in_flight = False
+            raise
+        except Exception:
+            # The dependency answered, with an error of its own
+            self.record_success()
+            raise
+        self.record_success()
+        return result
+
+    def _transition(self, state: str):
+        if state == CLOSED:
+            logger.info("Circuit breaker %s closed", self.name)
+        self.state = state
+        breaker_transitions.inc(self.name, state)
+
+    def stats(self) -> dict:
+        return {"state": self.state, "failures": self.failures}
@@ -5,6 +5,16 @@ class Settings:
     def __init__(self):
         self.mongodb_url = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
         self.database_name = os.getenv("DATABASE_NAME", "paresh_enterprises")
+        self.mongo_max_pool_size = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+        self.mongo_min_pool_size = int(os.getenv("MONGO_MIN_POOL_SIZE", "10"))
+        self.mongo_max_idle_time_ms = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000"))
+        self.mongo_connect_timeout_ms = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000"))
+        self.mongo_server_selection_timeout_ms = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+        self.mongo_socket_timeout_ms = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "20000"))
+        self.mongo_wait_queue_timeout_ms = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "2000"))
+        self.mongo_read_preference = os.getenv("MONGO_READ_PREFERENCE", "primary")
+        self.mongo_warmup_connections = int(os.getenv("MONGO_WARMUP_CONNECTIONS", os.getenv("MONGO_MIN_POOL_SIZE", "10")))
+        self.mongo_connect_retry_interval = float(os.getenv("MONGO_CONNECT_RETRY_INTERVAL", "5"))
         self.secret_key = os.getenv("SECRET_KEY", "your-super-secret-jwt-key-here-replace-with-random-string")
         self.algorithm = os.getenv("ALGORITHM", "HS256")
         self.access_token_expire_minutes = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
@@ -14,9 +24,75 @@ class Settings:
         self.debug = os.getenv("DEBUG", "true").lower() == "true"
         self.host = os.getenv("HOST", "0.0.0.0")
         self.port = int(os.getenv("PORT", "8000"))
+        self.web_concurrency = int(os.getenv("WEB_CONCURRENCY", "0"))
+        self.keep_alive_timeout = int(os.getenv("KEEP_ALIVE_TIMEOUT", "75"))
+        self.backlog = int(os.getenv("BACKLOG", "2048"))
+        self.graceful_shutdown_timeout = int(os.getenv("GRACEFUL_SHUTDOWN_TIMEOUT", "30"))
         self.admin_email = os.getenv("ADMIN_EMAIL", "paresh_udr@yahoo.in")
         self.admin_password = os.getenv("ADMIN_PASSWORD", "admin123")
         self.admin_full_name = os.getenv("ADMIN_FULL_NAME", "Admin User")
+        self.static_dir = os.getenv("STATIC_DIR", "app/static")
+        self.hash_workers = int(os.getenv("HASH_WORKERS", "0"))
+        self.hash_max_queue = int(os.getenv("HASH_MAX_QUEUE", "32"))
+        self.hash_retry_after = int(os.getenv("HASH_RETRY_AFTER", "1"))
+        self.token_cache_size = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+        self.token_cache_ttl = float(os.getenv("TOKEN_CACHE_TTL", "300"))
+        self.user_cache_size = int(os.getenv("USER_CACHE_SIZE", "10000"))
+        self.user_cache_ttl = float(os.getenv("USER_CACHE_TTL", "30"))
+        self.profile_cache_size = int(os.getenv("PROFILE_CACHE_SIZE", "10000"))
+        self.session_cache_size = int(os.getenv("SESSION_CACHE_SIZE", "10000"))
+        self.session_cache_ttl = float(os.getenv("SESSION_CACHE_TTL", "300"))
+        self.revocation_refresh_interval = float(os.getenv("REVOCATION_REFRESH_INTERVAL", "5"))
+        self.login_window_seconds = int(os.getenv("LOGIN_WINDOW_SECONDS", "900"))
+        self.login_account_delay_after = int(os.getenv("LOGIN_ACCOUNT_DELAY_AFTER", "3"))
+        self.login_account_lockout_after = int(os.getenv("LOGIN_ACCOUNT_LOCKOUT_AFTER", "10"))
+        self.login_ip_delay_after = int(os.getenv("LOGIN_IP_DELAY_AFTER", "10"))
+        self.login_ip_lockout_after = int(os.getenv("LOGIN_IP_LOCKOUT_AFTER", "100"))
+        self.login_base_delay = float(os.getenv("LOGIN_BASE_DELAY", "1"))
+        self.login_max_delay = float(os.getenv("LOGIN_MAX_DELAY", "60"))
+        self.login_lockout_seconds = int(os.getenv("LOGIN_LOCKOUT_SECONDS", "900"))
+        self.login_guard_max_keys = int(os.getenv("LOGIN_GUARD_MAX_KEYS", "100000"))
+        self.login_guard_sync = os.getenv("LOGIN_GUARD_SYNC", "false").lower() == "true"
+        self.import_budget_ms = float(os.getenv("IMPORT_BUDGET_MS", "1500"))
+        self.startup_budget_ms = float(os.getenv("STARTUP_BUDGET_MS", "5000"))
+        self.log_level = os.getenv("LOG_LEVEL", "INFO")
+        self.log_format = os.getenv("LOG_FORMAT", "")  # json or text; json in production by default
+        self.log_queue_size = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+        self.log_sample_rate = float(os.getenv("LOG_SAMPLE_RATE", "1.0"))
+        self.log_sample_routes = os.getenv("LOG_SAMPLE_ROUTES", "/auth/me=0.1,/auth/profile=0.1")
+        self.loop_monitor_enabled = os.getenv("LOOP_MONITOR_ENABLED", "true").lower() == "true"
+        self.loop_stall_threshold_ms = float(os.getenv("LOOP_STALL_THRESHOLD_MS", "100"))
+        self.contact_batch_size = int(os.getenv("CONTACT_BATCH_SIZE", "100"))
+        self.contact_batch_delay_ms = float(os.getenv("CONTACT_BATCH_DELAY_MS", "50"))
+        self.contact_buffer_size = int(os.getenv("CONTACT_BUFFER_SIZE", "5000"))
+        self.contact_queue_timeout = float(os.getenv("CONTACT_QUEUE_TIMEOUT", "2.0"))
+        self.contact_ip_rate_per_minute = float(os.getenv("CONTACT_IP_RATE_PER_MINUTE", "5"))
+        self.contact_ip_burst = int(os.getenv("CONTACT_IP_BURST", "5"))
+        self.contact_email_rate_per_minute = float(os.getenv("CONTACT_EMAIL_RATE_PER_MINUTE", "2"))
+        self.contact_email_burst = int(os.getenv("CONTACT_EMAIL_BURST", "3"))
+        self.contact_limiter_max_keys = int(os.getenv("CONTACT_LIMITER_MAX_KEYS", "100000"))
+        self.mongo_breaker_failures = int(os.getenv("MONGO_BREAKER_FAILURES", "3"))
+        self.mongo_breaker_reset_seconds = float(os.getenv("MONGO_BREAKER_RESET_SECONDS", "5"))
+        self.sendgrid_breaker_failures = int(os.getenv("SENDGRID_BREAKER_FAILURES", "5"))
+        self.sendgrid_breaker_reset_seconds = float(os.getenv("SENDGRID_BREAKER_RESET_SECONDS", "30"))
+        self.spill_dir = os.getenv("SPILL_DIR", "spill")
+        self.spill_fsync = os.getenv("SPILL_FSYNC", "false").lower() == "true"
+        self.spill_replay_interval = float(os.getenv("SPILL_REPLAY_INTERVAL", "1.0"))
+        self.spill_replay_batch = int(os.getenv("SPILL_REPLAY_BATCH", "100"))
+        self.contact_retention_days = int(os.getenv("CONTACT_RETENTION_DAYS", "0"))
+        self.contact_duplicate_window = int(os.getenv("CONTACT_DUPLICATE_WINDOW", "600"))
+        self.trust_forwarded_for = os.getenv("TRUST_FORWARDED_FOR", "false").lower() == "true"
+        self.email_max_concurrency = int(os.getenv("EMAIL_MAX_CONCURRENCY", "8"))
+        self.sendgrid_api_key = os.getenv("SENDGRID_API_KEY", "")
+        self.sendgrid_api_url = os.getenv("SENDGRID_API_URL", "https://api.sendgrid.com")
+        self.owner_email = os.getenv("OWNER_EMAIL", "paresh_udr@yahoo.co.in")
+        self.sender_email = os.getenv("SENDER_EMAIL", "pareshdwivedi24@gmail.com")
+        self.outbox_batch_size = int(os.getenv("OUTBOX_BATCH_SIZE", "50"))
+        self.outbox_poll_interval = float(os.getenv("OUTBOX_POLL_INTERVAL", "2.0"))
+        self.outbox_max_attempts = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "6"))
+        self.outbox_backoff_base = float(os.getenv("OUTBOX_BACKOFF_BASE", "2.0"))
+        self.outbox_backoff_max = float(os.getenv("OUTBOX_BACKOFF_MAX", "300"))
+        self.outbox_lease_seconds = int(os.getenv("OUTBOX_LEASE_SECONDS", "60"))
 
 settings = Settings()
 
@@ -0,0 +1,183 @@
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+from bson import ObjectId
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+import base64
+import csv
+import io
+import json
+
+from .auth.dependencies import require_admin
+from .database import get_contacts_collection
+from . import contact_rollups
+
+router = APIRouter(
+    prefix="/admin/contacts",
+    tags=["Admin"],
+    dependencies=[Depends(require_admin)],
+)
+
+# Newest first; every query below is served by one of the contacts indexes
+# on (created_at, _id), (email, created_at, _id) or (company, created_at, _id).
+SORT = [("created_at", -1), ("_id", -1)]
+# Longest date range /stats/daily returns in one call
+MAX_STATS_DAYS = 366
+EXPORT_FIELDS = ["id", "created_at", "name", "email", "phone", "company", "subject", "message"]
+# A cell starting with one of these runs as a formula when the CSV is opened
+# in a spreadsheet; the fields come straight from the public contact form
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def encode_cursor(doc: dict) -> str:
+    created_at = doc.get("created_at")
+    raw = json.dumps({"t": created_at.isoformat() if created_at is not None else None, "id": str(doc["_id"])})
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return (datetime.fromisoformat(raw["t"]) if raw["t"] is not None else None), ObjectId(raw["id"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def contact_filter(email: Optional[str], company: Optional[str]) -> dict:
+    query = {}
+    if email:
+        query["email"] = email
+    if company:
+        query["company"] = company
+    return query
+
+
+def csv_safe(value):
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def after_cursor(created_at: Optional[datetime], contact_id: ObjectId) -> list:
+    """
+    $or clauses for the contacts after a cursor position in SORT order.
+    Contacts stored before created_at was recorded have none; they sort after
+    all the others, newest _id first.
+    """
+    if created_at is None:
+        return [{"created_at": None, "_id": {"$lt": contact_id}}]
+    return [
+        {"created_at": {"$lt": created_at}},
+        {"created_at": created_at, "_id": {"$lt": contact_id}},
+        {"created_at": None},
+    ]
+
+
+def serialize_contact(doc: dict) -> dict:
+    created_at = contact_rollups.submitted_at(doc)
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return {
+        "id": str(doc["_id"]),
+        "created_at": created_at.isoformat(),
+        "name": doc.get("name"),
+        "email": doc.get("email"),
+        "phone": doc.get("phone"),
+        "company": doc.get("company"),
+        "subject": doc.get("subject"),
+        "message": doc.get("message"),
+    }
+
+
+@router.get("")
+async def list_contacts(
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    email: Optional[str] = None,
+    company: Optional[str] = None,
+):
+    """
+    Contact submissions, newest first. Pass next_cursor back as cursor to get
+    the following page; pages are seeked by index, never skipped through.
+    """
+    query = contact_filter(email, company)
+    if cursor:
+        query["$or"] = after_cursor(*decode_cursor(cursor))
+
+    contacts_collection = await get_contacts_collection()
+    docs = await contacts_collection.find(query).sort(SORT).limit(limit + 1).to_list(None)
+
+    has_more = len(docs) > limit
+    docs = docs[:limit]
+    return {
+        "items": [serialize_contact(doc) for doc in docs],
+        "next_cursor": encode_cursor(docs[-1]) if has_more else None,
+    }
+
+
+@router.get("/export")
+async def export_contacts(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    email: Optional[str] = None,
+    company: Optional[str] = None,
+):
+    """
+    Stream every matching contact as NDJSON or CSV. Rows are written as the
+    Motor cursor yields them, so memory use does not grow with the export.
+    """
+    contacts_collection = await get_contacts_collection()
+    cursor = contacts_collection.find(contact_filter(email, company)).sort(SORT).batch_size(500)
+
+    async def ndjson_rows():
+        async for doc in cursor:
+            yield json.dumps(serialize_contact(doc), ensure_ascii=False) + "\n"
+
+    async def csv_rows():
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+        writer.writeheader()
+        async for doc in cursor:
+            writer.writerow({field: csv_safe(value) for field, value in serialize_contact(doc).items()})
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+
+    if format == "csv":
+        return StreamingResponse(csv_rows(), media_type="text/csv", headers={
+            "Content-Disposition": 'attachment; filename="contacts.csv"',
+        })
+    return StreamingResponse(ndjson_rows(), media_type="application/x-ndjson", headers={
+        "Content-Disposition": 'attachment; filename="contacts.ndjson"',
+    })
+
+
+@router.get("/stats/daily")
+async def daily_stats(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+):
+    """
+    Submissions per UTC day from the rollups, oldest first; days without
+    submissions are left out. Defaults to the last 30 days.
+    """
+    end = end or datetime.now(timezone.utc).date()
+    start = start or end - timedelta(days=29)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    if (end - start).days >= MAX_STATS_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range is limited to {MAX_STATS_DAYS} days")
+    days = await contact_rollups.daily(start, end)
+    return {"start": start.isoformat(), "end": end.isoformat(), "days": days}
+
+
+@router.get("/stats/companies")
+async def company_stats(limit: int = Query(20, ge=1, le=200)):
+    """Companies with the most submissions, from the rollups"""
+    return {"items": await contact_rollups.top("company", limit)}
+
+
+@router.get("/stats/subjects")
+async def subject_stats(limit: int = Query(20, ge=1, le=200)):
+    """Most frequent subjects (case-insensitive, first 100 characters), from the rollups"""
+    return {"items": await contact_rollups.top("subject", limit)}
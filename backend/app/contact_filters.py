@@ -0,0 +1,131 @@
+"""
+Pre-filters that shed junk contact submissions before they cost any I/O.
+
+Checked in order of cost: the honeypot field, per-IP and per-email token
+buckets, and a per-worker cache of recent content hashes. All of them are
+in-memory lookups. Only a submission that passes all of them reaches Mongo,
+where the content hash is claimed in contact_hashes. That collection's unique
+_id catches duplicates that landed on another worker, and its TTL index
+defines the duplicate window.
+"""
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Optional
+from pymongo.errors import DuplicateKeyError
+import hashlib
+import logging
+import time
+
+from .config import settings
+from .database import get_contact_hashes_collection, mongo_breaker
+from .circuit_breaker import CircuitOpen
+from .auth.cache import TTLCache
+from .metrics import registry, Counter
+
+logger = logging.getLogger(__name__)
+
+contact_screening = registry.register(Counter(
+    "contact_submissions_screened_total", "Contact submissions by pre-filter outcome", ("outcome",)))
+
+
+class TokenBucket:
+    """Per-key token buckets, refilled continuously, with LRU-bounded key count"""
+
+    def __init__(self, rate_per_minute: float, burst: int, max_keys: int):
+        self.rate = rate_per_minute / 60
+        self.burst = burst
+        self.max_keys = max_keys
+        self.buckets: "OrderedDict[str, list]" = OrderedDict()
+
+    def allow(self, key: str) -> bool:
+        now = time.monotonic()
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = [float(self.burst), now]
+            if len(self.buckets) > self.max_keys:
+                self.buckets.popitem(last=False)
+        else:
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            self.buckets.move_to_end(key)
+
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return True
+        return False
+
+    def retry_after(self, key: str) -> int:
+        bucket = self.buckets.get(key)
+        if bucket is None or self.rate <= 0:
+            return 60
+        return max(1, int((1 - bucket[0]) / self.rate) + 1)
+
+
+class Outcome:
+    ACCEPTED = "accepted"
+    HONEYPOT = "honeypot"
+    IP_LIMITED = "ip_rate_limited"
+    EMAIL_LIMITED = "email_rate_limited"
+    DUPLICATE = "duplicate"
+
+
+ip_buckets = TokenBucket(settings.contact_ip_rate_per_minute, settings.contact_ip_burst, settings.contact_limiter_max_keys)
+email_buckets = TokenBucket(settings.contact_email_rate_per_minute, settings.contact_email_burst, settings.contact_limiter_max_keys)
+recent_hashes = TTLCache(settings.contact_limiter_max_keys, settings.contact_duplicate_window)
+
+
+def content_hash(email: str, subject: Optional[str], message: str) -> str:
+    normalized = "\x1f".join([
+        email.strip().lower(),
+        " ".join((subject or "").lower().split()),
+        " ".join(message.lower().split()),
+    ])
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+
+def screen_in_memory(client_ip: str, email: str, honeypot: Optional[str], digest: str) -> tuple:
+    """(outcome, retry_after) using only in-memory state"""
+    if honeypot:
+        return Outcome.HONEYPOT, None
+    if not ip_buckets.allow(client_ip):
+        return Outcome.IP_LIMITED, ip_buckets.retry_after(client_ip)
+    email_key = email.strip().lower()
+    if not email_buckets.allow(email_key):
+        return Outcome.EMAIL_LIMITED, email_buckets.retry_after(email_key)
+    if recent_hashes.get(digest) is not None:
+        return Outcome.DUPLICATE, None
+    return Outcome.ACCEPTED, None
+
+
+async def claim_content_hash(digest: str) -> bool:
+    """False if another submission with the same content is inside the window"""
+    recent_hashes.set(digest, True)
+    try:
+        contact_hashes_collection = await get_contact_hashes_collection()
+        await mongo_breaker.call(contact_hashes_collection.insert_one,
+                                 {"_id": digest, "created_at": datetime.now(timezone.utc)}, probe=False)
+    except DuplicateKeyError:
+        return False
+    except CircuitOpen:
+        # Mongo is known to be down; the per-worker cache is all we have
+        pass
+    except Exception as e:
+        # Fail open: losing dedupe is better than losing a real enquiry
+        logger.warning("Contact duplicate check unavailable: %s", e)
+    return True
+
+
+async def release_content_hash(digest: str):
+    """Undo claim_content_hash when the submission could not be stored after all"""
+    recent_hashes.pop(digest)
+    try:
+        contact_hashes_collection = await get_contact_hashes_collection()
+        await mongo_breaker.call(contact_hashes_collection.delete_one, {"_id": digest}, probe=False)
+    except CircuitOpen:
+        pass
+    except Exception as e:
+        logger.warning("Could not release contact hash: %s", e)
+
+
+def record(outcome: str):
+    contact_screening.inc(outcome)
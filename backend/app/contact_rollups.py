@@ -0,0 +1,240 @@
+"""
+Contact submission counts per day, company and subject.
+
+Counts live in the contact_rollups collection, one document per
+(dimension, key):
+
+    {"_id": "day:2026-10-18", "dim": "day", "key": "2026-10-18", "label": "2026-10-18",
+     "count": 42, "first_at": ..., "last_at": ...}
+
+The contacts write-behind buffer calls apply() with each batch it has
+written. The batch is first counted in memory, so a batch of 100 submissions
+costs one unordered bulk_write with one $inc upsert per distinct key. The
+admin stats endpoints read these documents through the (dim, key) and
+(dim, count) indexes, so their cost does not grow with the contacts
+collection.
+
+If a rollup write fails after its contacts were stored, the counts fall
+short until the next backfill. The backfill rebuilds every rollup from
+contacts in one aggregation pass, normalises the keys in Python exactly as the
+live path does, and swaps the result in with a rename:
+
+    python -m app.contact_rollups --backfill
+
+Submissions stored while the backfill runs may be missing from its result,
+so run it when traffic is quiet, or run it twice. The backfill can only count
+contacts that are still stored, so after CONTACT_RETENTION_DAYS it forgets
+expired submissions that the live rollups still include.
+"""
+from datetime import date, datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+import argparse
+import asyncio
+import logging
+import sys
+import time
+
+from pymongo import UpdateOne
+
+from .database import database, get_contact_rollups_collection
+from .metrics import registry, Counter
+
+logger = logging.getLogger(__name__)
+
+ROLLUPS = "contact_rollups"
+NONE_KEY = "(none)"
+# Free-text subjects are cut to this many characters before grouping
+SUBJECT_KEY_LENGTH = 100
+BACKFILL_BATCH = 1000
+
+contact_rollup_updates = registry.register(Counter(
+    "contact_rollup_updates_total", "Contact rollup batches by result", ("result",)))
+
+
+def text_key(value: Optional[str], length: Optional[int] = None) -> Tuple[str, str]:
+    """(key, label): case and surrounding spaces do not split a group"""
+    label = (value or "").strip()
+    if length is not None:
+        label = label[:length]
+    return (label.casefold() or NONE_KEY), (label or NONE_KEY)
+
+
+def submitted_at(contact: dict) -> datetime:
+    """created_at, or the ObjectId's timestamp for contacts stored before it was recorded"""
+    created_at = contact.get("created_at")
+    return created_at if created_at is not None else contact["_id"].generation_time
+
+
+def contact_keys(contact: dict) -> Iterable[Tuple[str, str, str]]:
+    """(dimension, key, label) for every rollup a stored contact counts towards"""
+    day = submitted_at(contact).strftime("%Y-%m-%d")
+    yield "day", day, day
+    yield ("company", *text_key(contact.get("company")))
+    yield ("subject", *text_key(contact.get("subject"), SUBJECT_KEY_LENGTH))
+
+
+def rollup_updates(contacts: List[dict]) -> List[UpdateOne]:
+    groups: Dict[Tuple[str, str], dict] = {}
+    for contact in contacts:
+        created_at = submitted_at(contact)
+        for dim, key, label in contact_keys(contact):
+            group = groups.get((dim, key))
+            if group is None:
+                groups[(dim, key)] = {"label": label, "count": 1, "first_at": created_at, "last_at": created_at}
+            else:
+                group["count"] += 1
+                group["first_at"] = min(group["first_at"], created_at)
+                group["last_at"] = max(group["last_at"], created_at)
+
+    return [
+        UpdateOne(
+            {"_id": f"{dim}:{key}"},
+            {
+                "$inc": {"count": group["count"]},
+                "$min": {"first_at": group["first_at"]},
+                "$max": {"last_at": group["last_at"]},
+                "$setOnInsert": {"dim": dim, "key": key, "label": group["label"]},
+            },
+            upsert=True,
+        )
+        for (dim, key), group in groups.items()
+    ]
+
+
+async def apply(contacts: List[dict]):
+    """Count a batch of stored contacts; called by the write-behind buffer"""
+    if not contacts:
+        return
+    try:
+        rollups_collection = await get_contact_rollups_collection()
+        await rollups_collection.bulk_write(rollup_updates(contacts), ordered=False)
+        contact_rollup_updates.inc("applied")
+    except Exception as e:
+        contact_rollup_updates.inc("failed")
+        logger.error("Contact rollups missed %s contacts, run the backfill to correct: %s", len(contacts), e)
+
+
+def backfill_pipeline() -> List[dict]:
+    """
+    Count every contact per day and per raw company and subject value. The
+    keys are normalised afterwards by text_key, the same function the live
+    path uses; $toLower only lowercases ASCII and would split non-ASCII keys.
+    """
+    # Contacts stored before created_at was recorded fall back to the _id time
+    created_at = {"$ifNull": ["$created_at", {"$toDate": "$_id"}]}
+    return [
+        {"$project": {
+            "created_at": created_at,
+            "keys": [
+                {"dim": "day", "value": {"$dateToString": {"format": "%Y-%m-%d", "date": created_at}}},
+                {"dim": "company", "value": "$company"},
+                {"dim": "subject", "value": "$subject"},
+            ],
+        }},
+        {"$unwind": "$keys"},
+        {"$group": {
+            "_id": {"dim": "$keys.dim", "value": "$keys.value"},
+            "count": {"$sum": 1},
+            "first_at": {"$min": "$created_at"},
+            "last_at": {"$max": "$created_at"},
+        }},
+    ]
+
+
+def merge_groups(groups: Iterable[dict]) -> Dict[Tuple[str, str], dict]:
+    """Fold raw (dim, value) groups into rollup documents keyed like contact_keys"""
+    rollups: Dict[Tuple[str, str], dict] = {}
+    for group in groups:
+        dim, value = group["_id"]["dim"], group["_id"].get("value")
+        if dim == "day":
+            key = label = value
+        else:
+            key, label = text_key(value, SUBJECT_KEY_LENGTH if dim == "subject" else None)
+        rollup = rollups.get((dim, key))
+        if rollup is None:
+            rollups[(dim, key)] = {
+                "_id": f"{dim}:{key}", "dim": dim, "key": key, "label": label, "count": group["count"],
+                "first_at": group["first_at"], "last_at": group["last_at"],
+            }
+        else:
+            rollup["count"] += group["count"]
+            # The live path keeps the label it saw first
+            if group["first_at"] < rollup["first_at"]:
+                rollup["label"] = label
+                rollup["first_at"] = group["first_at"]
+            rollup["last_at"] = max(rollup["last_at"], group["last_at"])
+    return rollups
+
+
+async def backfill() -> int:
+    """Rebuild contact_rollups from contacts; returns the number of rollup documents"""
+    staging = f"{ROLLUPS}_backfill"
+    db = database.database
+    # Left over from an interrupted run
+    await db.drop_collection(staging)
+
+    groups = await db.contacts.aggregate(backfill_pipeline(), allowDiskUse=True).to_list(None)
+    rollups = list(merge_groups(groups).values())
+
+    # Created up front so an empty result still swaps in atomically
+    await db.create_collection(staging)
+    staged = db[staging]
+    for start in range(0, len(rollups), BACKFILL_BATCH):
+        await staged.insert_many(rollups[start:start + BACKFILL_BATCH], ordered=False)
+    await staged.create_index([("dim", 1), ("key", 1)])
+    await staged.create_index([("dim", 1), ("count", -1)])
+    await staged.rename(ROLLUPS, dropTarget=True)
+    return len(rollups)
+
+
+async def daily(start: date, end: date) -> List[dict]:
+    rollups_collection = await get_contact_rollups_collection()
+    cursor = rollups_collection.find(
+        {"dim": "day", "key": {"$gte": start.strftime("%Y-%m-%d"), "$lte": end.strftime("%Y-%m-%d")}},
+        {"_id": 0, "key": 1, "count": 1},
+    ).sort("key", 1)
+    return [{"day": doc["key"], "count": doc["count"]} async for doc in cursor]
+
+
+def isoformat(value: Optional[datetime]) -> Optional[str]:
+    # Rollups written by an older backfill can lack first_at / last_at
+    return value.replace(tzinfo=timezone.utc).isoformat() if value is not None else None
+
+
+async def top(dim: str, limit: int) -> List[dict]:
+    rollups_collection = await get_contact_rollups_collection()
+    cursor = rollups_collection.find(
+        {"dim": dim},
+        {"_id": 0, "label": 1, "count": 1, "first_at": 1, "last_at": 1},
+    ).sort("count", -1).limit(limit)
+    return [
+        {
+            dim: doc["label"],
+            "count": doc["count"],
+            "first_at": isoformat(doc.get("first_at")),
+            "last_at": isoformat(doc.get("last_at")),
+        }
+        async for doc in cursor
+    ]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backfill", action="store_true", help="rebuild every rollup from the contacts collection")
+    args = parser.parse_args()
+    if not args.backfill:
+        parser.print_help()
+        return 2
+
+    await database.connect_to_database()
+    started = time.perf_counter()
+    try:
+        documents = await backfill()
+    finally:
+        await database.close_database_connection()
+    print(f"Rebuilt {documents} contact rollups in {time.perf_counter() - started:.1f} s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
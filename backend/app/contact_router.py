@@ -1,22 +1,45 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel, EmailStr
-from pymongo import MongoClient
-import os
-import traceback
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail
-
-# ✅ Load env variables
-MONGO_URL = "mongodb://localhost:27017"
-DB_NAME = "paresh_enterprises"
-SENDGRID_API_KEY = os.getenv("SENDGRID_API_KEY")
-OWNER_EMAIL = "paresh_udr@yahoo.co.in"
-SENDER_EMAIL = "pareshdwivedi24@gmail.com"
-
-# ✅ MongoDB connection
-client = MongoClient(MONGO_URL)
-db = client[DB_NAME]
-contacts_collection = db["contacts"]
+from bson import ObjectId
+from datetime import datetime, timezone
+import logging
+
+from .config import settings
+from .database import get_contacts_collection, mongo_breaker
+from .mail.outbox import enqueue_email
+from .write_behind import WriteBehindBuffer, BufferFull
+from .spill_journal import spill_journal, insert_in_order
+from .request_utils import client_ip
+from . import contact_filters, contact_rollups
+from .contact_filters import Outcome
+
+logger = logging.getLogger(__name__)
+
+# ✅ Contact documents are written behind the response in insert_many batches;
+# the bounded buffer pushes back on submitters when Mongo cannot keep up.
+# Each written batch is then counted into the analytics rollups. While Mongo
+# is unreachable, batches go to the local spill journal and are replayed later.
+async def spill_contacts(documents: list):
+    await spill_journal.extend("contact", documents)
+
+
+async def replay_contacts(documents: list):
+    contacts_collection = await get_contacts_collection()
+    await contact_rollups.apply(await insert_in_order(contacts_collection, documents))
+
+
+spill_journal.register("contact", replay_contacts)
+
+contact_buffer = WriteBehindBuffer(
+    "contacts",
+    get_contacts_collection,
+    max_batch=settings.contact_batch_size,
+    max_delay=settings.contact_batch_delay_ms / 1000,
+    max_pending=settings.contact_buffer_size,
+    on_flushed=contact_rollups.apply,
+    breaker=mongo_breaker,
+    spill=spill_contacts,
+)
 
 router = APIRouter()
 
@@ -27,53 +50,83 @@ class ContactForm(BaseModel):
     message: str
     phone: str | None = None
     company: str | None = None
+    # Honeypot: hidden in the frontend form, so only bots fill it in
+    website: str | None = None
 
-# ✅ Email sender function (SendGrid)
-def send_email(form: ContactForm):
-    try:
-        body = (
-            f"📩 New Contact Submission:\n\n"
-            f"👤 Name: {form.name}\n"
-            f"📧 Email: {form.email}\n"
-            f"🏢 Company: {form.company or 'N/A'}\n"
-            f"📞 Phone: {form.phone or 'N/A'}\n"
-            f"📝 Subject: {form.subject or 'N/A'}\n\n"
-            f"💬 Message:\n{form.message}"
-        )
-
-        message = Mail(
-            from_email=SENDER_EMAIL,
-            to_emails=OWNER_EMAIL,
-            subject="New Contact Form Submission",
-            plain_text_content=body,
-        )
+# ✅ Notification email for the owner; delivered later by the outbox worker
+def build_contact_email(form: ContactForm) -> dict:
+    body = (
+        f"📩 New Contact Submission:\n\n"
+        f"👤 Name: {form.name}\n"
+        f"📧 Email: {form.email}\n"
+        f"🏢 Company: {form.company or 'N/A'}\n"
+        f"📞 Phone: {form.phone or 'N/A'}\n"
+        f"📝 Subject: {form.subject or 'N/A'}\n\n"
+        f"💬 Message:\n{form.message}"
+    )
 
-        sg = SendGridAPIClient(SENDGRID_API_KEY)
-        sg.send(message)
+    return {
+        "from": settings.sender_email,
+        "to": settings.owner_email,
+        "subject": "New Contact Form Submission",
+        "text": body,
+    }
 
-        print("✅ Email sent successfully via SendGrid")
-    except Exception as e:
-        print("❌ Email sending failed:", e)
-        traceback.print_exc()
+SUCCESS_RESPONSE = {"message": "Contact form submitted successfully!"}
 
 @router.post("/contact")
-async def submit_contact(form: ContactForm):
+async def submit_contact(form: ContactForm, request: Request):
+    # ✅ Shed bots, floods and double-clicks before any I/O
+    digest = contact_filters.content_hash(form.email, form.subject, form.message)
+    outcome, retry_after = contact_filters.screen_in_memory(client_ip(request), form.email, form.website, digest)
+    if outcome == Outcome.ACCEPTED and not await contact_filters.claim_content_hash(digest):
+        outcome = Outcome.DUPLICATE
+    contact_filters.record(outcome)
+
+    if outcome in (Outcome.IP_LIMITED, Outcome.EMAIL_LIMITED):
+        raise HTTPException(
+            status_code=429,
+            detail="Too many submissions, please try again later",
+            headers={"Retry-After": str(retry_after)},
+        )
+    if outcome != Outcome.ACCEPTED:
+        # Honeypot hits and duplicates look like success, so bots learn nothing
+        # and a double-click does not show the user an error
+        return SUCCESS_RESPONSE
+
     try:
-        contact_data = form.dict()
+        contact_data = form.model_dump(exclude={"website"})
+        contact_data["_id"] = ObjectId()
+        contact_data["created_at"] = datetime.now(timezone.utc)
         try:
-            result = contacts_collection.insert_one(contact_data)
-            print(f"✅ Contact inserted into DB with id: {result.inserted_id}")
+            if spill_journal.pending:
+                # Behind the submissions already waiting, so replay keeps them in order
+                await spill_journal.append("contact", contact_data)
+                logger.info("📒 Contact spilled to the journal with id: %s", contact_data["_id"])
+            else:
+                await contact_buffer.add(contact_data, timeout=settings.contact_queue_timeout)
+                logger.info("✅ Contact queued for DB with id: %s", contact_data["_id"])
+        except BufferFull:
+            # Let the retry through the duplicate check
+            await contact_filters.release_content_hash(digest)
+            raise HTTPException(
+                status_code=503,
+                detail="Contact service is busy, please try again shortly",
+                headers={"Retry-After": "1"},
+            )
         except Exception as db_error:
-            print("⚠️ Database unavailable, skipping DB save:", db_error)
+            logger.warning("⚠️ Database unavailable, skipping DB save: %s", db_error)
 
         try:
-            send_email(form)
+            outbox_id = await enqueue_email(build_contact_email(form))
+            logger.info("✅ Contact email queued in outbox: %s", outbox_id)
         except Exception as e:
-            print("⚠️ Warning: Email failed:", e)
+            logger.warning("⚠️ Could not queue email: %s", e)
 
-        return {"message": "Contact form submitted successfully!"}
+        return SUCCESS_RESPONSE
 
+    except HTTPException:
+        raise
     except Exception as e:
-        print("❌ Critical error in submit_contact:", e)
-        traceback.print_exc()
+        logger.exception("❌ Critical error in submit_contact: %s", e)
         raise HTTPException(status_code=500, detail="Failed to process contact form")
@@ -1,47 +1,87 @@
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase, AsyncIOMotorCollection
 from pymongo.errors import ConnectionFailure
 from typing import Optional
+import asyncio
 import logging
+import time
+
+from .config import settings
+from .metrics import MongoCommandMetrics, mongo_pool
+from .indexes import index_builder
+from .circuit_breaker import CircuitBreaker
 
 logger = logging.getLogger(__name__)
 
+# Opens after consecutive connection-level failures (server selection timeouts,
+# network errors), so callers stop waiting out the timeout on every request
+mongo_breaker = CircuitBreaker(
+    "mongo",
+    failure_threshold=settings.mongo_breaker_failures,
+    reset_timeout=settings.mongo_breaker_reset_seconds,
+    failure_types=(ConnectionFailure,),
+)
+
 class Database:
     def __init__(self):
         self.client: Optional[AsyncIOMotorClient] = None
         self.database: Optional[AsyncIOMotorDatabase] = None
+        # Set once the pool is warm; gates /health/ready
+        self.ready = False
+
+    def _create_client(self) -> AsyncIOMotorClient:
+        return AsyncIOMotorClient(
+            settings.mongodb_url,
+            maxPoolSize=settings.mongo_max_pool_size,
+            minPoolSize=settings.mongo_min_pool_size,
+            maxIdleTimeMS=settings.mongo_max_idle_time_ms,
+            connectTimeoutMS=settings.mongo_connect_timeout_ms,
+            serverSelectionTimeoutMS=settings.mongo_server_selection_timeout_ms,
+            socketTimeoutMS=settings.mongo_socket_timeout_ms,
+            waitQueueTimeoutMS=settings.mongo_wait_queue_timeout_ms,
+            readPreference=settings.mongo_read_preference,
+            event_listeners=[MongoCommandMetrics(), mongo_pool],
+        )
 
     async def connect_to_database(self):
         try:
-            from .config import settings
-
-            self.client = AsyncIOMotorClient(settings.mongodb_url)
-            self.database = self.client[settings.database_name]
+            # One client per process; a retry after a failed start reuses it
+            if self.client is None:
+                self.client = self._create_client()
+                self.database = self.client[settings.database_name]
 
             await self.client.admin.command('ismaster')
-            logger.info(f"Connected to MongoDB: {settings.database_name}")
+            logger.info("Connected to MongoDB: %s", settings.database_name)
 
-            await self._create_indexes()
+            await self._warm_up(settings.mongo_warmup_connections)
+            # Indexes that guard correctness first; a failure leaves us unready
+            await index_builder.ensure_required(self.database)
+            # The rest are built in the background; /health reports progress
+            index_builder.start(self.database)
+            self.ready = True
 
         except ConnectionFailure as e:
-            logger.error(f"Failed to connect to MongoDB: {e}")
+            logger.error("Failed to connect to MongoDB: %s", e)
             raise e
 
+    async def _warm_up(self, connections: int):
+        """
+        Open connections before the first request needs them: concurrent
+        pings each check out their own socket, leaving them idle in the pool.
+        """
+        if connections <= 0:
+            return
+
+        started = time.perf_counter()
+        await asyncio.gather(*(self.client.admin.command('ping') for _ in range(connections)))
+        logger.info("Warmed up %s MongoDB connections in %.0f ms", connections, (time.perf_counter() - started) * 1000)
+
     async def close_database_connection(self):
+        self.ready = False
+        await index_builder.stop()
         if self.client:
             self.client.close()
             logger.info("Closed database connection")
 
-    async def _create_indexes(self):
-        if self.database is None:
-            return
-
-        try:
-            await self.database.users.create_index("email", unique=True)
-            await self.database.users.create_index("username", unique=True)
-            logger.info("Database indexes created successfully")
-        except Exception as e:
-            logger.error(f"Failed to create database indexes: {e}")
-
     def get_collection(self, collection_name: str) -> AsyncIOMotorCollection:
         if self.database is None:
             raise RuntimeError("Database not connected")
@@ -55,12 +95,44 @@ async def get_database() -> Database:
 async def get_users_collection() -> AsyncIOMotorCollection:
     return database.get_collection("users")
 
-async def check_database_health() -> bool:
+async def get_contacts_collection() -> AsyncIOMotorCollection:
+    return database.get_collection("contacts")
+
+async def get_contact_rollups_collection() -> AsyncIOMotorCollection:
+    return database.get_collection("contact_rollups")
+
+async def get_contact_hashes_collection() -> AsyncIOMotorCollection:
+    return database.get_collection("contact_hashes")
+
+async def get_revoked_tokens_collection() -> AsyncIOMotorCollection:
+    return database.get_collection("revoked_tokens")
+
+async def get_sessions_collection() -> AsyncIOMotorCollection:
+    return database.get_collection("sessions")
+
+async def get_login_failures_collection() -> AsyncIOMotorCollection:
+    return database.get_collection("login_failures")
+
+async def get_outbox_collection() -> AsyncIOMotorCollection:
+    return database.get_collection("email_outbox")
+
+async def check_database_health() -> dict:
+    """Ping Mongo and report the round trip along with pool statistics"""
+    health = {
+        "connected": False,
+        "ready": database.ready,
+        "ping_ms": None,
+        "pool": mongo_pool.stats(),
+        "indexes": index_builder.stats(),
+        "breaker": mongo_breaker.stats(),
+    }
     try:
         if database.client is None:
-            return False
-        await database.client.admin.command('ismaster')
-        return True
+            return health
+        started = time.perf_counter()
+        await database.client.admin.command('ping')
+        health["ping_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        health["connected"] = True
     except Exception as e:
-        logger.error(f"Database health check failed: {e}")
-        return False
\ No newline at end of file
+        logger.error("Database health check failed: %s", e)
+    return health
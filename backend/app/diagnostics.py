@@ -0,0 +1,167 @@
+"""
+Runtime diagnostics for a live worker.
+
+LoopStallMonitor notices when a callback holds the event loop for longer than
+loop_stall_threshold_ms: a watchdog thread sees the loop's heartbeat go stale
+and logs the loop thread's current stack, i.e. the code doing the blocking.
+
+sample_profile() is a wall-clock sampling profiler. It periodically reads the
+stack of the loop thread (or all threads) with sys._current_frames() and
+returns folded stacks ("outer;inner;leaf count" per line), the input format of
+flamegraph.pl, speedscope and most other flame graph tools.
+"""
+from collections import Counter, deque
+from typing import Optional
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+
+from .config import settings
+from .metrics import registry, Counter as MetricCounter, Histogram
+
+logger = logging.getLogger(__name__)
+
+loop_stalls = registry.register(MetricCounter(
+    "event_loop_stalls_total", "Times a callback held the event loop past the stall threshold"))
+loop_lag = registry.register(Histogram(
+    "event_loop_lag_seconds", "How late the loop heartbeat woke up",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)))
+
+
+def format_frame(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})".replace(";", ":")
+
+
+def folded_stack(frame) -> str:
+    names = []
+    while frame is not None:
+        names.append(format_frame(frame))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class LoopStallMonitor:
+    def __init__(self, threshold: Optional[float] = None):
+        self.threshold = threshold if threshold is not None else settings.loop_stall_threshold_ms / 1000
+        self.interval = max(self.threshold / 4, 0.005)
+        self.loop_thread_id: Optional[int] = None
+        self.last_beat = time.monotonic()
+        # The recent entry of the stall in progress; the watchdog thread sets
+        # it, the heartbeat fills in the duration and clears it
+        self.current_stall: Optional[dict] = None
+        self.running = False
+        self.task: Optional[asyncio.Task] = None
+        self.watchdog: Optional[threading.Thread] = None
+        self.stalls = 0
+        self.max_lag = 0.0
+        self.recent = deque(maxlen=20)
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.loop_thread_id = threading.get_ident()
+        self.last_beat = time.monotonic()
+        self.task = asyncio.create_task(self.heartbeat())
+        self.watchdog = threading.Thread(target=self.watch, name="loop-stall-watchdog", daemon=True)
+        self.watchdog.start()
+        logger.info("Event loop stall monitor started (threshold %.0f ms)", self.threshold * 1000)
+
+    async def stop(self):
+        self.running = False
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        if self.watchdog is not None:
+            self.watchdog.join(timeout=1)
+            self.watchdog = None
+
+    async def heartbeat(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(now - expected, 0.0)
+            loop_lag.observe(lag)
+            self.max_lag = max(self.max_lag, lag)
+            stall = self.current_stall
+            if stall is not None:
+                logger.warning("Event loop stall ended after %.0f ms", lag * 1000)
+                stall["duration_ms"] = round(lag * 1000, 1)
+                self.current_stall = None
+            self.last_beat = now
+
+    def watch(self):
+        while self.running:
+            time.sleep(self.interval)
+            stalled_for = time.monotonic() - self.last_beat - self.interval
+            if stalled_for > self.threshold and self.current_stall is None:
+                self.report_stall(stalled_for)
+
+    def report_stall(self, stalled_for: float):
+        frame = sys._current_frames().get(self.loop_thread_id)
+        stall = {
+            "detected_at": time.time(),
+            "stalled_ms": round(stalled_for * 1000, 1),
+            "duration_ms": None,
+            "stack": None,
+        }
+        # Published before the slow part, so a loop that resumes while the
+        # stack is being formatted records its duration on this entry
+        self.recent.append(stall)
+        self.current_stall = stall
+        self.stalls += 1
+        loop_stalls.inc()
+        stack = "".join(traceback.format_stack(frame)) if frame is not None else "<unavailable>"
+        stall["stack"] = stack
+        logger.warning("Event loop blocked for %.0f ms, loop thread stack:\n%s", stalled_for * 1000, stack)
+
+    def stats(self) -> dict:
+        return {
+            "threshold_ms": self.threshold * 1000,
+            "stalls": self.stalls,
+            "max_lag_ms": round(self.max_lag * 1000, 1),
+            "in_stall": self.current_stall is not None,
+            "recent": list(self.recent),
+        }
+
+
+profile_lock = threading.Lock()
+
+
+def sample_profile(seconds: float, interval: float, thread_id: Optional[int] = None) -> str:
+    """
+    Sample stacks for `seconds`, every `interval` seconds. Only the given thread
+    is sampled, or every thread except the sampler when thread_id is None.
+    Must run off the event loop, or it would only ever see itself.
+    """
+    if not profile_lock.acquire(blocking=False):
+        raise RuntimeError("A profile is already running")
+
+    try:
+        own_id = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        stacks = Counter()
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            for ident, frame in sys._current_frames().items():
+                if ident == own_id or (thread_id is not None and ident != thread_id):
+                    continue
+                stacks[f"{names.get(ident, ident)};{folded_stack(frame)}"] += 1
+            time.sleep(interval)
+    finally:
+        profile_lock.release()
+
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+loop_monitor = LoopStallMonitor()
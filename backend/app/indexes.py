@@ -0,0 +1,201 @@
+"""
+Every index the app relies on, declared in one place.
+
+At startup IndexBuilder compares the registry with each collection's
+existing indexes and builds only the missing ones, in a background task, so
+a long build on a large collection does not hold up startup. A TTL index
+whose expireAfterSeconds changed in settings is updated in place with
+collMod. Failures are logged per index, and /health reports them under
+"indexes".
+
+Indexes marked required enforce correctness rather than speed: create_user
+relies on the unique indexes on users to reject duplicates. Those are built
+before the database is marked ready, and a failure keeps it unready, so the
+startup retry loop tries again. Until they exist, registration is refused.
+
+Contacts are kept forever unless CONTACT_RETENTION_DAYS is set, in which case
+they expire that many days after they were submitted. Unsetting it later does
+not drop the existing contact_retention index; drop that by hand.
+
+As a command, this module builds the indexes and exits 1 if any failed:
+
+    python -m app.indexes
+
+tests/test_indexes.py runs explain() on every hot query against a scratch
+mongod and fails on a COLLSCAN.
+"""
+from typing import Dict, List, Optional
+import argparse
+import asyncio
+import logging
+import sys
+
+from pymongo import IndexModel
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class IndexSpec:
+    __slots__ = ("collection", "keys", "required", "options")
+
+    def __init__(self, collection: str, keys, required: bool = False, **options):
+        self.collection = collection
+        self.keys = [(keys, 1)] if isinstance(keys, str) else list(keys)
+        self.required = required
+        self.options = options
+
+    @property
+    def name(self) -> str:
+        return self.options.get("name") or "_".join(f"{field}_{direction}" for field, direction in self.keys)
+
+    def model(self) -> IndexModel:
+        return IndexModel(self.keys, **self.options)
+
+
+def index_registry() -> List[IndexSpec]:
+    specs = [
+        # create_user relies on these for duplicate detection; it does no lookup first
+        IndexSpec("users", "email", required=True, unique=True),
+        IndexSpec("users", "username", required=True, unique=True),
+
+        # Admin listing and export: newest first, optionally per email or company
+        IndexSpec("contacts", [("created_at", -1), ("_id", -1)]),
+        IndexSpec("contacts", [("email", 1), ("created_at", -1), ("_id", -1)]),
+        IndexSpec("contacts", [("company", 1), ("created_at", -1), ("_id", -1)]),
+        IndexSpec("contact_rollups", [("dim", 1), ("key", 1)]),
+        IndexSpec("contact_rollups", [("dim", 1), ("count", -1)]),
+        IndexSpec("contact_hashes", "created_at", expireAfterSeconds=settings.contact_duplicate_window),
+
+        IndexSpec("revoked_tokens", "expires_at", expireAfterSeconds=0),
+        IndexSpec("revoked_tokens", "revoked_at"),
+        IndexSpec("sessions", "expires_at", expireAfterSeconds=0),
+        IndexSpec("sessions", "user_id"),
+        IndexSpec("login_failures", "expires_at", expireAfterSeconds=0),
+
+        IndexSpec("email_outbox", [("status", 1), ("next_attempt_at", 1)]),
+        IndexSpec("email_outbox", "lease", sparse=True),
+    ]
+    if settings.contact_retention_days > 0:
+        specs.append(IndexSpec("contacts", "created_at", name="contact_retention",
+                               expireAfterSeconds=settings.contact_retention_days * 86400))
+    return specs
+
+
+class IndexBuilder:
+    def __init__(self):
+        self.task: Optional[asyncio.Task] = None
+        self.created: List[str] = []
+        self.updated: List[str] = []
+        self.failed: Dict[str, str] = {}
+        self.required_ready = False
+
+    async def ensure_required(self, db):
+        """Build the required indexes now; raises if any of them is missing afterwards"""
+        by_collection: Dict[str, List[IndexSpec]] = {}
+        for spec in index_registry():
+            if spec.required:
+                by_collection.setdefault(spec.collection, []).append(spec)
+
+        self.failed.clear()
+        await asyncio.gather(*(self._ensure_collection(db, name, specs) for name, specs in by_collection.items()))
+        if self.failed:
+            raise RuntimeError(f"Required indexes could not be built: {self.failed}")
+        self.required_ready = True
+
+    def start(self, db):
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.ensure(db))
+
+    async def wait(self):
+        if self.task is not None:
+            await self.task
+
+    async def stop(self):
+        if self.task is not None and not self.task.done():
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+        self.task = None
+
+    async def ensure(self, db):
+        self.created.clear()
+        self.updated.clear()
+        self.failed.clear()
+        by_collection: Dict[str, List[IndexSpec]] = {}
+        for spec in index_registry():
+            by_collection.setdefault(spec.collection, []).append(spec)
+
+        # Collections are independent, so their builds can run side by side
+        await asyncio.gather(*(self._ensure_collection(db, name, specs) for name, specs in by_collection.items()))
+        if self.failed:
+            logger.error("Index registry: %s indexes failed: %s", len(self.failed), self.failed)
+        else:
+            logger.info("Index registry: %s created, %s updated", len(self.created), len(self.updated))
+
+    async def _ensure_collection(self, db, name: str, specs: List[IndexSpec]):
+        collection = db[name]
+        try:
+            existing = {tuple(map(tuple, info["key"])): info for info in (await collection.index_information()).values()}
+        except Exception as e:
+            for spec in specs:
+                self.failed[f"{name}.{spec.name}"] = str(e)
+            return
+
+        missing = []
+        for spec in specs:
+            info = existing.get(tuple(spec.keys))
+            if info is None:
+                missing.append(spec)
+                continue
+            ttl = spec.options.get("expireAfterSeconds")
+            if ttl is not None and info.get("expireAfterSeconds") != ttl:
+                try:
+                    await db.command("collMod", name, index={"keyPattern": dict(spec.keys), "expireAfterSeconds": ttl})
+                    self.updated.append(f"{name}.{spec.name}")
+                except Exception as e:
+                    self.failed[f"{name}.{spec.name}"] = str(e)
+
+        for spec in missing:
+            try:
+                await collection.create_indexes([spec.model()])
+                self.created.append(f"{name}.{spec.name}")
+            except Exception as e:
+                self.failed[f"{name}.{spec.name}"] = str(e)
+
+    def stats(self) -> dict:
+        return {
+            "building": self.task is not None and not self.task.done(),
+            "required_ready": self.required_ready,
+            "created": len(self.created),
+            "updated": len(self.updated),
+            "failed": dict(self.failed),
+        }
+
+
+index_builder = IndexBuilder()
+
+
+async def main():
+    from .database import database
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.parse_args()
+
+    await database.connect_to_database()
+    try:
+        await index_builder.wait()
+    finally:
+        await database.close_database_connection()
+
+    print(f"indexes: {len(index_builder.created)} created, {len(index_builder.updated)} updated", file=sys.stderr)
+    for name, error in index_builder.failed.items():
+        print(f"FAILED: index {name}: {error}", file=sys.stderr)
+    return 1 if index_builder.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,211 @@
+"""
+Non-blocking log pipeline.
+
+Request handlers only put records on a bounded in-memory queue. A
+QueueListener thread formats them and writes them to stdout, so a slow
+container log driver stalls that thread and never the event loop. Records
+are formatted on the listener thread, so logger calls should pass %-style
+arguments rather than f-strings; the message is then only built for records
+that are actually written.
+
+Each record carries the request ID and route of the request that logged it.
+RequestContextMiddleware takes the ID from X-Request-ID when the caller sent
+a sane one, makes one up otherwise, and echoes it in the response.
+
+INFO and lower records logged during a request can be sampled per route
+(LOG_SAMPLE_ROUTES="/auth/profile=0.1,/auth/me=0.01", LOG_SAMPLE_RATE for the
+rest). Warnings and errors are always kept. When the queue is full the record
+is dropped rather than waiting. Both kinds of drop are counted in
+log_records_dropped_total.
+"""
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+import logging
+import queue
+import random
+import re
+import sys
+import uuid
+
+import orjson
+
+from .config import settings, is_production
+from .metrics import registry, route_template, Counter, CallbackMetric
+
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+route_var: ContextVar[Optional[str]] = ContextVar("route", default=None)
+
+REQUEST_ID_HEADER = b"x-request-id"
+REQUEST_ID_PATTERN = re.compile(r"[A-Za-z0-9._-]{1,64}")
+
+# Attributes every LogRecord has; anything else was passed through extra=
+RESERVED_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {
+    "message", "asctime", "request_id", "route",
+}
+
+log_records_dropped = registry.register(Counter(
+    "log_records_dropped_total", "Log records not written, by reason", ("reason",)))
+
+
+def parse_sample_routes(value: str) -> Dict[str, float]:
+    """"/auth/me=0.01,/auth/profile=0.1" -> {"/auth/me": 0.01, "/auth/profile": 0.1}"""
+    rates = {}
+    for item in value.split(","):
+        route, _, rate = item.strip().rpartition("=")
+        if route:
+            rates[route] = min(1.0, max(0.0, float(rate)))
+    return rates
+
+
+class RequestContextFilter(logging.Filter):
+    """
+    Stamps the request ID and route on each record and samples INFO records
+    by route. Runs in the thread that logged, where the context is visible.
+    """
+
+    def __init__(self, default_rate: float, route_rates: Dict[str, float]):
+        super().__init__()
+        self.default_rate = default_rate
+        self.route_rates = route_rates
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        record.route = route = route_var.get()
+        if route is not None and record.levelno <= logging.INFO:
+            rate = self.route_rates.get(route, self.default_rate)
+            if rate < 1.0 and random.random() >= rate:
+                log_records_dropped.inc("sampled")
+                return False
+        return True
+
+
+class BoundedQueueHandler(QueueHandler):
+    """QueueHandler that drops instead of blocking when the listener falls behind"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The queue never leaves the process, so the record can go as is and
+        # be formatted by the listener thread instead of this one
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            log_records_dropped.inc("queue_full")
+
+
+class DrainingQueueListener(QueueListener):
+    def enqueue_sentinel(self):
+        # Wait for room rather than failing on a full queue at shutdown
+        self.queue.put(self._sentinel, timeout=5)
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with any extra= fields as top-level keys"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.request_id is not None:
+            entry["request_id"] = record.request_id
+            entry["route"] = record.route
+        for key, value in record.__dict__.items():
+            if key not in RESERVED_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return orjson.dumps(entry, default=str).decode()
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s%(context)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        record.context = f" [{record.request_id}]" if record.request_id else ""
+        return super().format(record)
+
+
+class LogPipeline:
+    def __init__(self):
+        self.queue: Optional[queue.Queue] = None
+        self.handler: Optional[BoundedQueueHandler] = None
+        self.listener: Optional[DrainingQueueListener] = None
+
+    def start(self):
+        if self.listener is not None:
+            return
+        log_format = settings.log_format or ("json" if is_production() else "text")
+        sink = logging.StreamHandler(sys.stdout)
+        sink.setFormatter(JsonFormatter() if log_format == "json" else TextFormatter())
+
+        self.queue = queue.Queue(maxsize=settings.log_queue_size)
+        self.handler = BoundedQueueHandler(self.queue)
+        self.handler.addFilter(RequestContextFilter(
+            settings.log_sample_rate, parse_sample_routes(settings.log_sample_routes)))
+        self.listener = DrainingQueueListener(self.queue, sink)
+
+        root = logging.getLogger()
+        root.setLevel(settings.log_level.upper())
+        root.addHandler(self.handler)
+        self.listener.start()
+
+    def stop(self):
+        """Detach from the root logger and write out whatever is still queued"""
+        if self.listener is None:
+            return
+        logging.getLogger().removeHandler(self.handler)
+        self.listener.stop()
+        self.listener = None
+
+    def depth(self) -> int:
+        return self.queue.qsize() if self.queue is not None else 0
+
+
+log_pipeline = LogPipeline()
+
+registry.register(CallbackMetric(
+    "log_queue_depth", "Log records waiting for the writer thread", (),
+    lambda: {(): log_pipeline.depth()}))
+
+
+class RequestContextMiddleware:
+    """ASGI middleware giving every request an ID, visible to its log records"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == REQUEST_ID_HEADER:
+                candidate = value.decode("latin-1")
+                if REQUEST_ID_PATTERN.fullmatch(candidate):
+                    request_id = candidate
+                break
+        if request_id is None:
+            request_id = uuid.uuid4().hex
+        header = (REQUEST_ID_HEADER, request_id.encode("latin-1"))
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", ()), header]
+            await send(message)
+
+        request_token = request_id_var.set(request_id)
+        route_token = route_var.set(route_template(scope))
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id_var.reset(request_token)
+            route_var.reset(route_token)
@@ -0,0 +1 @@
+# Email outbox module
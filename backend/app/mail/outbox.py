@@ -0,0 +1,225 @@
+from datetime import datetime, timezone, timedelta
+from typing import Optional
+from bson import ObjectId
+from pymongo import UpdateOne
+import asyncio
+import logging
+import random
+
+from ..config import settings
+from ..database import get_outbox_collection, mongo_breaker
+from ..metrics import email_sends
+from ..circuit_breaker import CircuitBreaker, CircuitOpen
+from ..spill_journal import spill_journal, insert_in_order
+from .sender import SendGridSender, PermanentSendError, sendgrid_breaker
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxStatus:
+    PENDING = "pending"
+    SENDING = "sending"
+    SENT = "sent"
+    DEAD = "dead"
+
+
+async def enqueue_email(message: dict) -> ObjectId:
+    """
+    Persist an email in the outbox. The request path only pays for this insert;
+    delivery happens later in OutboxWorker. While Mongo is unreachable the
+    email goes to the spill journal and reaches the outbox on replay.
+    """
+    now = datetime.now(timezone.utc)
+    document = {
+        "_id": ObjectId(),
+        "message": message,
+        "status": OutboxStatus.PENDING,
+        "attempts": 0,
+        "next_attempt_at": now,
+        "locked_until": None,
+        "last_error": None,
+        "created_at": now,
+        "updated_at": now,
+    }
+
+    if not spill_journal.pending:
+        try:
+            outbox_collection = await get_outbox_collection()
+            await mongo_breaker.call(outbox_collection.insert_one, document, probe=False)
+            outbox_worker.wake()
+            return document["_id"]
+        except CircuitOpen:
+            pass
+        except mongo_breaker.failure_types as e:
+            logger.warning("Outbox insert failed, spilling email %s: %s", document['_id'], e)
+
+    await spill_journal.append("email", document)
+    return document["_id"]
+
+
+async def replay_emails(documents: list):
+    outbox_collection = await get_outbox_collection()
+    if await insert_in_order(outbox_collection, documents):
+        outbox_worker.wake()
+
+
+spill_journal.register("email", replay_emails)
+
+
+def backoff_delay(attempts: int) -> float:
+    """Exponential backoff with full jitter, capped at outbox_backoff_max"""
+    ceiling = min(settings.outbox_backoff_max, settings.outbox_backoff_base * (2 ** (attempts - 1)))
+    return random.uniform(ceiling / 2, ceiling)
+
+
+class OutboxWorker:
+    """
+    Drains the email outbox in batches.
+
+    Each pass claims up to outbox_batch_size due messages (pending ones, plus
+    "sending" ones whose lease ran out because a worker died mid-batch), sends
+    them with at most email_max_concurrency requests in flight over one pooled
+    client, and writes every outcome back in a single bulk_write. Failed
+    messages are rescheduled with backoff; after outbox_max_attempts, or on a
+    permanent rejection, they are dead-lettered with status "dead".
+
+    Sends go through a circuit breaker. While it is open the worker claims
+    nothing, and messages refused mid-batch go back to pending without
+    spending an attempt, so an outage does not dead-letter the backlog.
+    """
+
+    def __init__(self, sender: Optional[SendGridSender] = None, breaker: CircuitBreaker = sendgrid_breaker):
+        self.sender = sender or SendGridSender()
+        self.breaker = breaker
+        self.task: Optional[asyncio.Task] = None
+        self.running = False
+        self.wakeup: Optional[asyncio.Event] = None
+        self.stats = {"sent": 0, "retried": 0, "deferred": 0, "dead": 0, "batches": 0}
+
+    def wake(self):
+        if self.wakeup is not None:
+            self.wakeup.set()
+
+    def start(self):
+        if self.task is None:
+            self.running = True
+            self.wakeup = asyncio.Event()
+            self.task = asyncio.create_task(self.run())
+            logger.info("Email outbox worker started")
+
+    async def stop(self):
+        self.running = False
+        self.wake()
+        if self.task is not None:
+            await self.task
+            self.task = None
+        await self.sender.close()
+        logger.info("Email outbox worker stopped")
+
+    async def run(self):
+        while self.running:
+            try:
+                processed = await self.drain_once()
+            except Exception as e:
+                logger.error("Email outbox pass failed: %s", e)
+                processed = 0
+
+            # A full batch means more is probably waiting; go again immediately
+            if processed < settings.outbox_batch_size and self.running:
+                self.wakeup.clear()
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), timeout=settings.outbox_poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def claim_batch(self) -> list:
+        outbox_collection = await get_outbox_collection()
+
+        now = datetime.now(timezone.utc)
+        due = {
+            "$or": [
+                {"status": OutboxStatus.PENDING, "next_attempt_at": {"$lte": now}},
+                {"status": OutboxStatus.SENDING, "locked_until": {"$lte": now}},
+            ]
+        }
+        candidates = await outbox_collection.find(due, {"_id": 1}) \
+            .sort("next_attempt_at", 1).limit(settings.outbox_batch_size).to_list(None)
+        if not candidates:
+            return []
+
+        # Claim with a unique lease token so two workers never send the same batch
+        lease = ObjectId()
+        await outbox_collection.update_many(
+            {"_id": {"$in": [c["_id"] for c in candidates]}, **due},
+            {"$set": {
+                "status": OutboxStatus.SENDING,
+                "lease": lease,
+                "locked_until": now + timedelta(seconds=settings.outbox_lease_seconds),
+            }},
+        )
+        return await outbox_collection.find({"lease": lease, "status": OutboxStatus.SENDING}).to_list(None)
+
+    async def drain_once(self) -> int:
+        if self.breaker.is_open() or mongo_breaker.is_open():
+            return 0
+        batch = await self.claim_batch()
+        if not batch:
+            return 0
+
+        slots = asyncio.Semaphore(settings.email_max_concurrency)
+
+        async def deliver(doc):
+            async with slots:
+                try:
+                    await self.breaker.call(self.sender.send, doc["message"])
+                    return doc, None, False
+                except PermanentSendError as e:
+                    return doc, e, True
+                except Exception as e:
+                    return doc, e, False
+
+        results = await asyncio.gather(*(deliver(doc) for doc in batch))
+
+        now = datetime.now(timezone.utc)
+        updates = []
+        for doc, error, permanent in results:
+            if error is None:
+                self.stats["sent"] += 1
+                email_sends.inc("sent")
+                changes = {"status": OutboxStatus.SENT, "sent_at": now}
+                attempts = doc["attempts"] + 1
+            elif isinstance(error, CircuitOpen):
+                # Never attempted; wait for the breaker's next trial call
+                self.stats["deferred"] += 1
+                email_sends.inc("deferred")
+                attempts = doc["attempts"]
+                changes = {
+                    "status": OutboxStatus.PENDING,
+                    "next_attempt_at": now + timedelta(seconds=self.breaker.reset_timeout),
+                }
+            else:
+                attempts = doc["attempts"] + 1
+                if permanent or attempts >= settings.outbox_max_attempts:
+                    self.stats["dead"] += 1
+                    email_sends.inc("dead")
+                    changes = {"status": OutboxStatus.DEAD}
+                    logger.error("Email %s dead-lettered after %s attempts: %s", doc['_id'], attempts, error)
+                else:
+                    self.stats["retried"] += 1
+                    email_sends.inc("retry")
+                    changes = {
+                        "status": OutboxStatus.PENDING,
+                        "next_attempt_at": now + timedelta(seconds=backoff_delay(attempts)),
+                    }
+                changes["last_error"] = str(error)
+
+            changes.update({"attempts": attempts, "locked_until": None, "updated_at": now})
+            updates.append(UpdateOne({"_id": doc["_id"], "lease": doc["lease"]}, {"$set": changes}))
+
+        outbox_collection = await get_outbox_collection()
+        await outbox_collection.bulk_write(updates, ordered=False)
+        self.stats["batches"] += 1
+        return len(batch)
+
+
+outbox_worker = OutboxWorker()
@@ -0,0 +1,85 @@
+from typing import Optional, TYPE_CHECKING
+
+from ..config import settings
+from ..circuit_breaker import CircuitBreaker
+
+if TYPE_CHECKING:
+    import httpx
+
+
+class TransientSendError(Exception):
+    """SendGrid or the network failed in a way that is worth retrying"""
+
+
+class PermanentSendError(Exception):
+    """SendGrid rejected the message; retrying will not help"""
+
+
+# Only transient failures count against SendGrid; a 4xx rejection means it is up
+sendgrid_breaker = CircuitBreaker(
+    "sendgrid",
+    failure_threshold=settings.sendgrid_breaker_failures,
+    reset_timeout=settings.sendgrid_breaker_reset_seconds,
+    failure_types=(TransientSendError,),
+)
+
+
+class SendGridSender:
+    """
+    Minimal async client for SendGrid's v3 mail/send API.
+
+    One pooled httpx client is shared by every send, so connections (and their
+    TLS sessions) are kept alive between messages instead of being rebuilt for
+    each submission like SendGridAPIClient does.
+    """
+
+    def __init__(self, api_url: Optional[str] = None, api_key: Optional[str] = None,
+                 max_connections: Optional[int] = None):
+        self.api_url = (api_url or settings.sendgrid_api_url).rstrip("/")
+        self.api_key = api_key if api_key is not None else settings.sendgrid_api_key
+        self.max_connections = max_connections or settings.email_max_concurrency
+        self.client: Optional["httpx.AsyncClient"] = None
+
+    async def open(self):
+        if self.client is None:
+            # Imported on first use: httpx is the heaviest import in the app
+            # and most workers never send mail before their first request
+            import httpx
+
+            limits = httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections,
+                keepalive_expiry=60,
+            )
+            self.client = httpx.AsyncClient(
+                base_url=self.api_url,
+                limits=limits,
+                timeout=httpx.Timeout(10.0, connect=5.0),
+                headers={"Authorization": f"Bearer {self.api_key}"},
+            )
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    async def send(self, message: dict):
+        import httpx
+
+        await self.open()
+        payload = {
+            "personalizations": [{"to": [{"email": message["to"]}]}],
+            "from": {"email": message["from"]},
+            "subject": message["subject"],
+            "content": [{"type": "text/plain", "value": message["text"]}],
+        }
+
+        try:
+            response = await self.client.post("/v3/mail/send", json=payload)
+        except httpx.HTTPError as e:
+            raise TransientSendError(f"{type(e).__name__}: {e}") from e
+
+        if response.status_code == 429 or response.status_code >= 500:
+            raise TransientSendError(f"SendGrid returned {response.status_code}")
+        if response.status_code >= 400:
+            raise PermanentSendError(f"SendGrid returned {response.status_code}: {response.text[:200]}")
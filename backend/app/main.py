@@ -1,15 +1,104 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-import os
+import asyncio
+import logging
+
+from app.contact_router import router as contact_router, contact_buffer
+from app.auth.router import router as auth_router, hashing_overloaded_handler
+from app.admin_router import router as admin_router
+from app.contact_admin_router import router as contact_admin_router
+from app.auth.hashing import hashing_executor, HashingOverloaded
+from app.auth.login_guard import login_guard
+from app.auth.utils import create_admin_user
+from app.auth.revocation import revocation_list
+from app.database import database, check_database_health
+from app.config import settings
+from app.static_files import StaticSite
+from app.mail.outbox import outbox_worker
+from app.metrics import MetricsMiddleware, registry
+from app.diagnostics import loop_monitor
+from app.startup_report import startup_timer
+from app.logging_config import log_pipeline, RequestContextMiddleware
+from app.spill_journal import spill_journal
+
+logger = logging.getLogger(__name__)
+
+# Built frontend files, indexed once at startup and served from memory
+static_site = StaticSite(settings.static_dir)
+
+
+async def connect_database() -> bool:
+    try:
+        await database.connect_to_database()
+        await create_admin_user()
+        return True
+    except Exception as e:
+        logger.error("Database not available: %s", e)
+        return False
+
+
+async def keep_connecting():
+    """Retry until Mongo is reachable; /health/ready stays 503 meanwhile"""
+    while not await connect_database():
+        await asyncio.sleep(settings.mongo_connect_retry_interval)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One Motor client for the whole process, connected and warmed up before
+    # uvicorn starts accepting requests
+    log_pipeline.start()
+    if settings.loop_monitor_enabled:
+        loop_monitor.start()
+    with startup_timer.phase("static"):
+        static_site.load()
+    # Opened before anything can spill into it; leftovers replay once Mongo answers
+    spill_journal.open()
+
+    # Its own phase, not overlapped with the database handshake: phases have to
+    # add up for startup_report --exclude database to count the pool spawn
+    with startup_timer.phase("hashing_pool"):
+        await hashing_executor.start()
+        await login_guard.prepare()
+
+    reconnect_task = None
+    with startup_timer.phase("database"):
+        connected = await connect_database()
+    if not connected:
+        # Keep serving the frontend; DB-backed routes degrade until Mongo is back
+        logger.error("Starting without database, retrying in the background")
+        reconnect_task = asyncio.create_task(keep_connecting())
+
+    with startup_timer.phase("background_tasks"):
+        revocation_list.start()
+        contact_buffer.start()
+        outbox_worker.start()
+        spill_journal.start()
+    startup_timer.finish()
+
+    yield
+
+    if reconnect_task is not None:
+        reconnect_task.cancel()
+    await spill_journal.stop()
+    # Anything these cannot write is spilled, so the journal closes after them
+    await contact_buffer.stop()
+    await outbox_worker.stop()
+    spill_journal.close()
+    await revocation_list.stop()
+    await hashing_executor.shutdown()
+    await database.close_database_connection()
+    await loop_monitor.stop()
+    log_pipeline.stop()
 
-from app.contact_router import router as contact_router
 
 app = FastAPI(
     title="Paresh Enterprises API",
     description="Backend API for Paresh Enterprises - Engineering Excellence",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 # CORS (replace "*" with allowed domains in production)
@@ -21,17 +110,56 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Serve built frontend files
-# "html=True" ensures index.html is served at "/static"
-app.mount("/static", StaticFiles(directory="app/static", html=True), name="static")
+# Per-route latency histograms and in-flight gauges, served at /metrics
+app.add_middleware(MetricsMiddleware)
+
+# Request IDs for log records and the X-Request-ID response header
+app.add_middleware(RequestContextMiddleware)
 
 # API routes
 app.include_router(contact_router, prefix="/api")
+app.include_router(admin_router, prefix="/api")
+app.include_router(contact_admin_router, prefix="/api")
+app.include_router(auth_router)
+app.add_exception_handler(HashingOverloaded, hashing_overloaded_handler)
+
+@app.get("/health/live", tags=["Health"])
+async def liveness():
+    """
+    The process is up and its event loop is answering; says nothing about Mongo
+    """
+    return {"status": "alive"}
+
+
+@app.get("/health/ready", tags=["Health"])
+@app.get("/health", tags=["Health"])
+async def readiness():
+    """
+    Ready to serve API traffic: Mongo answered a ping and the connection
+    warm-up has finished. 503 otherwise, with the same report. Index builds
+    continue in the background and are reported under "indexes".
+    """
+    db_health = await check_database_health()
+    ready = db_health["connected"] and db_health["ready"]
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "not_ready", "database": db_health},
+    )
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+# Built assets; Vite's base is /static/ in production
+@app.api_route("/static/{file_path:path}", methods=["GET", "HEAD"], include_in_schema=False)
+async def serve_static(file_path: str, request: Request):
+    response = static_site.serve_file(request, file_path)
+    if response is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return response
 
 # Catch-all for React Router (only if request is not for /api or /static)
-@app.get("/{full_path:path}")
-async def serve_react(full_path: str):
-    index_path = os.path.join("app", "static", "index.html")
-    if os.path.exists(index_path):
-        return FileResponse(index_path)
-    return {"error": "index.html not found"}
\ No newline at end of file
+@app.api_route("/{full_path:path}", methods=["GET", "HEAD"], include_in_schema=False)
+async def serve_react(full_path: str, request: Request):
+    return static_site.serve_spa(request, full_path)
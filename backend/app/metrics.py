@@ -0,0 +1,314 @@
+"""
+Prometheus-format metrics with no external dependency.
+
+Metrics are plain in-process counters guarded by a lock (pymongo reports
+command events from its own threads), so recording one costs a dict lookup
+and an addition. GET /metrics renders everything in the text exposition
+format.
+"""
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Tuple
+import threading
+import time
+
+from pymongo import monitoring
+from starlette.routing import Match
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name, help, labelnames=()):
+        super().__init__(name, help, labelnames)
+        self.values: Dict[tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        with self.lock:
+            for labels, value in self.values.items():
+                lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels, value: float):
+        with self.lock:
+            self.values[labels] = value
+
+
+class CallbackMetric(Metric):
+    """
+    Metric whose samples are read from a callback at scrape time, for state
+    that another component already counts (pool stats, cache counters).
+    """
+
+    def __init__(self, name, help, labelnames, callback: Callable[[], Dict[tuple, float]], kind: str = "gauge"):
+        super().__init__(name, help, labelnames)
+        self.callback = callback
+        self.kind = kind
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for labels, value in self.callback().items():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self.values: Dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels):
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.values.get(labels)
+            if series is None:
+                series = self.values[labels] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        with self.lock:
+            snapshot = {labels: list(series) for labels, series in self.values.items()}
+        for labels, series in snapshot.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = _format_labels(self.labelnames, labels, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            cumulative += series[len(self.buckets)]
+            le = _format_labels(self.labelnames, labels, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{le} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {series[-1]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route and status", ("method", "route", "status")))
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route")))
+http_requests_in_flight = registry.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being handled", ("route",)))
+mongo_command_duration = registry.register(Histogram(
+    "mongo_command_duration_seconds", "MongoDB command latency", ("collection", "command")))
+mongo_command_failures = registry.register(Counter(
+    "mongo_command_failures_total", "MongoDB commands that failed", ("collection", "command")))
+email_sends = registry.register(Counter(
+    "email_sends_total", "Outbox email delivery attempts by result", ("result",)))
+password_hash_calls = registry.register(Counter(
+    "password_hash_calls_total", "Password hash and verify calls by result", ("operation", "result")))
+
+
+def route_template(scope) -> str:
+    """The matched route's path template, so /users/123 and /users/456 share a series"""
+    # Memoized on the scope: the logging and metrics middlewares both ask
+    cached = scope.get("app.route_template")
+    if cached is not None:
+        return cached
+    template = "unmatched"
+    app = scope.get("app")
+    if app is not None:
+        for route in app.router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                template = route.path
+                break
+    scope["app.route_template"] = template
+    return template
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route latency, status and in-flight counts"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route = route_template(scope)
+        method = scope["method"]
+        status_holder = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_holder[0] = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc(route)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_request_duration.observe(time.perf_counter() - started, method, route)
+            http_requests.inc(method, route, str(status_holder[0]))
+            http_requests_in_flight.dec(route)
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Times every MongoDB command by collection and command name"""
+
+    def __init__(self):
+        self.pending: Dict[tuple, str] = {}
+
+    def started(self, event):
+        target = event.command.get(event.command_name)
+        if event.command_name == "getMore":
+            target = event.command.get("collection")
+        collection = target if isinstance(target, str) else event.database_name
+        self.pending[(event.connection_id, event.request_id)] = collection
+
+    def succeeded(self, event):
+        collection = self.pending.pop((event.connection_id, event.request_id), "unknown")
+        mongo_command_duration.observe(event.duration_micros / 1e6, collection, event.command_name)
+
+    def failed(self, event):
+        collection = self.pending.pop((event.connection_id, event.request_id), "unknown")
+        mongo_command_duration.observe(event.duration_micros / 1e6, collection, event.command_name)
+        mongo_command_failures.inc(collection, event.command_name)
+
+
+class MongoPoolMetrics(monitoring.ConnectionPoolListener):
+    """
+    Connection pool state per server, from pymongo's CMAP events. pymongo
+    does not expose pool counters itself, so they are tracked here and read
+    by the health endpoints and /metrics.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pools: Dict[str, Dict[str, int]] = {}
+
+    def _pool(self, address) -> Dict[str, int]:
+        key = f"{address[0]}:{address[1]}"
+        pool = self.pools.get(key)
+        if pool is None:
+            pool = self.pools[key] = {
+                "open": 0, "in_use": 0, "waiting": 0,
+                "created": 0, "closed": 0, "checkout_failures": 0, "cleared": 0,
+            }
+        return pool
+
+    def _update(self, address, **deltas):
+        with self.lock:
+            pool = self._pool(address)
+            for field, delta in deltas.items():
+                pool[field] += delta
+
+    def pool_created(self, event):
+        self._update(event.address)
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._update(event.address, cleared=1)
+
+    def pool_closed(self, event):
+        with self.lock:
+            self.pools.pop(f"{event.address[0]}:{event.address[1]}", None)
+
+    def connection_created(self, event):
+        self._update(event.address, open=1, created=1)
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._update(event.address, open=-1, closed=1)
+
+    def connection_check_out_started(self, event):
+        self._update(event.address, waiting=1)
+
+    def connection_check_out_failed(self, event):
+        self._update(event.address, waiting=-1, checkout_failures=1)
+
+    def connection_checked_out(self, event):
+        self._update(event.address, waiting=-1, in_use=1)
+
+    def connection_checked_in(self, event):
+        self._update(event.address, in_use=-1)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self.lock:
+            return {address: dict(pool) for address, pool in self.pools.items()}
+
+    def samples(self, field: str) -> Dict[tuple, float]:
+        return {(address,): pool[field] for address, pool in self.stats().items()}
+
+
+mongo_pool = MongoPoolMetrics()
+
+registry.register(CallbackMetric(
+    "mongo_pool_connections_open", "Open connections in the MongoDB pool", ("server",),
+    lambda: mongo_pool.samples("open")))
+registry.register(CallbackMetric(
+    "mongo_pool_connections_in_use", "MongoDB connections checked out by the application", ("server",),
+    lambda: mongo_pool.samples("in_use")))
+registry.register(CallbackMetric(
+    "mongo_pool_checkout_waiting", "Operations waiting to check out a MongoDB connection", ("server",),
+    lambda: mongo_pool.samples("waiting")))
+registry.register(CallbackMetric(
+    "mongo_pool_checkout_failures_total", "MongoDB connection checkouts that failed", ("server",),
+    lambda: mongo_pool.samples("checkout_failures"), kind="counter"))
@@ -0,0 +1,12 @@
+from fastapi import Request
+
+from .config import settings
+
+
+def client_ip(request: Request) -> str:
+    """The caller's address; X-Forwarded-For is only trusted behind a known proxy"""
+    if settings.trust_forwarded_for:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
@@ -0,0 +1,259 @@
+"""
+Local append-only journal for writes that could not reach Mongo.
+
+While the Mongo circuit breaker is open, contact submissions and outbox
+emails are appended here instead of being lost. Each line is one JSON entry,
+{"kind": "contact", "doc": {...}}, written with bson's json_util so ObjectIds
+and datetimes survive. A replay task feeds the entries, in file order, to
+the handler registered for their kind. It starts once the breaker lets a
+call through, and the replay itself is the breaker's trial call. The replay
+position is saved after every batch in a .offset file next to the journal,
+and the file is truncated once everything has been replayed.
+
+Handlers must be idempotent. A crash between a write and saving the offset
+replays that batch again. The documents keep the _id they were given before
+they were spilled, so a second insert fails with a duplicate key, and
+insert_in_order skips it.
+
+While entries are waiting, new writes are appended behind them instead of
+going to Mongo directly, so replay keeps them in order. Each worker claims
+its own journal file (spill-0.jsonl, spill-1.jsonl, ...) with a file lock.
+A restarted worker picks up whatever its predecessor left behind.
+"""
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
+import logging
+import os
+
+from bson import json_util
+from pymongo.errors import BulkWriteError
+
+from .config import settings
+from .circuit_breaker import CircuitBreaker, CircuitOpen
+from .database import mongo_breaker
+from .metrics import registry, Counter, CallbackMetric
+
+try:
+    import fcntl
+except ImportError:  # Windows: no locking, every worker uses spill-0
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY = 11000
+MAX_JOURNALS = 64
+
+spill_entries = registry.register(Counter(
+    "spill_journal_entries_total", "Spill journal entries by kind and outcome", ("kind", "outcome")))
+
+
+async def insert_in_order(collection, documents: List[dict]) -> List[dict]:
+    """
+    Ordered insert that steps over rejected documents instead of stopping.
+    Returns the documents that were inserted; duplicates of a document that
+    is already stored are skipped silently, other rejections are logged.
+    """
+    inserted = []
+    while documents:
+        try:
+            await collection.insert_many(documents, ordered=True)
+            inserted.extend(documents)
+            return inserted
+        except BulkWriteError as e:
+            written = e.details.get("nInserted", 0)
+            inserted.extend(documents[:written])
+            error = (e.details.get("writeErrors") or [{}])[0]
+            if error.get("code") != DUPLICATE_KEY:
+                logger.error("Replay into %s rejected document %s: %s",
+                             collection.name, documents[written].get("_id"), error.get("errmsg"))
+            documents = documents[written + 1:]
+    return inserted
+
+
+class SpillJournal:
+    def __init__(self, directory: str, breaker: CircuitBreaker):
+        self.directory = directory
+        self.breaker = breaker
+        self.handlers: Dict[str, Callable[[List[dict]], Awaitable[None]]] = {}
+        self.path: Optional[str] = None
+        self.file = None
+        self.lock_file = None
+        self.size = 0
+        self.offset = 0
+        self.write_lock = asyncio.Lock()
+        self.task: Optional[asyncio.Task] = None
+        self.running = False
+        self.wakeup: Optional[asyncio.Event] = None
+
+        registry.register(CallbackMetric(
+            "spill_journal_pending_bytes", "Journal bytes waiting to be replayed", (),
+            lambda: {(): self.size - self.offset}))
+
+    def register(self, kind: str, handler: Callable[[List[dict]], Awaitable[None]]):
+        """handler(documents) writes a batch to Mongo; it must be idempotent"""
+        self.handlers[kind] = handler
+
+    @property
+    def pending(self) -> bool:
+        return self.size > self.offset
+
+    def open(self):
+        if self.file is not None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        for slot in range(MAX_JOURNALS):
+            path = os.path.join(self.directory, f"spill-{slot}.jsonl")
+            lock_file = open(path + ".lock", "w")
+            try:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                continue
+            self.path, self.lock_file = path, lock_file
+            break
+        else:
+            raise RuntimeError(f"All {MAX_JOURNALS} spill journals in {self.directory} are in use")
+
+        self.file = open(self.path, "ab")
+        self.size = self.file.seek(0, os.SEEK_END)
+        try:
+            with open(self.path + ".offset") as f:
+                self.offset = min(int(f.read().strip() or 0), self.size)
+        except FileNotFoundError:
+            self.offset = 0
+        if self.pending:
+            logger.warning("Spill journal %s has %s bytes to replay", self.path, self.size - self.offset)
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        if self.lock_file is not None:
+            self.lock_file.close()
+            self.lock_file = None
+
+    async def append(self, kind: str, document: dict):
+        await self.extend(kind, [document])
+
+    async def extend(self, kind: str, documents: List[dict]):
+        """Append documents in order, with one write for the lot"""
+        if self.file is None:
+            raise RuntimeError("Spill journal is not open")
+        data = b"".join(json_util.dumps({"kind": kind, "doc": document}).encode() + b"\n"
+                        for document in documents)
+        async with self.write_lock:
+            await asyncio.to_thread(self._write, data)
+            self.size += len(data)
+        spill_entries.inc(kind, "spilled", amount=len(documents))
+        if self.wakeup is not None:
+            self.wakeup.set()
+
+    def _write(self, data: bytes):
+        self.file.write(data)
+        self.file.flush()
+        if settings.spill_fsync:
+            os.fsync(self.file.fileno())
+
+    def start(self):
+        if self.task is None:
+            self.running = True
+            self.wakeup = asyncio.Event()
+            self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        self.running = False
+        if self.task is not None:
+            self.wakeup.set()
+            await self.task
+            self.task = None
+
+    async def run(self):
+        while self.running:
+            if self.pending:
+                try:
+                    await self.breaker.call(self.replay)
+                except CircuitOpen:
+                    pass
+                except Exception as e:
+                    logger.warning("Spill journal replay stopped, will retry: %s", e)
+
+            self.wakeup.clear()
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout=settings.spill_replay_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def replay(self):
+        """Hand every entry after the saved offset to its handler, in file order"""
+        replayed = 0
+        while self.pending and self.running:
+            entries = await asyncio.to_thread(self._read, self.offset, settings.spill_replay_batch)
+            if not entries:
+                break
+
+            # Consecutive entries of one kind go to their handler as one batch
+            start = 0
+            while start < len(entries):
+                kind = entries[start][0]
+                end = start
+                while end < len(entries) and entries[end][0] == kind:
+                    end += 1
+                documents = [doc for _, doc, _ in entries[start:end] if doc is not None]
+                if documents:
+                    handler = self.handlers.get(kind)
+                    if handler is None:
+                        logger.error("Spill journal has %s %s entries and no handler; skipping", len(documents), kind)
+                        spill_entries.inc(kind, "skipped", amount=len(documents))
+                    else:
+                        await handler(documents)
+                        spill_entries.inc(kind, "replayed", amount=len(documents))
+                        replayed += len(documents)
+                self.offset = entries[end - 1][2]
+                await asyncio.to_thread(self._save_offset)
+                start = end
+
+        async with self.write_lock:
+            if self.offset == self.size and self.size:
+                await asyncio.to_thread(self._truncate)
+        if replayed:
+            logger.info("Spill journal replayed %s entries", replayed)
+
+    def _read(self, offset: int, limit: int) -> List[Tuple[str, Optional[dict], int]]:
+        """(kind, document, offset after the line) for up to limit complete lines"""
+        entries = []
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            while len(entries) < limit:
+                line = f.readline()
+                if not line.endswith(b"\n"):
+                    break  # end of file, or a line still being written
+                offset += len(line)
+                try:
+                    entry = json_util.loads(line)
+                    entries.append((entry["kind"], entry["doc"], offset))
+                except (ValueError, KeyError) as e:
+                    logger.error("Spill journal %s: unreadable entry skipped: %s", self.path, e)
+                    entries.append(("unreadable", None, offset))
+        return entries
+
+    def _save_offset(self):
+        with open(self.path + ".offset", "w") as f:
+            f.write(str(self.offset))
+
+    def _truncate(self):
+        self.file.truncate(0)
+        self.size = self.offset = 0
+        try:
+            os.remove(self.path + ".offset")
+        except FileNotFoundError:
+            pass
+
+    def stats(self) -> dict:
+        return {
+            "path": self.path,
+            "pending_bytes": self.size - self.offset,
+        }
+
+
+spill_journal = SpillJournal(settings.spill_dir, mongo_breaker)
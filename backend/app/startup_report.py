@@ -0,0 +1,192 @@
+"""
+Import-time and startup-time accounting.
+
+At runtime, the lifespan hook times each startup phase with startup_timer.
+It logs one summary line and exposes the phases in /api/admin/stats.
+
+As a command, this module starts the app in fresh interpreters and
+summarizes what a cold start costs. It exits with status 1 if import or
+startup goes over budget. tests/test_startup_budget.py runs the same
+measurement under pytest, so CI can gate on either:
+
+    python -m app.startup_report
+    python -m app.startup_report --import-budget-ms 800 --startup-budget-ms 3000 --exclude database
+
+The import summary comes from `python -X importtime -c "import app.main"`.
+It is grouped by top-level package and lists the slowest app modules.
+Startup is the lifespan hook up to the point where uvicorn would accept
+requests. Budgets default to IMPORT_BUDGET_MS and STARTUP_BUDGET_MS.
+"""
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+import argparse
+import json
+import logging
+import subprocess
+import sys
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class StartupTimer:
+    """Wall-clock duration of each named startup phase, in milliseconds"""
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+        self.total_ms: Optional[float] = None
+        self.started: Optional[float] = None
+
+    @contextmanager
+    def phase(self, name: str):
+        if self.started is None:
+            self.started = time.perf_counter()
+        phase_started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = round((time.perf_counter() - phase_started) * 1000, 1)
+
+    def finish(self):
+        if self.started is not None:
+            self.total_ms = round((time.perf_counter() - self.started) * 1000, 1)
+        phases = ", ".join(f"{name} {ms:.0f} ms" for name, ms in self.phases.items())
+        logger.info("Startup finished in %.0f ms (%s)", self.total_ms or 0, phases)
+
+    def stats(self) -> dict:
+        return {"total_ms": self.total_ms, "phases": dict(self.phases)}
+
+
+startup_timer = StartupTimer()
+
+
+def parse_importtime(output: str) -> List[Tuple[str, int, int]]:
+    """(module, self us, cumulative us) for every line of -X importtime output"""
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    return modules
+
+
+def summarize_imports(modules: List[Tuple[str, int, int]], top: int) -> dict:
+    by_package: Dict[str, int] = {}
+    for name, self_us, _ in modules:
+        package = name.split(".")[0]
+        by_package[package] = by_package.get(package, 0) + self_us
+
+    app_modules = sorted(
+        ((name, cumulative_us) for name, _, cumulative_us in modules if name.startswith("app")),
+        key=lambda item: item[1], reverse=True,
+    )
+    total_us = next((cumulative_us for name, _, cumulative_us in modules if name == "app.main"), 0)
+    return {
+        "total_ms": round(total_us / 1000, 1),
+        "packages": [(name, round(us / 1000, 1)) for name, us in
+                     sorted(by_package.items(), key=lambda item: item[1], reverse=True)[:top]],
+        "app_modules": [(name, round(us / 1000, 1)) for name, us in app_modules[:top]],
+    }
+
+
+def measure_imports(top: int) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import app.main failed:\n{result.stderr[-2000:]}")
+    return summarize_imports(parse_importtime(result.stderr), top)
+
+
+def measure_startup() -> dict:
+    result = subprocess.run(
+        [sys.executable, "-m", "app.startup_report", "--child"],
+        capture_output=True, text=True,
+    )
+    for line in reversed(result.stdout.splitlines()):
+        if line.startswith("{"):
+            return json.loads(line)
+    raise RuntimeError(f"startup measurement failed:\n{result.stderr[-2000:]}")
+
+
+def run_child():
+    """Import the app and run its lifespan startup, then print the timings as JSON"""
+    import asyncio
+
+    started = time.perf_counter()
+    from app.main import app
+    # The lifespan records into the imported module's timer, not __main__'s
+    from app.startup_report import startup_timer as app_startup_timer
+    import_ms = (time.perf_counter() - started) * 1000
+
+    async def start_and_stop():
+        async with app.router.lifespan_context(app):
+            pass
+
+    asyncio.run(start_and_stop())
+    print(json.dumps({"import_ms": round(import_ms, 1), **app_startup_timer.stats()}))
+
+
+def counted_startup_ms(startup: dict, exclude: List[str]) -> float:
+    return (startup["total_ms"] or 0) - sum(startup["phases"].get(name, 0) for name in exclude)
+
+
+def budget_failures(imports: dict, startup: dict, import_budget_ms: float, startup_budget_ms: float,
+                    exclude: List[str]) -> List[str]:
+    """One message per budget exceeded; used by the CLI and tests/test_startup_budget.py"""
+    failures = []
+    if imports["total_ms"] > import_budget_ms:
+        failures.append(f"import app.main took {imports['total_ms']:.0f} ms, budget {import_budget_ms:.0f} ms")
+    budgeted_ms = counted_startup_ms(startup, exclude)
+    if budgeted_ms > startup_budget_ms:
+        failures.append(f"startup took {budgeted_ms:.0f} ms, budget {startup_budget_ms:.0f} ms")
+    return failures
+
+
+def main():
+    from app.config import settings
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--import-budget-ms", type=float, default=settings.import_budget_ms)
+    parser.add_argument("--startup-budget-ms", type=float, default=settings.startup_budget_ms)
+    parser.add_argument("--exclude", action="append", default=[], metavar="PHASE",
+                        help="startup phase not counted against the budget, e.g. database")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child()
+        return 0
+
+    imports = measure_imports(args.top)
+    startup = measure_startup()
+    budgeted_ms = counted_startup_ms(startup, args.exclude)
+    failures = budget_failures(imports, startup, args.import_budget_ms, args.startup_budget_ms, args.exclude)
+
+    if args.json:
+        print(json.dumps({"imports": imports, "startup": startup, "failures": failures}, indent=2))
+    else:
+        print(f"import app.main: {imports['total_ms']:.0f} ms (budget {args.import_budget_ms:.0f} ms)")
+        print("  by package (self time):")
+        for name, ms in imports["packages"]:
+            print(f"    {name:<32} {ms:>8.1f} ms")
+        print("  slowest app modules (cumulative):")
+        for name, ms in imports["app_modules"]:
+            print(f"    {name:<32} {ms:>8.1f} ms")
+        excluded = f", excluding {', '.join(args.exclude)}" if args.exclude else ""
+        print(f"startup: {startup['total_ms'] or 0:.0f} ms, {budgeted_ms:.0f} ms counted{excluded} "
+              f"(budget {args.startup_budget_ms:.0f} ms)")
+        for name, ms in startup["phases"].items():
+            print(f"    {name:<32} {ms:>8.1f} ms")
+        for failure in failures:
+            print(f"OVER BUDGET: {failure}")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
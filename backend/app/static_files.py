@@ -0,0 +1,244 @@
+"""
+In-memory static and SPA serving for the built frontend.
+
+The build output is indexed once at startup. Small files are kept in memory
+together with their gzip and brotli variants (taken from precompressed
+.gz/.br files when the build produced them, otherwise compressed on first
+request). Content-hashed Vite assets are served as immutable, index.html is
+always revalidated, and If-None-Match requests are answered with 304.
+
+Precompress a build ahead of time with:
+
+    python -m app.static_files app/static
+"""
+from typing import Dict, Optional
+import gzip
+import json
+import logging
+import mimetypes
+import os
+import re
+import sys
+
+from fastapi import Request
+from fastapi.responses import FileResponse, JSONResponse, Response
+
+try:
+    import brotli
+except ImportError:  # gzip still works without it
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml",
+                      "application/manifest+json", "application/xml")
+MIN_COMPRESS_SIZE = 512
+MAX_MEMORY_SIZE = 1024 * 1024
+
+# Lazy compression happens on the event loop, so it uses fast levels; the
+# build-time precompress step below uses the maximum ones.
+RUNTIME_BROTLI_QUALITY = 5
+RUNTIME_GZIP_LEVEL = 6
+
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+DEFAULT_CACHE = "public, max-age=3600"
+
+# Vite names bundled files like assets/index-9b36192c.js; the digit check keeps
+# plain hyphenated names such as Dust-collection.jpg from matching.
+HASHED_NAME = re.compile(r"-(?=[A-Za-z0-9_-]*\d)[A-Za-z0-9_-]{8}\.[A-Za-z0-9]+$")
+
+
+def is_compressible(content_type: str) -> bool:
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def accepted_encodings(request: Request) -> set:
+    accepted = set()
+    for part in request.headers.get("accept-encoding", "").split(","):
+        coding, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison, and encodings share one validator (their tags differ only by suffix)
+    base = etag.strip('"')
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip().removeprefix("W/").strip('"')
+        if candidate == base or candidate.rsplit("-", 1)[0] == base:
+            return True
+    return False
+
+
+class StaticAsset:
+    __slots__ = ("path", "size", "content_type", "etag", "cache_control",
+                 "body", "gzip", "br", "compressible")
+
+    def __init__(self, path: str, stat: os.stat_result, immutable: bool):
+        self.path = path
+        self.size = stat.st_size
+        self.content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        self.etag = f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+        self.compressible = is_compressible(self.content_type) and self.size >= MIN_COMPRESS_SIZE
+        self.body: Optional[bytes] = None
+        self.gzip: Optional[bytes] = self._read_sidecar(".gz") if self.compressible else None
+        self.br: Optional[bytes] = self._read_sidecar(".br") if self.compressible else None
+
+        if path.endswith("index.html"):
+            self.cache_control = REVALIDATE_CACHE
+        elif immutable:
+            self.cache_control = IMMUTABLE_CACHE
+        else:
+            self.cache_control = DEFAULT_CACHE
+
+        if self.content_type == "application/javascript":
+            self.content_type += "; charset=utf-8"
+
+    def _read_sidecar(self, suffix: str) -> Optional[bytes]:
+        try:
+            with open(self.path + suffix, "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def load(self) -> bytes:
+        if self.body is None:
+            with open(self.path, "rb") as f:
+                self.body = f.read()
+        return self.body
+
+    def choose_encoding(self, encodings: set) -> Optional[str]:
+        if not self.compressible or self.size > MAX_MEMORY_SIZE:
+            return None
+        if "br" in encodings and (brotli is not None or self.br is not None):
+            return "br"
+        if "gzip" in encodings:
+            return "gzip"
+        return None
+
+    def body_for(self, encoding: Optional[str]) -> bytes:
+        """Body in the given encoding; compresses lazily and keeps the result"""
+        if encoding == "br":
+            if self.br is None:
+                self.br = brotli.compress(self.load(), quality=RUNTIME_BROTLI_QUALITY)
+            return self.br
+        if encoding == "gzip":
+            if self.gzip is None:
+                self.gzip = gzip.compress(self.load(), compresslevel=RUNTIME_GZIP_LEVEL, mtime=0)
+            return self.gzip
+        return self.load()
+
+    def response(self, request: Request) -> Response:
+        encoding = self.choose_encoding(accepted_encodings(request))
+        headers = {
+            "cache-control": self.cache_control,
+            "etag": f'{self.etag[:-1]}-{encoding}"' if encoding else self.etag,
+        }
+        if self.compressible:
+            headers["vary"] = "Accept-Encoding"
+
+        if etag_matches(request, self.etag):
+            return Response(status_code=304, headers=headers)
+
+        if self.size > MAX_MEMORY_SIZE:
+            return FileResponse(self.path, headers=headers, media_type=self.content_type)
+
+        body = self.body_for(encoding)
+        if encoding:
+            headers["content-encoding"] = encoding
+
+        if request.method == "HEAD":
+            headers["content-length"] = str(len(body))
+            return Response(headers=headers, media_type=self.content_type)
+        return Response(content=body, headers=headers, media_type=self.content_type)
+
+
+class StaticSite:
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.assets: Dict[str, StaticAsset] = {}
+        self.index: Optional[StaticAsset] = None
+
+    def load(self):
+        """Index the build output; called once at startup"""
+        self.assets = {}
+        self.index = None
+        if not os.path.isdir(self.directory):
+            logger.warning("Static directory %s not found, frontend will not be served", self.directory)
+            return
+
+        manifest_hashed = self._vite_manifest_files()
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith((".gz", ".br")) and os.path.exists(os.path.join(root, name[:-3])):
+                    continue
+                path = os.path.join(root, name)
+                rel_path = os.path.relpath(path, self.directory).replace(os.sep, "/")
+                immutable = rel_path in manifest_hashed or bool(HASHED_NAME.search(name))
+                self.assets[rel_path] = StaticAsset(path, os.stat(path), immutable)
+
+        self.index = self.assets.get("index.html")
+        if self.index is not None:
+            self.index.load()
+        logger.info("Indexed %s static files from %s", len(self.assets), self.directory)
+
+    def _vite_manifest_files(self) -> set:
+        for candidate in (".vite/manifest.json", "manifest.json"):
+            try:
+                with open(os.path.join(self.directory, candidate)) as f:
+                    manifest = json.load(f)
+            except (OSError, ValueError):
+                continue
+            files = set()
+            for chunk in manifest.values():
+                if isinstance(chunk, dict):
+                    files.add(chunk.get("file"))
+                    files.update(chunk.get("css", []))
+                    files.update(chunk.get("assets", []))
+            return files
+        return set()
+
+    def serve_file(self, request: Request, path: str) -> Optional[Response]:
+        asset = self.assets.get(path.lstrip("/") or "index.html")
+        if asset is None:
+            return None
+        return asset.response(request)
+
+    def serve_spa(self, request: Request, path: str) -> Response:
+        response = self.serve_file(request, path)
+        if response is not None:
+            return response
+        if self.index is None:
+            return JSONResponse({"error": "index.html not found"})
+        return self.index.response(request)
+
+
+def precompress(directory: str):
+    for root, _, files in os.walk(directory):
+        for name in files:
+            path = os.path.join(root, name)
+            content_type = mimetypes.guess_type(path)[0] or ""
+            if name.endswith((".gz", ".br")) or not is_compressible(content_type):
+                continue
+            with open(path, "rb") as f:
+                body = f.read()
+            if len(body) < MIN_COMPRESS_SIZE:
+                continue
+            with open(path + ".gz", "wb") as f:
+                f.write(gzip.compress(body, compresslevel=9, mtime=0))
+            if brotli is not None:
+                with open(path + ".br", "wb") as f:
+                    f.write(brotli.compress(body, quality=11))
+            print(f"Compressed {path}")
+
+
+if __name__ == "__main__":
+    precompress(sys.argv[1] if len(sys.argv) > 1 else "app/static")
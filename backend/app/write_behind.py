@@ -0,0 +1,178 @@
+from typing import Awaitable, Callable, List, Optional
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo.errors import BulkWriteError
+import asyncio
+import logging
+import time
+
+from .circuit_breaker import CircuitBreaker, CircuitOpen
+from .metrics import registry, Counter, Histogram, CallbackMetric
+
+logger = logging.getLogger(__name__)
+
+# How often an idle flusher checks whether it is being stopped
+IDLE_POLL = 0.25
+
+write_behind_flushed = registry.register(Counter(
+    "write_behind_documents_total", "Documents leaving a write-behind buffer by result", ("buffer", "result")))
+write_behind_batch_size = registry.register(Histogram(
+    "write_behind_batch_size", "Documents per insert_many batch", ("buffer",),
+    buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000)))
+
+
+class BufferFull(Exception):
+    """The buffer stayed full for the whole enqueue timeout"""
+
+
+class WriteBehindBuffer:
+    """
+    Coalesces single-document inserts into ordered insert_many batches.
+
+    add() only enqueues; a flusher task writes a batch as soon as it holds
+    max_batch documents or max_delay seconds have passed since its first
+    document, whichever comes first. The queue holds at most max_pending
+    documents, so when Mongo falls behind add() waits (backpressure) and
+    finally raises BufferFull. stop() flushes everything still queued.
+
+    on_flushed, if given, is awaited with the documents of each batch that
+    were actually written, for work derived from them (rollups).
+
+    With a breaker and a spill callback, a batch that cannot reach Mongo,
+    because the breaker is open or the insert fails with a connection error,
+    is handed to spill() at once instead of being retried and then dropped.
+    """
+
+    def __init__(self, name: str, get_collection: Callable[[], Awaitable[AsyncIOMotorCollection]],
+                 max_batch: int, max_delay: float, max_pending: int, flush_retries: int = 3,
+                 on_flushed: Optional[Callable[[List[dict]], Awaitable[None]]] = None,
+                 breaker: Optional[CircuitBreaker] = None,
+                 spill: Optional[Callable[[List[dict]], Awaitable[None]]] = None):
+        self.name = name
+        self.get_collection = get_collection
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.max_pending = max_pending
+        self.flush_retries = flush_retries
+        self.on_flushed = on_flushed
+        self.breaker = breaker
+        self.spill = spill
+        self.queue: Optional[asyncio.Queue] = None
+        self.task: Optional[asyncio.Task] = None
+        self.closing = False
+        self.stats = {"flushed": 0, "failed": 0, "spilled": 0, "batches": 0}
+
+        registry.register(CallbackMetric(
+            f"write_behind_{name}_pending", f"Documents waiting in the {name} write-behind buffer", (),
+            lambda: {(): self.queue.qsize() if self.queue is not None else 0}))
+
+    def start(self):
+        if self.task is None:
+            self.queue = asyncio.Queue(maxsize=self.max_pending)
+            self.closing = False
+            self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        """Stop accepting documents and wait until everything queued is written"""
+        if self.task is None:
+            return
+        self.closing = True
+        pending = self.queue.qsize()
+        await self.task
+        self.task = None
+        logger.info("Write-behind buffer %s flushed %s pending documents on shutdown", self.name, pending)
+
+    async def add(self, document: dict, timeout: float):
+        if self.queue is None or self.closing:
+            raise RuntimeError(f"Write-behind buffer {self.name} is not running")
+        try:
+            await asyncio.wait_for(self.queue.put(document), timeout=timeout)
+        except asyncio.TimeoutError:
+            raise BufferFull(f"Write-behind buffer {self.name} is full")
+
+    async def run(self):
+        # Never cancelled: stop() sets `closing` and the loop exits once the
+        # queue is empty, so no document can be lost between get() and flush().
+        while not (self.closing and self.queue.empty()):
+            try:
+                batch = [await asyncio.wait_for(self.queue.get(), timeout=IDLE_POLL)]
+            except asyncio.TimeoutError:
+                continue
+
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if self.closing:
+                    remaining = 0
+                if remaining <= 0:
+                    if self.queue.empty():
+                        break
+                    batch.append(self.queue.get_nowait())
+                    continue
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout=remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            await self.flush(batch)
+
+    async def flush(self, batch: List[dict]):
+        self.stats["batches"] += 1
+        write_behind_batch_size.observe(len(batch), self.name)
+        for attempt in range(1, self.flush_retries + 1):
+            try:
+                collection = await self.get_collection()
+                if self.breaker is not None:
+                    await self.breaker.call(collection.insert_many, batch, ordered=True)
+                else:
+                    await collection.insert_many(batch, ordered=True)
+                self._record(len(batch), 0)
+                await self._flushed(batch)
+                return
+            except BulkWriteError as e:
+                # Ordered: everything before the failing document was written
+                written = e.details.get("nInserted", 0)
+                self._record(written, 1)
+                await self._flushed(batch[:written])
+                logger.error("Write-behind %s: document %s of batch rejected: %s", self.name, written, e.details.get('writeErrors'))
+                batch = batch[written + 1:]
+                if not batch:
+                    return
+            except Exception as e:
+                if self.spill is not None and self._unreachable(e):
+                    await self._spill(batch, e)
+                    return
+                logger.error("Write-behind %s: flush of %s documents failed (attempt %s): %s", self.name, len(batch), attempt, e)
+                await asyncio.sleep(min(0.1 * 2 ** attempt, 2.0))
+
+        if self.spill is not None:
+            await self._spill(batch, f"{self.flush_retries} attempts failed")
+            return
+        self._record(0, len(batch))
+        logger.error("Write-behind %s: dropped %s documents after %s attempts", self.name, len(batch), self.flush_retries)
+
+    def _unreachable(self, error: Exception) -> bool:
+        return isinstance(error, CircuitOpen) or (
+            self.breaker is not None and isinstance(error, self.breaker.failure_types))
+
+    async def _spill(self, batch: List[dict], reason):
+        try:
+            await self.spill(batch)
+        except Exception as e:
+            self._record(0, len(batch))
+            logger.error("Write-behind %s: could not spill %s documents (%s), dropped: %s", self.name, len(batch), reason, e)
+            return
+        self.stats["spilled"] += len(batch)
+        write_behind_flushed.inc(self.name, "spilled", amount=len(batch))
+        logger.warning("Write-behind %s: spilled %s documents to the journal: %s", self.name, len(batch), reason)
+
+    async def _flushed(self, documents: List[dict]):
+        if self.on_flushed is not None and documents:
+            await self.on_flushed(documents)
+
+    def _record(self, flushed: int, failed: int):
+        self.stats["flushed"] += flushed
+        self.stats["failed"] += failed
+        if flushed:
+            write_behind_flushed.inc(self.name, "flushed", amount=flushed)
+        if failed:
+            write_behind_flushed.inc(self.name, "failed", amount=failed)
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Auth response serialization: Pydantic models + JSONResponse vs. app.auth.serialization.
+
+Builds the body of a login response (tokens plus the user's profile) and of a
+/auth/me response from the same user document, first the way the router used
+to (UserInDB -> UserResponse -> TokenResponse -> JSONResponse) and then with
+the orjson projection it uses now. Reports microseconds per response and the
+peak memory allocated while building one response, measured with tracemalloc.
+
+    python -m benchmarks.auth_serialization --iterations 50000
+"""
+import argparse
+import time
+import tracemalloc
+from datetime import datetime
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.auth.models import UserInDB
+from app.auth.schemas import TokenResponse, UserResponse
+from app.auth.serialization import json_response, token_body, user_body
+
+USER_DOC = {
+    "_id": ObjectId(),
+    "email": "bench@example.com",
+    "full_name": "Bench User",
+    "username": "bench",
+    "password_hash": "$2b$12$" + "x" * 53,
+    "is_active": True,
+    "role": "user",
+    "created_at": datetime(2024, 1, 1, 12, 0, 0),
+    "updated_at": datetime(2024, 1, 1, 12, 0, 0),
+    "last_login_at": datetime(2024, 6, 1, 8, 30, 0),
+    "email_verified": True,
+    "phone": "+91 99999 99999",
+}
+
+TOKEN_DATA = {
+    "access_token": "a" * 280,
+    "refresh_token": "r" * 280,
+    "token_type": "bearer",
+    "expires_in": 1800,
+}
+
+
+def pydantic_user(user):
+    return UserResponse(
+        id=str(user.id),
+        email=user.email,
+        full_name=user.full_name,
+        username=user.username,
+        role=user.role,
+        is_active=user.is_active,
+        email_verified=user.email_verified,
+        phone=user.phone,
+        created_at=user.created_at,
+        last_login_at=user.last_login_at,
+    )
+
+
+def old_login():
+    user = UserInDB.from_dict(USER_DOC)
+    token_response = TokenResponse(user=pydantic_user(user), **TOKEN_DATA)
+    return JSONResponse(content=jsonable_encoder(token_response)).body
+
+
+def old_me():
+    user = UserInDB.from_dict(USER_DOC)
+    return JSONResponse(content=jsonable_encoder(pydantic_user(user))).body
+
+
+def new_login():
+    user = UserInDB.from_dict(USER_DOC)
+    return json_response(token_body(user, TOKEN_DATA)).body
+
+
+def new_me():
+    user = UserInDB.from_dict(USER_DOC)
+    return json_response(user_body(user)).body
+
+
+def time_per_call(func, iterations):
+    for _ in range(min(iterations, 1000)):
+        func()
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - started) / iterations
+
+
+def peak_bytes(func, rounds=200):
+    func()
+    peaks = []
+    for _ in range(rounds):
+        tracemalloc.start()
+        func()
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return sorted(peaks)[len(peaks) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"{'response':<8} {'path':<9} {'us/resp':>9} {'peak bytes':>11} {'body bytes':>11}")
+    for name, old, new in (("login", old_login, new_login), ("me", old_me, new_me)):
+        for label, func in (("pydantic", old), ("orjson", new)):
+            per_call = time_per_call(func, args.iterations)
+            print(f"{name:<8} {label:<9} {per_call * 1e6:>9.2f} {peak_bytes(func):>11} {len(func()):>11}")
+
+
+if __name__ == "__main__":
+    main()
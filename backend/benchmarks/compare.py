@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Compare two benchmarks.suite result files.
+
+    python -m benchmarks.compare before.json after.json [--threshold 10]
+
+Prints throughput, latency and loop-lag deltas per scenario and exits with
+status 1 if any p95/p99 latency got worse by more than --threshold percent.
+"""
+import argparse
+import json
+import sys
+
+METRICS = [
+    ("throughput_rps", lambda r: r["throughput_rps"], True),
+    ("p50_ms", lambda r: r["latency"]["p50_ms"], False),
+    ("p95_ms", lambda r: r["latency"]["p95_ms"], False),
+    ("p99_ms", lambda r: r["latency"]["p99_ms"], False),
+    ("loop_lag_p99_ms", lambda r: r["loop_lag"]["p99_ms"], False),
+]
+GATED = {"p95_ms", "p99_ms"}
+
+
+def change(before, after):
+    if before == 0:
+        return 0.0 if after == 0 else float("inf")
+    return (after - before) / before * 100
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--threshold", type=float, default=10.0)
+    args = parser.parse_args()
+
+    with open(args.before) as f:
+        before = json.load(f)
+    with open(args.after) as f:
+        after = json.load(f)
+
+    print(f"before: {before['meta'].get('commit')}  after: {after['meta'].get('commit')}")
+    regressions = []
+    for name, old in before["scenarios"].items():
+        new = after["scenarios"].get(name)
+        if new is None or "skipped" in old or "skipped" in new:
+            print(f"{name}: not comparable")
+            continue
+        for metric, read, higher_is_better in METRICS:
+            delta = change(read(old), read(new))
+            worse = delta < 0 if higher_is_better else delta > 0
+            flag = ""
+            if metric in GATED and worse and abs(delta) > args.threshold:
+                regressions.append(f"{name}.{metric}")
+                flag = "  REGRESSION"
+            print(f"{name:<10} {metric:<18} {read(old):>10.2f} -> {read(new):>10.2f}  {delta:+7.1f}%{flag}")
+
+    if regressions:
+        print(f"Regressed beyond {args.threshold}%: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
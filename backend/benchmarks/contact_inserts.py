@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Contact insert throughput: per-request insert_one vs. the write-behind buffer.
+
+Writes --documents contact documents with --concurrency concurrent
+"submitters", first each doing its own insert_one (the old submit_contact),
+then each calling WriteBehindBuffer.add() the way submit_contact does now.
+Reports inserts per second for both, counting the buffer's time until every
+document is actually in Mongo, not just enqueued.
+
+    MONGODB_URL=mongodb://localhost:27017 python -m benchmarks.contact_inserts --documents 20000
+"""
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("DATABASE_NAME", "paresh_enterprises_bench")
+
+from app.config import settings
+from app.database import database, get_contacts_collection
+from app.write_behind import WriteBehindBuffer
+
+
+def contact(i):
+    return {
+        "name": "Bench", "email": f"bench{i}@example.com", "subject": "Benchmark",
+        "message": f"Benchmark submission {i}", "phone": None, "company": "Benchmarks",
+    }
+
+
+async def submit_all(documents, concurrency, submit):
+    counter = iter(range(documents))
+
+    async def submitter():
+        for i in counter:
+            await submit(contact(i))
+
+    await asyncio.gather(*(submitter() for _ in range(concurrency)))
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=10000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    args = parser.parse_args()
+
+    await database.connect_to_database()
+    contacts_collection = await get_contacts_collection()
+    await contacts_collection.delete_many({})
+
+    started = time.perf_counter()
+    await submit_all(args.documents, args.concurrency, contacts_collection.insert_one)
+    single = args.documents / (time.perf_counter() - started)
+    await contacts_collection.delete_many({})
+
+    buffer = WriteBehindBuffer(
+        "bench", get_contacts_collection,
+        max_batch=settings.contact_batch_size,
+        max_delay=settings.contact_batch_delay_ms / 1000,
+        max_pending=settings.contact_buffer_size,
+    )
+    buffer.start()
+    started = time.perf_counter()
+    await submit_all(args.documents, args.concurrency, lambda doc: buffer.add(doc, timeout=30))
+    await buffer.stop()
+    batched = args.documents / (time.perf_counter() - started)
+
+    written = await contacts_collection.count_documents({})
+    await contacts_collection.delete_many({})
+    await database.close_database_connection()
+
+    print(f"insert_one per request: {single:10.0f} inserts/s")
+    print(f"write-behind batches:   {batched:10.0f} inserts/s  ({buffer.stats['batches']} batches, "
+          f"{written}/{args.documents} written)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Contact submission load test.
+
+Floods POST /api/contact at a fixed concurrency while a probe keeps hitting
+another route (the SPA by default), and compares the probe latency with the
+latency it had before the flood started. If the contact path blocks the event
+loop the probe p95/p99 balloon; with the async path they should stay flat.
+
+All traffic comes from one IP, so start the server with the per-IP contact
+limit raised (CONTACT_IP_RATE_PER_MINUTE / CONTACT_IP_BURST), or most
+submissions are shed with 429 before they reach the pipeline.
+
+    CONTACT_IP_RATE_PER_MINUTE=1000000000 CONTACT_IP_BURST=1000000000 \\
+        uvicorn app.main:app --port 8000 &
+    python -m benchmarks.contact_load --base-url http://localhost:8000
+"""
+import argparse
+import asyncio
+import itertools
+import time
+
+import httpx
+
+from benchmarks.common import summarize
+
+def contact_payload(i):
+    # Distinct sender and message so the per-email limit and duplicate check pass
+    return {
+        "name": "Load Test",
+        "email": f"loadtest{i}@example.com",
+        "subject": "Load test",
+        "message": f"Generated by benchmarks.contact_load ({i})",
+        "company": "Benchmarks",
+    }
+
+
+async def probe(client, path, interval, stop, samples):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await client.get(path)
+        samples.append(time.perf_counter() - started)
+        await asyncio.sleep(interval)
+
+
+async def flood(client, stop, statuses, counter):
+    while not stop.is_set():
+        try:
+            response = await client.post("/api/contact", json=contact_payload(next(counter)))
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        except httpx.HTTPError as e:
+            statuses[type(e).__name__] = statuses.get(type(e).__name__, 0) + 1
+
+
+async def run_phase(base_url, probe_path, duration, interval, concurrency):
+    limits = httpx.Limits(max_connections=concurrency + 2, max_keepalive_connections=concurrency + 2)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        stop = asyncio.Event()
+        samples, statuses = [], {}
+        tasks = [asyncio.create_task(probe(client, probe_path, interval, stop, samples))]
+        counter = itertools.count()
+        tasks += [asyncio.create_task(flood(client, stop, statuses, counter)) for _ in range(concurrency)]
+        await asyncio.sleep(duration)
+        stop.set()
+        await asyncio.gather(*tasks)
+    submitted = sum(v for k, v in statuses.items() if k == 200)
+    return {
+        "probe": summarize(samples),
+        "contact_statuses": statuses,
+        "contact_per_second": round(submitted / duration, 1),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--probe-path", default="/")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--probe-interval", type=float, default=0.05)
+    parser.add_argument("--concurrency", type=int, default=100)
+    args = parser.parse_args()
+
+    baseline = await run_phase(args.base_url, args.probe_path, args.duration, args.probe_interval, 0)
+    saturated = await run_phase(args.base_url, args.probe_path, args.duration, args.probe_interval, args.concurrency)
+
+    print(f"Probe {args.probe_path} while idle:      {baseline['probe']}")
+    print(f"Probe {args.probe_path} while saturated: {saturated['probe']}")
+    print(f"Contact submissions/s: {saturated['contact_per_second']}  statuses: {saturated['contact_statuses']}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for SendGrid's v3 mail/send API.
+
+Accepts the same requests the outbox sender makes and answers 202, or a
+configurable share of 503s, after a configurable delay. /stats reports what
+it saw, including how many distinct client connections were used, which shows
+whether the sender is actually reusing keep-alive connections.
+
+    FAKE_SENDGRID_FAIL_RATE=0.2 FAKE_SENDGRID_LATENCY_MS=50 \\
+        uvicorn benchmarks.fake_sendgrid:app --port 8025
+    SENDGRID_API_URL=http://localhost:8025 uvicorn app.main:app
+"""
+import asyncio
+import os
+import random
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+app = FastAPI(title="Fake SendGrid")
+
+app.state.config = {
+    "fail_rate": float(os.getenv("FAKE_SENDGRID_FAIL_RATE", "0")),
+    "latency_ms": float(os.getenv("FAKE_SENDGRID_LATENCY_MS", "0")),
+    "reject_rate": float(os.getenv("FAKE_SENDGRID_REJECT_RATE", "0")),
+}
+app.state.stats = {"accepted": 0, "failed": 0, "rejected": 0, "connections": set()}
+
+
+@app.post("/v3/mail/send")
+async def mail_send(request: Request):
+    config, stats = app.state.config, app.state.stats
+    payload = await request.json()
+    stats["connections"].add((request.client.host, request.client.port))
+
+    if config["latency_ms"]:
+        await asyncio.sleep(config["latency_ms"] / 1000)
+
+    if not payload.get("personalizations") or random.random() < config["reject_rate"]:
+        stats["rejected"] += 1
+        return JSONResponse({"errors": [{"message": "Bad Request"}]}, status_code=400)
+
+    if random.random() < config["fail_rate"]:
+        stats["failed"] += 1
+        return JSONResponse({"errors": [{"message": "Service Unavailable"}]}, status_code=503)
+
+    stats["accepted"] += 1
+    return Response(status_code=202)
+
+
+@app.get("/stats")
+async def get_stats():
+    stats = app.state.stats
+    return {**{k: v for k, v in stats.items() if k != "connections"}, "connections": len(stats["connections"])}
+
+
+@app.post("/config")
+async def set_config(request: Request):
+    app.state.config.update(await request.json())
+    return app.state.config
+
+
+@app.post("/reset")
+async def reset():
+    app.state.stats = {"accepted": 0, "failed": 0, "rejected": 0, "connections": set()}
+    return {"reset": True}
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+bcrypt login throughput: inline vs. the hashing process pool.
+
+Simulates a burst of --logins concurrent password checks the way
+authenticate_user does them, first with pwd_context.verify called inline on
+the event loop (the old behaviour), then through HashingExecutor. For each
+mode it reports logins per second, logins per second per core, and the worst
+event-loop lag seen by a 10 ms ticker running alongside.
+
+    python -m benchmarks.login_throughput --logins 200
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from app.auth.hashing import HashingExecutor, pwd_context
+
+PASSWORD = "benchmark-password"
+
+
+async def measure(label, verify, logins, concurrency, cores):
+    lag = {"max": 0.0}
+    stop = asyncio.Event()
+
+    async def ticker():
+        while not stop.is_set():
+            expected = time.perf_counter() + 0.01
+            await asyncio.sleep(0.01)
+            lag["max"] = max(lag["max"], time.perf_counter() - expected)
+
+    slots = asyncio.Semaphore(concurrency)
+
+    async def login():
+        async with slots:
+            assert await verify(PASSWORD)
+
+    ticker_task = asyncio.create_task(ticker())
+    await asyncio.sleep(0.02)
+    started = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await ticker_task
+
+    rate = logins / elapsed
+    print(f"{label:<10} {rate:8.1f} logins/s  {rate / cores:8.1f} logins/s/core  "
+          f"max loop lag {lag['max'] * 1000:8.1f} ms")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    hashed = pwd_context.hash(PASSWORD)
+
+    async def inline_verify(password):
+        return pwd_context.verify(password, hashed)
+
+    await measure("inline", inline_verify, args.logins, args.concurrency, 1)
+
+    executor = HashingExecutor(workers=args.workers, max_queue=args.logins)
+    await executor.start()
+
+    async def pooled_verify(password):
+        return await executor.verify(password, hashed)
+
+    await measure("pool", pooled_verify, args.logins, args.concurrency, args.workers)
+    print(f"Pool stats: {executor.stats()}")
+    await executor.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Email outbox throughput and retry benchmark.
+
+Starts benchmarks.fake_sendgrid in-process, enqueues --messages emails into a
+scratch database on a local mongod, then runs the OutboxWorker until every
+message is either sent or dead-lettered. Reports delivery rate, retries, dead
+letters and how many HTTP connections the pooled sender opened.
+
+    MONGODB_URL=mongodb://localhost:27017 python -m benchmarks.outbox_throughput \\
+        --messages 2000 --fail-rate 0.2 --latency-ms 30
+"""
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("DATABASE_NAME", "paresh_enterprises_bench")
+os.environ.setdefault("OUTBOX_BACKOFF_BASE", "0.05")
+os.environ.setdefault("OUTBOX_BACKOFF_MAX", "0.5")
+os.environ.setdefault("OUTBOX_POLL_INTERVAL", "0.05")
+
+import uvicorn
+
+from app.config import settings
+from app.database import database, get_outbox_collection
+from app.mail.outbox import OutboxWorker, OutboxStatus, enqueue_email
+from app.mail.sender import SendGridSender
+from benchmarks import fake_sendgrid
+from benchmarks.common import free_port
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=1000)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--reject-rate", type=float, default=0.0)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    fake_sendgrid.app.state.config.update(
+        fail_rate=args.fail_rate, reject_rate=args.reject_rate, latency_ms=args.latency_ms,
+    )
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(fake_sendgrid.app, port=port, log_level="warning"))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    await database.connect_to_database()
+    outbox_collection = await get_outbox_collection()
+    await outbox_collection.delete_many({})
+
+    for i in range(args.messages):
+        await enqueue_email({
+            "from": settings.sender_email,
+            "to": settings.owner_email,
+            "subject": f"Benchmark message {i}",
+            "text": "Generated by benchmarks.outbox_throughput",
+        })
+
+    worker = OutboxWorker(SendGridSender(api_url=f"http://127.0.0.1:{port}", api_key="bench"))
+    started = time.perf_counter()
+    worker.start()
+    open_states = [OutboxStatus.PENDING, OutboxStatus.SENDING]
+    while await outbox_collection.count_documents({"status": {"$in": open_states}}):
+        await asyncio.sleep(0.05)
+    elapsed = time.perf_counter() - started
+    await worker.stop()
+
+    sent = await outbox_collection.count_documents({"status": OutboxStatus.SENT})
+    dead = await outbox_collection.count_documents({"status": OutboxStatus.DEAD})
+    print(f"Delivered {sent}/{args.messages} in {elapsed:.2f}s ({sent / elapsed:.1f} msg/s), dead-lettered {dead}")
+    print(f"Worker stats: {worker.stats}")
+    print(f"Fake SendGrid: {await fake_sendgrid.get_stats()}")
+
+    await outbox_collection.delete_many({})
+    await database.close_database_connection()
+    server.should_exit = True
+    await server_task
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
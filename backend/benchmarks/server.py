@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark server: app.main:app plus an event-loop lag probe.
+
+Started by benchmarks.suite in its own process so the load generator never
+shares a loop with the server it measures. With BENCH_MONGO=memory the Motor
+client is swapped for mongomock-motor, an in-memory stand-in
+(benchmarks/requirements.txt), so the suite can run without a mongod.
+
+The lag probe wakes every BENCH_LAG_INTERVAL seconds and records how late it
+was; GET /__bench__/loop-lag returns a summary (and resets it with ?reset=1).
+
+With BENCH_FAULTS=1 as well, POST /__bench__/faults {"mongo": "down"} makes
+the in-memory Mongo behave like an unreachable mongod: every call waits out
+MONGO_SERVER_SELECTION_TIMEOUT_MS and raises ServerSelectionTimeoutError,
+until {"mongo": "up"}. tests/test_fault_injection.py drives it.
+"""
+import asyncio
+import contextlib
+import os
+import time
+
+
+def use_inmemory_mongo():
+    import mongomock
+    import mongomock_motor
+
+    import app.database
+
+    app.database.AsyncIOMotorClient = mongomock_motor.AsyncMongoMockClient
+    # mongomock has no server commands; the app only uses them as pings
+    mongomock.database.Database.command = lambda self, *args, **kwargs: {"ok": 1.0}
+
+
+def install_fault_switch(app):
+    import mongomock_motor
+    from fastapi.routing import APIRoute
+    from pymongo.errors import ServerSelectionTimeoutError
+
+    from app.config import settings
+
+    faults = {"mongo": "up"}
+
+    def unreachable(method):
+        async def wrapper(self, *args, **kwargs):
+            if faults["mongo"] == "down":
+                await asyncio.sleep(settings.mongo_server_selection_timeout_ms / 1000)
+                raise ServerSelectionTimeoutError("No servers available (injected fault)")
+            return await method(self, *args, **kwargs)
+        return wrapper
+
+    # Every coroutine the app can await on the stand-in client; find() and
+    # aggregate() only build cursors, so their fetch methods are patched instead
+    for cls in (mongomock_motor.AsyncMongoMockCollection, mongomock_motor.AsyncMongoMockDatabase,
+                mongomock_motor.AsyncCursor, mongomock_motor.AsyncCommandCursor,
+                mongomock_motor.AsyncLatentCommandCursor):
+        for name, method in list(vars(cls.__mro__[1]).items()):
+            if asyncio.iscoroutinefunction(method) and name != "close":
+                setattr(cls, name, unreachable(method))
+
+    async def set_faults(body: dict):
+        faults.update({key: value for key, value in body.items() if key in faults})
+        return faults
+
+    app.router.routes.insert(0, APIRoute("/__bench__/faults", set_faults, methods=["POST"]))
+
+
+def install_lag_probe(app, interval):
+    from fastapi.routing import APIRoute
+
+    from benchmarks.common import summarize
+
+    samples = []
+
+    async def sample_lag():
+        while True:
+            expected = time.perf_counter() + interval
+            await asyncio.sleep(interval)
+            samples.append(max(time.perf_counter() - expected, 0.0))
+
+    # The app uses a lifespan, which makes Starlette skip startup handlers,
+    # so the probe runs inside a wrapper around it
+    app_lifespan = app.router.lifespan_context
+
+    @contextlib.asynccontextmanager
+    async def lifespan_with_probe(app_):
+        task = asyncio.create_task(sample_lag())
+        try:
+            async with app_lifespan(app_) as state:
+                yield state
+        finally:
+            task.cancel()
+
+    async def loop_lag(reset: bool = False):
+        summary = summarize(samples)
+        if reset:
+            samples.clear()
+        return summary
+
+    app.router.lifespan_context = lifespan_with_probe
+    # Ahead of the SPA catch-all, which would otherwise answer this path
+    app.router.routes.insert(0, APIRoute("/__bench__/loop-lag", loop_lag, methods=["GET"]))
+
+
+def main():
+    import uvicorn
+
+    if os.getenv("BENCH_MONGO") == "memory":
+        use_inmemory_mongo()
+
+    from app.main import app
+
+    if os.getenv("BENCH_FAULTS") == "1" and os.getenv("BENCH_MONGO") == "memory":
+        install_fault_switch(app)
+    install_lag_probe(app, float(os.getenv("BENCH_LAG_INTERVAL", "0.005")))
+    uvicorn.run(app, host="127.0.0.1", port=int(os.environ["BENCH_PORT"]), log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Static/SPA serving: StaticFiles + FileResponse vs. app.static_files.
+
+Builds two minimal apps over the same build directory, one wired the way
+app.main used to be (StaticFiles mount plus a FileResponse catch-all) and one
+using StaticSite, and drives both in-process through httpx's ASGI transport.
+For each scenario it reports requests per second and bytes on the wire per
+request (body plus headers). "revisit" replays the ETag from the first
+response, the way a browser revalidates.
+
+    python -m benchmarks.static_serving --static-dir app/static
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import FileResponse
+from fastapi.staticfiles import StaticFiles
+
+from app.static_files import StaticSite
+
+BROWSER_HEADERS = {"accept-encoding": "gzip, deflate, br"}
+
+
+def baseline_app(static_dir):
+    app = FastAPI()
+    app.mount("/static", StaticFiles(directory=static_dir, html=True), name="static")
+
+    @app.get("/{full_path:path}")
+    async def serve_react(full_path: str):
+        return FileResponse(os.path.join(static_dir, "index.html"))
+
+    return app
+
+
+def static_site_app(static_dir):
+    app = FastAPI()
+    site = StaticSite(static_dir)
+    site.load()
+
+    @app.get("/static/{file_path:path}")
+    async def serve_static(file_path: str, request: Request):
+        return site.serve_file(request, file_path)
+
+    @app.get("/{full_path:path}")
+    async def serve_react(full_path: str, request: Request):
+        return site.serve_spa(request, full_path)
+
+    return app
+
+
+async def fetch(client, path, headers):
+    # Read the raw stream: httpx would otherwise spend time decoding the body
+    # and report the decoded size rather than what crossed the wire.
+    async with client.stream("GET", path, headers=headers) as response:
+        body_bytes = 0
+        async for chunk in response.aiter_raw():
+            body_bytes += len(chunk)
+    header_bytes = sum(len(k) + len(v) + 4 for k, v in response.headers.raw)
+    return response, header_bytes + body_bytes
+
+
+async def run_scenario(app, path, requests, revisit):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        headers = dict(BROWSER_HEADERS)
+        first, _ = await fetch(client, path, headers)
+        if revisit:
+            if "etag" in first.headers:
+                headers["if-none-match"] = first.headers["etag"]
+
+        total_bytes = 0
+        started = time.perf_counter()
+        for _ in range(requests):
+            response, size = await fetch(client, path, headers)
+            total_bytes += size
+        elapsed = time.perf_counter() - started
+
+    return requests / elapsed, total_bytes / requests, response.status_code
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--static-dir", default="app/static")
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    asset = next(
+        (f"/static/assets/{name}" for name in sorted(os.listdir(os.path.join(args.static_dir, "assets")))
+         if name.endswith(".js")),
+        "/static/index.html",
+    )
+    scenarios = [("spa route", "/products", False), ("spa revisit", "/products", True),
+                 ("js bundle", asset, False), ("js revisit", asset, True)]
+    apps = [("StaticFiles", baseline_app(args.static_dir)), ("StaticSite", static_site_app(args.static_dir))]
+
+    print(f"{'scenario':<14}{'server':<14}{'req/s':>10}{'bytes/req':>12}{'status':>8}")
+    for label, path, revisit in scenarios:
+        for name, app in apps:
+            rate, size, status = await run_scenario(app, path, args.requests, revisit)
+            print(f"{label:<14}{name:<14}{rate:>10.0f}{size:>12.0f}{status:>8}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Reproducible HTTP benchmark suite for the API.
+
+Boots app.main:app (through benchmarks.server) and benchmarks.fake_sendgrid as
+local subprocesses, then runs scripted concurrent scenarios against them and
+reports p50/p95/p99 latency, throughput, error counts and server event-loop
+lag for each. Results are written as JSON so runs on different commits can be
+compared with benchmarks.compare. Needs no network access.
+
+    # against a local mongod
+    python -m benchmarks.suite --mongo mongodb://localhost:27017 --out bench.json
+    # against the in-memory stand-in (pip install -r benchmarks/requirements.txt)
+    python -m benchmarks.suite --mongo memory --out bench.json
+    python -m benchmarks.compare before.json after.json
+
+Scenarios: spa (GET /products), contact (POST /api/contact), login
+(POST /auth/login), me (GET /auth/me with a token from login) and
+me_revalidate (the same, sending the ETag from a first GET as If-None-Match,
+the way the SPA's polls revalidate).
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.common import free_port, summarize
+
+BENCH_ADMIN_EMAIL = "bench-admin@example.com"
+BENCH_ADMIN_PASSWORD = "bench-password"
+
+SCENARIOS = {
+    "spa": {"concurrency": 50},
+    "contact": {"concurrency": 50},
+    "login": {"concurrency": 8},
+    "me": {"concurrency": 50},
+    "me_revalidate": {"concurrency": 50},
+}
+
+
+class Scenario:
+    def __init__(self, name, concurrency, duration):
+        self.name = name
+        self.concurrency = concurrency
+        self.duration = duration
+        self.token = None
+        self.etag = None
+
+    async def prepare(self, client):
+        if self.name in ("me", "me_revalidate"):
+            response = await client.post("/auth/login", json={"email": BENCH_ADMIN_EMAIL, "password": BENCH_ADMIN_PASSWORD})
+            if response.status_code != 200:
+                return f"login for token returned {response.status_code}"
+            self.token = response.json()["access_token"]
+        if self.name == "me_revalidate":
+            response = await client.get("/auth/me", headers={"Authorization": f"Bearer {self.token}"})
+            self.etag = response.headers.get("etag")
+            if not self.etag:
+                return "GET /auth/me returned no ETag"
+        return None
+
+    def request(self, client, i):
+        if self.name == "spa":
+            return client.get("/products", headers={"accept-encoding": "gzip, br"})
+        if self.name == "contact":
+            return client.post("/api/contact", json={
+                "name": "Bench", "email": f"bench{i}@example.com", "subject": "Benchmark",
+                "message": f"Benchmark submission {i}", "company": "Benchmarks",
+            })
+        if self.name == "login":
+            return client.post("/auth/login", json={"email": BENCH_ADMIN_EMAIL, "password": BENCH_ADMIN_PASSWORD})
+        if self.name == "me":
+            return client.get("/auth/me", headers={"Authorization": f"Bearer {self.token}"})
+        if self.name == "me_revalidate":
+            return client.get("/auth/me", headers={"Authorization": f"Bearer {self.token}", "If-None-Match": self.etag})
+        raise ValueError(f"Unknown scenario {self.name}")
+
+    async def run(self, client):
+        latencies, statuses = [], {}
+        counter = iter(range(10 ** 9))
+        deadline = time.perf_counter() + self.duration
+
+        async def worker():
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    response = await self.request(client, next(counter))
+                    key = str(response.status_code)
+                except httpx.HTTPError as e:
+                    key = type(e).__name__
+                latencies.append(time.perf_counter() - started)
+                statuses[key] = statuses.get(key, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+        elapsed = time.perf_counter() - started
+
+        ok = sum(count for status, count in statuses.items() if status.startswith("2") or status == "304")
+        return {
+            "concurrency": self.concurrency,
+            "duration_s": round(elapsed, 2),
+            "requests": len(latencies),
+            "throughput_rps": round(len(latencies) / elapsed, 1),
+            "success_rps": round(ok / elapsed, 1),
+            "statuses": statuses,
+            "latency": summarize(latencies),
+        }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def wait_until_up(url, process, timeout=60):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"{url} exited with code {process.returncode}")
+            try:
+                await client.get(url)
+                return
+            except httpx.HTTPError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+def start_services(args):
+    mail_port, app_port = free_port(), free_port()
+    log = open(args.server_log, "w") if args.server_log else subprocess.DEVNULL
+    mail = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "benchmarks.fake_sendgrid:app",
+         "--host", "127.0.0.1", "--port", str(mail_port), "--log-level", "warning"],
+        stdout=log, stderr=log,
+    )
+
+    env = dict(
+        os.environ,
+        BENCH_PORT=str(app_port),
+        BENCH_MONGO="memory" if args.mongo == "memory" else "",
+        DATABASE_NAME=args.database,
+        SENDGRID_API_URL=f"http://127.0.0.1:{mail_port}",
+        SENDGRID_API_KEY="bench",
+        ADMIN_EMAIL=BENCH_ADMIN_EMAIL,
+        ADMIN_PASSWORD=BENCH_ADMIN_PASSWORD,
+        # Every scenario comes from one IP; the limits would shed almost all of it
+        CONTACT_IP_RATE_PER_MINUTE="1000000000",
+        CONTACT_IP_BURST="1000000000",
+    )
+    if args.mongo != "memory":
+        env["MONGODB_URL"] = args.mongo
+    server = subprocess.Popen([sys.executable, "-m", "benchmarks.server"], env=env, stdout=log, stderr=log)
+    return mail, mail_port, server, app_port
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongo", default=os.getenv("MONGODB_URL", "memory"),
+                        help='mongod URL, or "memory" for the in-memory stand-in')
+    parser.add_argument("--database", default="paresh_enterprises_bench")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per scenario")
+    parser.add_argument("--concurrency", type=int, help="override every scenario's concurrency")
+    parser.add_argument("--out", help="write results as JSON to this file")
+    parser.add_argument("--server-log", help="write server and mail sink output to this file")
+    args = parser.parse_args()
+
+    mail, mail_port, server, app_port = start_services(args)
+    base_url = f"http://127.0.0.1:{app_port}"
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "started_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "mongo": "memory" if args.mongo == "memory" else "mongod",
+            "duration_s": args.duration,
+        },
+        "scenarios": {},
+    }
+
+    try:
+        await wait_until_up(f"http://127.0.0.1:{mail_port}/stats", mail)
+        await wait_until_up(f"{base_url}/__bench__/loop-lag", server)
+
+        limits = httpx.Limits(max_connections=200, max_keepalive_connections=200)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+            for name in args.scenarios.split(","):
+                scenario = Scenario(name, args.concurrency or SCENARIOS[name]["concurrency"], args.duration)
+                skipped = await scenario.prepare(client)
+                if skipped:
+                    results["scenarios"][name] = {"skipped": skipped}
+                    print(f"{name:<10} skipped: {skipped}")
+                    continue
+
+                await client.get("/__bench__/loop-lag", params={"reset": True})
+                result = await scenario.run(client)
+                result["loop_lag"] = (await client.get("/__bench__/loop-lag", params={"reset": True})).json()
+                results["scenarios"][name] = result
+
+                latency = result["latency"]
+                print(f"{name:<10} {result['throughput_rps']:>9.1f} req/s  p50 {latency['p50_ms']:>8.2f} ms  "
+                      f"p95 {latency['p95_ms']:>8.2f} ms  p99 {latency['p99_ms']:>8.2f} ms  "
+                      f"loop lag p99 {result['loop_lag']['p99_ms']:>8.2f} ms  {result['statuses']}")
+
+        async with httpx.AsyncClient() as client:
+            results["mail_sink"] = (await client.get(f"http://127.0.0.1:{mail_port}/stats")).json()
+    finally:
+        for process in (server, mail):
+            process.terminate()
+            process.wait(timeout=30)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.out}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
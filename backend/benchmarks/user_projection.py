@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+User reads: whole document + dict-based UserInDB vs. projections + the slotted model.
+
+Runs in-process. It encodes a realistic user document (a saved address,
+a preferences blob and a profile picture data URL) to BSON. Then, for each
+use case, it decodes what the server would send back, the way the driver
+does, and builds the user object. The old path always fetched the whole
+document and built the old __dict__ model. The new path fetches the
+use case's projection and builds the slotted UserInDB.
+
+For each use case it reports:
+- bytes on the wire, as the BSON size of the returned document;
+- allocations per request, as the tracemalloc peak while decoding and
+  building;
+- time per request.
+
+It also reports the memory retained by --cached users held the way
+user_cache holds them.
+
+    python -m benchmarks.user_projection --cached 10000
+"""
+import argparse
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import bson
+
+from app.auth.models import (
+    UserInDB, AUTH_CHECK_PROJECTION, LOGIN_PROJECTION, PROFILE_PROJECTION,
+)
+
+USER_DOC = {
+    "_id": bson.ObjectId(),
+    "email": "bench@example.com",
+    "username": "bench",
+    "full_name": "Bench User",
+    "password_hash": "$2b$12$" + "x" * 53,
+    "phone": "+91 99999 99999",
+    "role": "user",
+    "is_active": True,
+    "email_verified": True,
+    "created_at": datetime(2024, 1, 1, 12, 0, 0),
+    "updated_at": datetime(2024, 6, 1, 8, 30, 0),
+    "last_login_at": datetime(2024, 6, 1, 8, 30, 0),
+    "address": {
+        "line1": "Plot 12, GIDC Estate", "line2": "Near Water Tank", "city": "Vapi",
+        "state": "Gujarat", "postal_code": "396195", "country": "IN",
+    },
+    "preferences": {
+        "newsletter": True, "language": "en", "theme": "dark",
+        "saved_products": [f"product-{i}" for i in range(40)],
+        "notifications": {"email": True, "sms": False, "quotes": True},
+    },
+    "profile_picture": "data:image/jpeg;base64," + "A" * 12000,
+}
+
+
+class DictUser:
+    """The UserInDB this change replaced: every field in a __dict__, now() defaults"""
+
+    def __init__(self, data):
+        self.id = str(data.get("_id", ""))
+        self.email = data.get("email", "")
+        self.full_name = data.get("full_name", "")
+        self.username = data.get("username", "")
+        self.is_active = data.get("is_active", True)
+        self.role = data.get("role", "user")
+        self.password_hash = data.get("password_hash", "")
+        self.created_at = data.get("created_at") or datetime.now(timezone.utc)
+        self.updated_at = data.get("updated_at") or datetime.now(timezone.utc)
+        self.last_login_at = data.get("last_login_at")
+        self.email_verified = data.get("email_verified", False)
+        self.phone = data.get("phone")
+        self.address = data.get("address") or {}
+        self.preferences = data.get("preferences") or {}
+        self.profile_picture = data.get("profile_picture")
+
+
+def project(doc, projection):
+    return {key: value for key, value in doc.items() if key == "_id" or key in projection}
+
+
+def time_per_call(func, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - started) / iterations
+
+
+def peak_bytes(func, rounds=200):
+    func()
+    peaks = []
+    for _ in range(rounds):
+        tracemalloc.start()
+        func()
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return sorted(peaks)[len(peaks) // 2]
+
+
+def retained_bytes(build, count):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    held = [build() for _ in range(count)]
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del held
+    return retained
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--cached", type=int, default=10000)
+    args = parser.parse_args()
+
+    full_wire = bson.encode(USER_DOC)
+    old = lambda: DictUser(bson.decode(full_wire))
+
+    print(f"{'use case':<11} {'path':<10} {'wire bytes':>10} {'peak bytes':>11} {'us/req':>8}")
+    for name, projection in (("auth-check", AUTH_CHECK_PROJECTION), ("login", LOGIN_PROJECTION),
+                             ("profile", PROFILE_PROJECTION)):
+        wire = bson.encode(project(USER_DOC, projection))
+        new = lambda: UserInDB.from_dict(bson.decode(wire))
+        for label, size, func in (("whole doc", len(full_wire), old), ("projected", len(wire), new)):
+            per_call = time_per_call(func, args.iterations)
+            print(f"{name:<11} {label:<10} {size:>10} {peak_bytes(func):>11} {per_call * 1e6:>8.2f}")
+
+    auth_wire = bson.encode(project(USER_DOC, AUTH_CHECK_PROJECTION))
+    old_retained = retained_bytes(old, args.cached)
+    new_retained = retained_bytes(lambda: UserInDB.from_dict(bson.decode(auth_wire)), args.cached)
+    print(f"\nretained by {args.cached} cached users: "
+          f"whole doc {old_retained / args.cached:.0f} B/user, "
+          f"auth-check projection {new_retained / args.cached:.0f} B/user")
+
+
+if __name__ == "__main__":
+    main()
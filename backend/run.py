@@ -1,21 +1,93 @@
 #!/usr/bin/env python3
+"""
+Start the backend.
+
+    python run.py                 # development: one process, auto-reload
+    python run.py --production    # production: one worker per CPU, no reload
+
+Production mode is also chosen when ENVIRONMENT=production. Tunables come
+from the environment (see app/config.py): WEB_CONCURRENCY, KEEP_ALIVE_TIMEOUT,
+BACKLOG, GRACEFUL_SHUTDOWN_TIMEOUT, HOST and PORT.
+"""
+import argparse
+import importlib.util
+import os
 import sys
 import uvicorn
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
-def main():
+from app.config import settings, is_production
+
+
+def available_cpus() -> int:
+    # Honour CPU affinity (taskset, container cpusets) where the OS exposes it
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0)) or 1
+    return os.cpu_count() or 1
+
+
+def worker_count() -> int:
+    return settings.web_concurrency if settings.web_concurrency > 0 else available_cpus()
+
+
+def fastest(module: str, fallback: str) -> str:
+    return module if importlib.util.find_spec(module) else fallback
+
+
+def run_production():
+    workers = worker_count()
+
+    # Each worker starts its own bcrypt process pool; split the CPUs between
+    # them instead of giving every worker a pool as large as the machine
+    os.environ.setdefault("HASH_WORKERS", str(max(1, available_cpus() // workers)))
+
+    loop = fastest("uvloop", "asyncio")
+    http = fastest("httptools", "h11")
+    print(f"🚀 Starting Paresh Enterprises Backend (production): {workers} workers, loop={loop}, http={http}")
+
+    # On SIGTERM uvicorn stops accepting, waits up to the graceful timeout for
+    # in-flight requests, then runs the lifespan shutdown, which flushes the
+    # contact write-behind buffer and the email outbox.
+    uvicorn.run(
+        "app.main:app",
+        host=settings.host,
+        port=settings.port,
+        workers=workers,
+        loop=loop,
+        http=http,
+        backlog=settings.backlog,
+        timeout_keep_alive=settings.keep_alive_timeout,
+        timeout_graceful_shutdown=settings.graceful_shutdown_timeout,
+        proxy_headers=True,
+        access_log=False,
+        log_level="info"
+    )
+
+
+def run_development():
     print("🚀 Starting Paresh Enterprises Backend...")
-    print("📚 API Docs: http://localhost:8000/docs")
-    print("💊 Health Check: http://localhost:8000/health")
+    print(f"📚 API Docs: http://localhost:{settings.port}/docs")
+    print(f"💊 Health Check: http://localhost:{settings.port}/health")
 
     uvicorn.run(
         "app.main:app",
-        host="0.0.0.0",
-        port=8000,
+        host=settings.host,
+        port=settings.port,
         reload=True,
         log_level="info"
     )
 
+
+def main():
+    parser = argparse.ArgumentParser(description="Start the Paresh Enterprises backend")
+    parser.add_argument("--production", action="store_true", help="multi-worker mode without reload")
+    args = parser.parse_args()
+
+    if args.production or is_production():
+        run_production()
+    else:
+        run_development()
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,14 @@
+"""
+Shared test settings.
+
+Tests that need a real mongod (explain plans, for one) read its URL from
+TEST_MONGODB_URL and are skipped without it. Everything else runs against
+the in-memory stand-in, like the benchmarks.
+"""
+import os
+
+import pytest
+
+TEST_MONGODB_URL = os.getenv("TEST_MONGODB_URL")
+
+requires_mongod = pytest.mark.skipif(not TEST_MONGODB_URL, reason="TEST_MONGODB_URL is not set")
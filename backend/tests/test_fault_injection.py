@@ -0,0 +1,345 @@
+"""
+Fault injection for the Mongo and SendGrid circuit breakers.
+
+Boots the app (through benchmarks.server) and benchmarks.fake_sendgrid as
+local subprocesses, takes each dependency down in turn and checks that the
+API keeps answering quickly and that nothing submitted during the outage is
+lost. Each phase is a module fixture that depends on the one before it, so
+the phases always run in order, and the tests only assert on what they saw:
+
+  1. Mongo down: every contact submission still gets a 200, and once the
+     breaker has opened they are answered within FAST_FAIL_MS. The breaker
+     reports open and the spill journal holds the submissions.
+  2. Mongo back: the journal drains, the breaker closes, and the admin
+     listing holds every submission in the order it was made.
+  3. SendGrid down: the outbox stops calling it after a few failures
+     instead of retrying every email, and delivers all of them once it
+     answers again.
+
+Without TEST_MONGODB_URL the server's in-memory Mongo is switched off and on
+through /__bench__/faults. With it, the app talks to that mongod through a
+local TCP proxy that drops every connection while Mongo is "down", on a
+scratch database that is dropped afterwards.
+"""
+import asyncio
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+import httpx
+import pytest
+from pymongo import MongoClient
+
+from benchmarks.common import free_port, summarize
+from benchmarks.suite import BENCH_ADMIN_EMAIL, BENCH_ADMIN_PASSWORD, wait_until_up
+
+from .conftest import TEST_MONGODB_URL
+
+DATABASE_NAME = "paresh_enterprises_faults"
+SELECTION_TIMEOUT_MS = 1000
+CONTACTS = 30  # submissions made while Mongo is down
+EMAILS = 20  # submissions made while SendGrid is down
+FAST_FAIL_MS = 100.0  # p99 a submission may take once the Mongo breaker is open
+OUTAGE_SECONDS = 5.0  # how long SendGrid stays down
+MAX_SENDGRID_CALLS = 12  # breaker threshold plus trial calls
+RECOVERY_TIMEOUT = 30.0  # seconds to wait for each recovery
+
+
+class FaultProxy:
+    """TCP proxy in front of mongod that refuses and drops connections while down"""
+
+    def __init__(self, target_host, target_port):
+        self.target = (target_host, target_port)
+        self.down = False
+        self.connections = set()
+        self.server = None
+
+    async def start(self, port):
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", port)
+
+    async def stop(self):
+        self.set_down(True)
+        self.server.close()
+        await self.server.wait_closed()
+
+    def set_down(self, down):
+        self.down = down
+        if down:
+            for writer in list(self.connections):
+                writer.close()
+
+    async def handle(self, reader, writer):
+        if self.down:
+            writer.close()
+            return
+        try:
+            upstream_reader, upstream_writer = await asyncio.open_connection(*self.target)
+        except OSError:
+            writer.close()
+            return
+        self.connections.update((writer, upstream_writer))
+
+        async def pipe(source, sink):
+            try:
+                while data := await source.read(65536):
+                    sink.write(data)
+                    await sink.drain()
+            except (ConnectionError, OSError):
+                pass
+            finally:
+                sink.close()
+
+        await asyncio.gather(pipe(reader, upstream_writer), pipe(upstream_reader, writer))
+        self.connections.difference_update((writer, upstream_writer))
+
+
+class ProxyThread:
+    """Runs a FaultProxy on its own event loop, so the sync tests can flip it"""
+
+    def __init__(self, target_url):
+        target = urlsplit(target_url)
+        self.proxy = FaultProxy(target.hostname or "localhost", target.port or 27017)
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.port = free_port()
+
+    def start(self):
+        self.thread.start()
+        asyncio.run_coroutine_threadsafe(self.proxy.start(self.port), self.loop).result()
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self.proxy.stop(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+    def set_down(self, down):
+        self.loop.call_soon_threadsafe(self.proxy.set_down, down)
+
+
+def metric(text, metric_name, **labels):
+    """Value of one sample in a Prometheus text exposition, or None"""
+    label_text = ",".join(f'{key}="{value}"' for key, value in labels.items())
+    pattern = re.escape(metric_name) + (r"\{" + re.escape(label_text) + r"\}" if labels else "") + r" (\S+)"
+    match = re.search(r"^" + pattern + r"$", text, re.MULTILINE)
+    return float(match.group(1)) if match else None
+
+
+def wait_for(predicate, timeout=RECOVERY_TIMEOUT, interval=0.2):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(interval)
+    return False
+
+
+class Services:
+    def __init__(self, client, mail, proxy):
+        self.client = client
+        self.mail = mail
+        self.proxy = proxy
+        self.submitted = []
+
+    def metrics(self):
+        return self.client.get("/metrics").text
+
+    def set_mongo(self, state):
+        if self.proxy is not None:
+            self.proxy.set_down(state == "down")
+        else:
+            self.client.post("/__bench__/faults", json={"mongo": state})
+
+    def submit(self, i):
+        message = f"Fault injection submission {i}"
+        started = time.perf_counter()
+        response = self.client.post("/api/contact", json={
+            "name": "Fault", "email": f"fault{i}@example.com", "subject": "Fault injection",
+            "message": message, "company": "Faults",
+        })
+        elapsed = time.perf_counter() - started
+        if response.status_code == 200:
+            self.submitted.append(message)
+        return response.status_code, elapsed
+
+    def mail_stats(self):
+        return self.mail.get("/stats").json()
+
+
+def start_processes(spill_dir, log, mongo_url):
+    mail_port, app_port = free_port(), free_port()
+    mail = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "benchmarks.fake_sendgrid:app",
+         "--host", "127.0.0.1", "--port", str(mail_port), "--log-level", "warning"],
+        stdout=log, stderr=log,
+    )
+    env = dict(
+        os.environ,
+        BENCH_PORT=str(app_port),
+        BENCH_MONGO="memory" if mongo_url is None else "",
+        BENCH_FAULTS="1",
+        DATABASE_NAME=DATABASE_NAME,
+        SENDGRID_API_URL=f"http://127.0.0.1:{mail_port}",
+        SENDGRID_API_KEY="bench",
+        ADMIN_EMAIL=BENCH_ADMIN_EMAIL,
+        ADMIN_PASSWORD=BENCH_ADMIN_PASSWORD,
+        CONTACT_IP_RATE_PER_MINUTE="1000000000",
+        CONTACT_IP_BURST="1000000000",
+        MONGO_SERVER_SELECTION_TIMEOUT_MS=str(SELECTION_TIMEOUT_MS),
+        # Short periods so the run takes seconds rather than minutes
+        MONGO_BREAKER_RESET_SECONDS="1",
+        SENDGRID_BREAKER_RESET_SECONDS="2",
+        SPILL_DIR=str(spill_dir),
+        SPILL_REPLAY_INTERVAL="0.2",
+        OUTBOX_POLL_INTERVAL="0.2",
+        OUTBOX_BACKOFF_BASE="0.2",
+        OUTBOX_BACKOFF_MAX="1",
+    )
+    if mongo_url is not None:
+        env["MONGODB_URL"] = mongo_url
+    server = subprocess.Popen([sys.executable, "-m", "benchmarks.server"], env=env, stdout=log, stderr=log)
+    return mail, mail_port, server, app_port
+
+
+def drop_database():
+    client = MongoClient(TEST_MONGODB_URL, serverSelectionTimeoutMS=SELECTION_TIMEOUT_MS)
+    try:
+        client.drop_database(DATABASE_NAME)
+    finally:
+        client.close()
+
+
+@pytest.fixture(scope="module")
+def services(tmp_path_factory):
+    workdir = tmp_path_factory.mktemp("faults")
+    proxy, mongo_url = None, None
+    if TEST_MONGODB_URL:
+        drop_database()
+        proxy = ProxyThread(TEST_MONGODB_URL)
+        proxy.start()
+        mongo_url = f"mongodb://127.0.0.1:{proxy.port}/?directConnection=true"
+
+    # Server and mail sink output is kept in the module's tmp dir for failed runs
+    log = open(workdir / "server.log", "w")
+    mail_process, mail_port, server, app_port = start_processes(workdir / "spill", log, mongo_url)
+    try:
+        asyncio.run(wait_until_up(f"http://127.0.0.1:{mail_port}/stats", mail_process))
+        asyncio.run(wait_until_up(f"http://127.0.0.1:{app_port}/__bench__/loop-lag", server))
+
+        with httpx.Client(base_url=f"http://127.0.0.1:{app_port}", timeout=60) as client, \
+                httpx.Client(base_url=f"http://127.0.0.1:{mail_port}") as mail:
+            # Startup finishes its index builds and admin user before the first outage
+            assert wait_for(lambda: client.get("/health/ready").status_code == 200), "server never became ready"
+            yield Services(client, mail, proxy)
+    finally:
+        for process in (server, mail_process):
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        log.close()
+        if proxy is not None:
+            proxy.stop()
+            drop_database()
+
+
+@pytest.fixture(scope="module")
+def mongo_outage(services):
+    services.set_mongo("down")
+    statuses, before_trip, after_trip = {}, [], []
+    tripped = False
+    for i in range(CONTACTS):
+        # Open or half-open both mean requests are refused without waiting
+        tripped = tripped or bool(metric(services.metrics(), "circuit_breaker_state", name="mongo"))
+        status, elapsed = services.submit(i)
+        statuses[status] = statuses.get(status, 0) + 1
+        (after_trip if tripped else before_trip).append(elapsed)
+    pending = metric(services.metrics(), "spill_journal_pending_bytes")
+    return {"statuses": statuses, "before_trip": before_trip, "after_trip": after_trip, "pending": pending}
+
+
+@pytest.fixture(scope="module")
+def mongo_recovery(services, mongo_outage):
+    services.set_mongo("up")
+
+    def drained():
+        text = services.metrics()
+        return (metric(text, "spill_journal_pending_bytes") == 0
+                and metric(text, "circuit_breaker_state", name="mongo") == 0)
+
+    result = {"drained": wait_for(drained), "submitted": list(services.submitted), "stored": []}
+    login = services.client.post("/auth/login", json={"email": BENCH_ADMIN_EMAIL, "password": BENCH_ADMIN_PASSWORD})
+    assert login.status_code == 200, f"admin login: status {login.status_code}"
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    def all_stored():
+        response = services.client.get("/api/admin/contacts", params={"limit": 500, "company": "Faults"},
+                                       headers=headers)
+        result["stored"] = [item["message"] for item in reversed(response.json()["items"])]
+        return len(result["stored"]) >= len(result["submitted"])
+
+    # The last submissions may still be in the write-behind buffer
+    wait_for(all_stored)
+    return result
+
+
+@pytest.fixture(scope="module")
+def sendgrid_outage(services, mongo_recovery):
+    # Let the outbox deliver the notifications from the Mongo phases first
+    earlier_delivered = wait_for(lambda: services.mail_stats()["accepted"] >= len(services.submitted))
+    services.mail.post("/reset")
+    services.mail.post("/config", json={"fail_rate": 1})
+
+    start = len(services.submitted)
+    for i in range(start, start + EMAILS):
+        services.submit(i)
+
+    tripped = wait_for(lambda: metric(services.metrics(), "circuit_breaker_state", name="sendgrid") == 2)
+    # Hold the outage for a couple of reset periods; only the trial calls get through
+    time.sleep(OUTAGE_SECONDS)
+    failed = services.mail_stats()["failed"]
+
+    services.mail.post("/config", json={"fail_rate": 0})
+    wait_for(lambda: services.mail_stats()["accepted"] >= EMAILS)
+    return {"earlier_delivered": earlier_delivered, "tripped": tripped, "failed": failed,
+            "accepted": services.mail_stats()["accepted"]}
+
+
+def test_contacts_accepted_while_mongo_down(mongo_outage):
+    assert mongo_outage["statuses"] == {200: CONTACTS}
+
+
+def test_mongo_breaker_fails_fast(mongo_outage):
+    after_trip = mongo_outage["after_trip"]
+    assert after_trip, "the Mongo breaker never opened"
+    p99 = summarize(after_trip)["p99_ms"]
+    assert p99 < FAST_FAIL_MS, f"p99 {p99} ms once open, {summarize(mongo_outage['before_trip'])['p99_ms']} ms before"
+
+
+def test_submissions_spilled_to_the_journal(mongo_outage):
+    assert mongo_outage["pending"], "spill journal is empty"
+
+
+def test_journal_replayed_and_breaker_closed(mongo_recovery):
+    assert mongo_recovery["drained"]
+
+
+def test_every_submission_stored_in_order(mongo_recovery):
+    stored, submitted = mongo_recovery["stored"], mongo_recovery["submitted"]
+    assert sorted(stored) == sorted(submitted), f"{len(stored)} of {len(submitted)} stored"
+    assert stored == submitted
+
+
+def test_sendgrid_breaker_bounds_calls(sendgrid_outage):
+    assert sendgrid_outage["earlier_delivered"], "emails from the Mongo outage were never delivered"
+    assert sendgrid_outage["tripped"], "the SendGrid breaker never opened"
+    assert sendgrid_outage["failed"] < MAX_SENDGRID_CALLS, f"{sendgrid_outage['failed']} calls for {EMAILS} emails"
+
+
+def test_every_email_delivered_after_sendgrid_recovers(sendgrid_outage):
+    assert sendgrid_outage["accepted"] >= EMAILS, f"{sendgrid_outage['accepted']} of {EMAILS} delivered"
@@ -0,0 +1,113 @@
+"""
+Hot-query plans: build the index registry on a scratch database of the mongod
+at TEST_MONGODB_URL, run explain() on every query the request and worker paths
+issue, and fail on any plan that scans a whole collection.
+"""
+from datetime import datetime, timezone
+from typing import Iterator, List, Optional
+import asyncio
+
+import pytest
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.config import settings
+from app.indexes import IndexBuilder
+
+from .conftest import TEST_MONGODB_URL, requires_mongod
+
+pytestmark = requires_mongod
+
+class HotQuery:
+    __slots__ = ("name", "collection", "filter", "projection", "sort", "limit")
+
+    def __init__(self, name: str, collection: str, filter: dict, projection: Optional[dict] = None,
+                 sort=None, limit: Optional[int] = None):
+        self.name = name
+        self.collection = collection
+        self.filter = filter
+        self.projection = projection
+        self.sort = sort
+        self.limit = limit
+
+
+def hot_queries() -> List[HotQuery]:
+    """The queries on request and worker paths, with the filters and projections the code uses"""
+    from app.auth.models import LOGIN_PROJECTION, AUTH_CHECK_PROJECTION, PROFILE_FIELDS_PROJECTION
+    from app.contact_admin_router import SORT as CONTACT_SORT, after_cursor
+
+    now = datetime.now(timezone.utc)
+    user_id = ObjectId()
+    return [
+        HotQuery("authenticate_user", "users", {"email": "user@example.com"}, LOGIN_PROJECTION, limit=1),
+        HotQuery("get_user_by_id", "users", {"_id": user_id}, AUTH_CHECK_PROJECTION, limit=1),
+        HotQuery("load_profile_fields", "users", {"_id": user_id}, PROFILE_FIELDS_PROJECTION, limit=1),
+        HotQuery("create_admin_user", "users", {"email": settings.admin_email}, limit=1),
+        HotQuery("list_contacts", "contacts", {}, sort=CONTACT_SORT, limit=51),
+        HotQuery("list_contacts page", "contacts", {"$or": after_cursor(now, ObjectId())},
+                 sort=CONTACT_SORT, limit=51),
+        HotQuery("list_contacts by email", "contacts", {"email": "user@example.com"}, sort=CONTACT_SORT, limit=51),
+        HotQuery("list_contacts by company", "contacts", {"company": "Acme"}, sort=CONTACT_SORT, limit=51),
+        HotQuery("contact daily stats", "contact_rollups",
+                 {"dim": "day", "key": {"$gte": "2026-01-01", "$lte": "2026-12-31"}}, sort=[("key", 1)]),
+        HotQuery("contact top companies", "contact_rollups", {"dim": "company"}, sort=[("count", -1)], limit=20),
+        HotQuery("session load", "sessions", {"_id": "session"}, limit=1),
+        HotQuery("revoke user sessions", "sessions", {"user_id": str(user_id), "revoked_at": None}),
+        HotQuery("revocation refresh", "revoked_tokens", {"expires_at": {"$gt": now}, "revoked_at": {"$gte": now}}),
+        HotQuery("login guard sync", "login_failures", {"_id": {"$in": ["account:user@example.com", "ip:127.0.0.1"]}}),
+        HotQuery("outbox claim", "email_outbox", {"$or": [
+            {"status": "pending", "next_attempt_at": {"$lte": now}},
+            {"status": "sending", "locked_until": {"$lte": now}},
+        ]}, {"_id": 1}, sort=[("next_attempt_at", 1)], limit=settings.outbox_batch_size),
+        HotQuery("outbox leased batch", "email_outbox", {"lease": ObjectId(), "status": "sending"}),
+    ]
+
+
+def plan_stages(plan) -> Iterator[str]:
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for value in plan.values():
+            yield from plan_stages(value)
+    elif isinstance(plan, list):
+        for value in plan:
+            yield from plan_stages(value)
+
+
+async def explain(db, query: HotQuery) -> List[str]:
+    cursor = db[query.collection].find(query.filter, query.projection)
+    if query.sort:
+        cursor = cursor.sort(query.sort)
+    if query.limit:
+        cursor = cursor.limit(query.limit)
+    result = await cursor.explain()
+    return list(plan_stages(result.get("queryPlanner", {}).get("winningPlan", {})))
+
+
+@pytest.fixture(scope="module")
+def plans():
+    async def build_and_explain():
+        client = AsyncIOMotorClient(TEST_MONGODB_URL)
+        db = client[f"{settings.database_name}_test_indexes"]
+        try:
+            builder = IndexBuilder()
+            await builder.ensure(db)
+            return builder.failed, {query.name: await explain(db, query) for query in hot_queries()}
+        finally:
+            await client.drop_database(db.name)
+            client.close()
+
+    return asyncio.run(build_and_explain())
+
+
+def test_indexes_build(plans):
+    failed, _ = plans
+    assert not failed
+
+
+@pytest.mark.parametrize("query", hot_queries(), ids=lambda query: query.name)
+def test_hot_query_uses_an_index(plans, query):
+    _, stages = plans
+    assert "COLLSCAN" not in stages[query.name], (
+        f"{query.name} on {query.collection} scans the collection: {' <- '.join(stages[query.name])}"
+    )
@@ -0,0 +1,46 @@
+"""
+Cold-start budget: import app.main and run the lifespan startup in fresh
+interpreters, and fail when either goes over IMPORT_BUDGET_MS /
+STARTUP_BUDGET_MS. Without TEST_MONGODB_URL the database phase is left out of
+the startup budget, as `python -m app.startup_report --exclude database` does.
+"""
+import os
+
+import pytest
+
+from app.config import settings
+from app.startup_report import budget_failures, measure_imports, measure_startup
+
+from .conftest import TEST_MONGODB_URL
+
+
+@pytest.fixture(scope="module")
+def startup():
+    env = {"MONGODB_URL": TEST_MONGODB_URL} if TEST_MONGODB_URL else {}
+    saved = {key: os.environ.get(key) for key in env}
+    os.environ.update(env)
+    try:
+        return measure_startup()
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+def test_import_within_budget():
+    imports = measure_imports(top=10)
+    failures = budget_failures(imports, {"total_ms": 0, "phases": {}}, settings.import_budget_ms, 0, [])
+    assert not failures, f"{failures}; slowest app modules: {imports['app_modules']}"
+
+
+def test_startup_within_budget(startup):
+    exclude = [] if TEST_MONGODB_URL else ["database"]
+    imports = {"total_ms": 0}
+    failures = budget_failures(imports, startup, 0, settings.startup_budget_ms, exclude)
+    assert not failures, f"{failures}; phases: {startup['phases']}"
+
+
+def test_every_phase_is_timed(startup):
+    assert {"static", "hashing_pool", "database", "background_tasks"} <= set(startup["phases"])